@@ -0,0 +1,146 @@
+import logging
+import os
+import tempfile
+import datetime as dt
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for analytics exports
+    pa = None
+    pq = None
+
+from ml_ranking import filters_fingerprint, model_version as current_model_version
+
+# Rows per Parquet row group / Arrow record batch
+EXPORT_BATCH_SIZE = 5000
+
+RULE_COMPONENTS = ["skills", "certifications", "project_domains", "education", "experience"]
+
+
+def ranking_schema():
+    if pa is None:
+        raise ImportError("pyarrow is required for columnar exports (pip install pyarrow)")
+    fields = [
+        pa.field("run_id", pa.string()),
+        pa.field("job_id", pa.int64()),
+        pa.field("application_id", pa.int64()),
+        pa.field("candidate_id", pa.int64()),
+        pa.field("resume_id", pa.int64()),
+        pa.field("name", pa.string()),
+        pa.field("email", pa.string()),
+        pa.field("applied_at", pa.timestamp("us")),
+        pa.field("rank", pa.int32()),
+    ]
+    fields += [pa.field(f"{component}_score", pa.float64()) for component in RULE_COMPONENTS]
+    fields += [
+        pa.field("rule_max_score", pa.float64()),
+        pa.field("rule_score", pa.float64()),
+        pa.field("semantic_score", pa.float64()),
+        pa.field("final_score", pa.float64()),
+        pa.field("match_score", pa.int32()),
+        pa.field("skills", pa.list_(pa.string())),
+        pa.field("explanation", pa.string()),
+        pa.field("model_version", pa.dictionary(pa.int8(), pa.string())),
+        pa.field("filter_fingerprint", pa.dictionary(pa.int8(), pa.string())),
+    ]
+    return pa.schema(fields)
+
+
+def _empty_columns(schema):
+    return {name: [] for name in schema.names}
+
+
+def _append_row(columns, rank, candidate, run_id, job_id, fingerprint, model_version):
+    breakdown = candidate.get("score_breakdown", {})
+    parsed = candidate.get("parsed_data") or {}
+    applied_at = candidate.get("applied_at")
+
+    columns["run_id"].append(run_id)
+    columns["job_id"].append(job_id)
+    columns["application_id"].append(candidate.get("id"))
+    columns["candidate_id"].append(candidate.get("candidate_id"))
+    columns["resume_id"].append(candidate.get("resume_id"))
+    columns["name"].append(candidate.get("name"))
+    columns["email"].append(candidate.get("email"))
+    columns["applied_at"].append(applied_at if isinstance(applied_at, dt.datetime) else None)
+    columns["rank"].append(rank)
+    for component in RULE_COMPONENTS:
+        columns[f"{component}_score"].append(float(breakdown.get(component, 0)))
+    columns["rule_max_score"].append(float(breakdown.get("max_score", 0)))
+    columns["rule_score"].append(candidate.get("rule_score"))
+    columns["semantic_score"].append(candidate.get("semantic_score"))
+    columns["final_score"].append(candidate.get("final_score"))
+    columns["match_score"].append(candidate.get("match_score"))
+    columns["skills"].append(list(parsed.get("skills", [])))
+    columns["explanation"].append(candidate.get("explanation", ""))
+    columns["model_version"].append(model_version)
+    columns["filter_fingerprint"].append(fingerprint)
+
+
+def iter_ranking_batches(candidates, job_id, filters, run_id="", batch_size=EXPORT_BATCH_SIZE, model_version=None):
+    # Converts ranked candidates into Arrow record batches of at most batch_size rows
+    schema = ranking_schema()
+    fingerprint = filters_fingerprint(filters)
+    model_version = model_version or current_model_version()
+    columns = _empty_columns(schema)
+    size = 0
+    for rank, candidate in enumerate(candidates, 1):
+        _append_row(columns, rank, candidate, run_id, job_id, fingerprint, model_version)
+        size += 1
+        if size >= batch_size:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = _empty_columns(schema)
+            size = 0
+    if size:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def write_ranking_columns(path, candidates, job_id, filters, run_id="", fmt="parquet", batch_size=EXPORT_BATCH_SIZE,
+                          model_version=None):
+    # fmt="parquet" for compact storage, fmt="arrow" for an uncompressed IPC file
+    # that pandas/pyarrow can memory-map without copying
+    schema = ranking_schema()
+    rows = 0
+    if fmt == "parquet":
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for batch in iter_ranking_batches(candidates, job_id, filters, run_id, batch_size, model_version):
+                writer.write_batch(batch, row_group_size=batch_size)
+                rows += batch.num_rows
+    elif fmt == "arrow":
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in iter_ranking_batches(candidates, job_id, filters, run_id, batch_size, model_version):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    logging.info("Exported %s ranking rows for job %s to %s", rows, job_id, path)
+    return rows
+
+
+def export_ranking_run(path, ranking_run, job_id, fmt="parquet"):
+    # Writes the run exactly as it was shown: its candidates, filters, run id and the
+    # model version recorded when it was ranked (no re-ranking)
+    return write_ranking_columns(
+        path, ranking_run["candidates"], job_id, ranking_run.get("filters") or {},
+        run_id=ranking_run.get("run_id", ""), fmt=fmt, model_version=ranking_run.get("model_version")
+    )
+
+def export_ranking_run_to_file(ranking_run, job_id, fmt="parquet"):
+    # Path of a temporary export for a download button; the caller deletes it
+    with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as export:
+        pass
+    try:
+        export_ranking_run(export.name, ranking_run, job_id, fmt)
+    except Exception:
+        os.remove(export.name)
+        raise
+    return export.name
+
+
+def load_ranking_export(path):
+    # Arrow IPC files are memory-mapped, so the DataFrame shares buffers where types allow
+    if path.endswith(".arrow"):
+        with pa.memory_map(path, "r") as source:
+            return pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True, self_destruct=True)
+    return pq.read_table(path).to_pandas(split_blocks=True, self_destruct=True)
@@ -0,0 +1,329 @@
+import os
+import json
+import base64
+import logging
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+from embedding_store import EmbeddingStore, normalize_rows
+
+# IVF (inverted file) index: vectors are bucketed under their nearest k-means
+# centroid and a query only scores the NPROBE closest buckets. Each bucket is an
+# EmbeddingStore, so the same float16/int8 compression applies.
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", "data/ann_index")
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+ANN_STORE_MODE = os.getenv("ANN_STORE_MODE", "float16")
+# Below this many vectors a single flat bucket is faster than clustering
+MIN_TRAIN_SIZE = 2048
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 100000
+# Replayed update log is folded into the saved index once it grows past this
+COMPACT_AFTER_OPS = 5000
+# The Streamlit app and ranker_cli serve share one index directory. Appends,
+# compaction and loads hold an exclusive lock on this file; each process
+# remembers how far it has replayed the log and which saved generation that
+# offset belongs to, and catches up before it writes or compacts.
+LOCK_FILE = "updates.lock"
+LOG_FILE = "updates.log"
+
+
+def suggested_nlist(count):
+    return max(1, min(65536, int(4 * np.sqrt(max(count, 1)))))
+
+
+def train_centroids(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    # Spherical k-means on a sample; centroids stay unit length so dot product ranks them
+    rng = np.random.default_rng(seed)
+    vectors = normalize_rows(vectors)
+    if len(vectors) > KMEANS_SAMPLE:
+        vectors = vectors[rng.choice(len(vectors), KMEANS_SAMPLE, replace=False)]
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            # Reseed empty clusters with random points
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+@contextmanager
+def _index_lock(path):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _saved_generation(path):
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            return json.load(f).get("generation", 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _save_array(path, name, array):
+    tmp_path = os.path.join(path, name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, os.path.join(path, name))
+
+
+class IVFIndex:
+    def __init__(self, dim, centroids=None, mode=ANN_STORE_MODE):
+        self.dim = dim
+        self.mode = mode
+        self.centroids = normalize_rows(centroids) if centroids is not None else np.zeros((1, dim), dtype=np.float32)
+        self.lists = [EmbeddingStore(dim, mode) for _ in range(len(self.centroids))]
+        self.assignment = {}
+        self.trained = centroids is not None
+        self.pending_ops = 0
+        # Saved generation this process's state is based on, and bytes of its log replayed
+        self.generation = 0
+        self.log_offset = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.assignment)
+
+    def __contains__(self, item_id):
+        return item_id in self.assignment
+
+    def _nearest_lists(self, vectors, n=1):
+        if not self.trained:
+            return np.zeros((len(vectors), 1), dtype=np.int64)
+        sims = vectors @ self.centroids.T
+        if n >= sims.shape[1]:
+            return np.argsort(-sims, axis=1)
+        best = np.argpartition(-sims, n - 1, axis=1)[:, :n]
+        order = np.take_along_axis(sims, best, axis=1).argsort(axis=1)[:, ::-1]
+        return np.take_along_axis(best, order, axis=1)
+
+    # ------------------- Updates -------------------
+    def add(self, ids, vectors):
+        vectors = normalize_rows(vectors)
+        with self.lock:
+            lists = self._nearest_lists(vectors)[:, 0]
+            for item_id, vector, list_no in zip(ids, vectors, lists):
+                current = self.assignment.get(item_id)
+                if current is not None and current != list_no:
+                    self.lists[current].remove(item_id)
+                self.lists[list_no].add([item_id], vector[None, :])
+                self.assignment[item_id] = int(list_no)
+            self.pending_ops += len(ids)
+
+    def remove(self, item_id):
+        with self.lock:
+            list_no = self.assignment.pop(item_id, None)
+            if list_no is None:
+                return False
+            self.lists[list_no].remove(item_id)
+            self.pending_ops += 1
+            return True
+
+    def retrain(self, nlist=None):
+        # Rebuckets every vector under freshly trained centroids
+        with self.lock:
+            ids, vectors = [], []
+            for store in self.lists:
+                for item_id in store.ids:
+                    ids.append(item_id)
+                    vectors.append(store.get(item_id))
+            if not ids:
+                return
+            vectors = np.vstack(vectors)
+            centroids = train_centroids(vectors, nlist or suggested_nlist(len(ids)))
+            self.centroids = centroids
+            self.lists = [EmbeddingStore(self.dim, self.mode) for _ in range(len(centroids))]
+            self.assignment = {}
+            self.trained = True
+            self.add(ids, vectors)
+
+    # ------------------- Queries -------------------
+    def search(self, query, k=10, nprobe=ANN_NPROBE):
+        query = normalize_rows(query)
+        with self.lock:
+            probe = self._nearest_lists(query, nprobe)[0]
+            hits = []
+            for list_no in probe:
+                store = self.lists[list_no]
+                if len(store):
+                    hits.extend(store.top_k(query[0], k))
+        hits.sort(key=lambda hit: hit[1], reverse=True)
+        return hits[:k]
+
+    # ------------------- Persistence -------------------
+    def save(self, path=ANN_INDEX_PATH):
+        # Replaces the saved index (and its log) with this one, e.g. after a full rebuild
+        with self.lock, _index_lock(path):
+            self._save_locked(path)
+
+    def _save_locked(self, path):
+        # All buckets go into one contiguous matrix with per-bucket offsets
+        with self.lock:
+            generation = _saved_generation(path) + 1
+            vectors, scales, ids, offsets = [], [], [], [0]
+            for store in self.lists:
+                v, s, i = store.arrays()
+                vectors.append(v)
+                scales.append(s)
+                ids.extend(i)
+                offsets.append(offsets[-1] + len(i))
+            # Write-then-rename so processes that have the old files mapped keep a valid view
+            _save_array(path, "centroids.npy", self.centroids)
+            _save_array(path, "vectors.npy", np.concatenate(vectors) if ids else np.zeros((0, self.dim), dtype=np.dtype(self.mode)))
+            _save_array(path, "scales.npy", np.concatenate(scales) if ids else np.zeros(0, dtype=np.float32))
+            tmp_meta = os.path.join(path, "meta.json.tmp")
+            with open(tmp_meta, "w") as f:
+                json.dump({"dim": self.dim, "mode": self.mode, "trained": self.trained, "ids": ids, "offsets": offsets,
+                           "generation": generation}, f)
+            os.replace(tmp_meta, os.path.join(path, "meta.json"))
+            log_path = os.path.join(path, LOG_FILE)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            self.generation = generation
+            self.log_offset = 0
+            self.pending_ops = 0
+
+    @classmethod
+    def load(cls, path=ANN_INDEX_PATH, mmap=True):
+        # Saved index plus its update log, read under the lock so a concurrent compaction can't interleave
+        with _index_lock(path):
+            return cls._load_locked(path, mmap)
+
+    @classmethod
+    def _load_locked(cls, path, mmap=True):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        mmap_mode = "r" if mmap else None
+        centroids = np.load(os.path.join(path, "centroids.npy"))
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode)
+        scales = np.load(os.path.join(path, "scales.npy"), mmap_mode=mmap_mode)
+
+        index = cls(meta["dim"], centroids if meta["trained"] else None, meta["mode"])
+        offsets = meta["offsets"]
+        for list_no in range(len(offsets) - 1):
+            start, end = offsets[list_no], offsets[list_no + 1]
+            list_ids = meta["ids"][start:end]
+            index.lists[list_no] = EmbeddingStore.from_arrays(meta["dim"], meta["mode"], vectors[start:end], scales[start:end], list_ids)
+            for item_id in list_ids:
+                index.assignment[item_id] = list_no
+        index.generation = meta.get("generation", 0)
+        index._replay_log(path)
+        return index
+
+    # Incremental updates are appended to a log instead of rewriting the index
+    def log_add(self, item_id, vector, path=ANN_INDEX_PATH):
+        self.log_add_batch([item_id], np.asarray(vector, dtype=np.float32)[None, :], path)
+
+    def log_add_batch(self, ids, vectors, path=ANN_INDEX_PATH):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        entries = [
+            {"op": "add", "id": item_id, "vector": base64.b64encode(vector.tobytes()).decode("ascii")}
+            for item_id, vector in zip(ids, vectors)
+        ]
+        self._append_log(entries, path)
+
+    def log_remove(self, item_id, path=ANN_INDEX_PATH):
+        self._append_log([{"op": "remove", "id": item_id}], path)
+
+    def _append_log(self, entries, path):
+        with self.lock, _index_lock(path):
+            # Pick up what other processes wrote first, so a compaction here saves their updates too
+            self.sync(path)
+            entries = [entry for entry in entries if entry["op"] == "add" or entry["id"] in self.assignment]
+            if not entries:
+                return
+            with open(os.path.join(path, LOG_FILE), "ab") as f:
+                if f.tell() != self.log_offset:
+                    f.truncate(self.log_offset)  # torn line left by a writer that crashed
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8"))
+                self.log_offset = f.tell()
+            for entry in entries:
+                self._apply(entry)
+            if self.pending_ops >= COMPACT_AFTER_OPS:
+                if not self.trained and len(self) >= MIN_TRAIN_SIZE:
+                    self.retrain()
+                self._save_locked(path)
+
+    def sync(self, path=ANN_INDEX_PATH):
+        # Caller holds the index lock. A newer saved generation means the log this
+        # process was following has been folded in and removed: reload from the save.
+        if _saved_generation(path) != self.generation:
+            self._reload(path)
+        else:
+            self._replay_log(path)
+
+    def _reload(self, path):
+        fresh = IVFIndex._load_locked(path) if os.path.exists(os.path.join(path, "meta.json")) else IVFIndex(self.dim)
+        with self.lock:
+            for name in ("dim", "mode", "centroids", "lists", "assignment", "trained", "pending_ops",
+                         "generation", "log_offset"):
+                setattr(self, name, getattr(fresh, name))
+            if fresh.generation == 0:
+                self._replay_log(path)
+
+    def _apply(self, entry):
+        if entry["op"] == "add":
+            vector = np.frombuffer(base64.b64decode(entry["vector"]), dtype=np.float32)
+            self.add([entry["id"]], vector[None, :])
+        else:
+            self.remove(entry["id"])
+
+    def _replay_log(self, path):
+        # Applies log entries past log_offset; a torn final line is left for the next read
+        log_path = os.path.join(path, LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, "rb") as f:
+            f.seek(self.log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn final line from a crash
+                self.log_offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(entry)
+
+
+# ===================== Shared Resume Index =====================
+_resume_index = None
+_resume_index_lock = threading.Lock()
+
+def get_resume_index(dim=768):
+    global _resume_index
+    with _resume_index_lock:
+        if _resume_index is None:
+            with _index_lock(ANN_INDEX_PATH):
+                if os.path.exists(os.path.join(ANN_INDEX_PATH, "meta.json")):
+                    _resume_index = IVFIndex._load_locked(ANN_INDEX_PATH)
+                else:
+                    _resume_index = IVFIndex(dim)
+                    _resume_index._replay_log(ANN_INDEX_PATH)
+            logging.info("Resume ANN index ready with %s vectors", len(_resume_index))
+        return _resume_index
+
+def reset_resume_index():
+    global _resume_index
+    with _resume_index_lock:
+        _resume_index = None
@@ -7,6 +7,11 @@ import time
 from auth import login_user, register_user, forgot_password
 from recruiter_dashboard import recruiter_panel
 from candidate_dashboard import candidate_panel
+from tracing import start_metrics_writer
+from db_instrumentation import db_scope
+
+# Prometheus text file for stage timings (only when METRICS_FILE is set)
+start_metrics_writer()
 
 # ------------------- PAGE CONFIG -------------------
 st.set_page_config(page_title="AI Resume Ranker", layout="wide")
@@ -122,10 +127,13 @@ elif st.session_state.logged_in and st.session_state.user:
     user_id = st.session_state.user.get("id")
     username = st.session_state.user.get("username")
 
+    # Queries are attributed to the dashboard that issued them
     if role == "candidate":
-        candidate_panel(candidate_id=user_id, candidate_name=username)
+        with db_scope("candidate_dashboard"):
+            candidate_panel(candidate_id=user_id, candidate_name=username)
     elif role == "recruiter":
-        recruiter_panel()
+        with db_scope("recruiter_dashboard"):
+            recruiter_panel()
     else:
         st.error("❌ Invalid role detected. Please contact support.")
 
@@ -0,0 +1,335 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+import datetime as dt
+import functools
+import threading
+import weakref
+
+try:
+    import asyncpg
+except ImportError:  # optional: without it every call runs the sync function in a thread
+    asyncpg = None
+
+import database
+from database import (
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT,
+    APPLICATIONS_BY_JOB_SQL, APPLICATIONS_BY_JOBS_SQL, RESUMES_BY_CANDIDATES_SQL, RESUME_BY_CANDIDATE_SQL,
+    SAVE_RANKINGS_SQL, rehydrate_parsed_text
+)
+from db_backends import using_sqlite
+from db_instrumentation import fingerprint, record_query, record_connect, DB_INSTRUMENTATION
+from blob_store import put_blob
+from cold_storage import get_cold_text
+
+# Async versions of the core data access functions (applications, resumes, jobs,
+# rankings) on asyncpg with a pool per event loop. They run the same SQL as
+# database.py. On the SQLite backend, or without asyncpg installed, each call runs
+# its database.py counterpart in a worker thread instead, so callers never branch.
+ASYNC_DB_POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", "2"))
+ASYNC_DB_POOL_MAX = int(os.getenv("ASYNC_DB_POOL_MAX", "10"))
+ASYNC_DB_TIMEOUT = float(os.getenv("ASYNC_DB_TIMEOUT", "60"))
+
+_pools = weakref.WeakKeyDictionary()
+_pool_locks = weakref.WeakKeyDictionary()
+_translations = {}
+
+
+def native():
+    return asyncpg is not None and not using_sqlite()
+
+def sync_fallback(sync_fn):
+    # The decorated coroutine runs on asyncpg; otherwise sync_fn runs in a thread
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not native():
+                return await asyncio.to_thread(sync_fn, *args, **kwargs)
+            return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ===================== Pool =====================
+async def _init_connection(conn):
+    # jsonb in and out as Python objects, like psycopg2's RealDictCursor rows
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+async def get_pool():
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is not None:
+        return pool
+    lock = _pool_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        pool = _pools.get(loop)
+        if pool is None:
+            started = time.perf_counter()
+            pool = await asyncpg.create_pool(
+                host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                port=int(DB_PORT) if str(DB_PORT).isdigit() else None,
+                min_size=ASYNC_DB_POOL_MIN, max_size=ASYNC_DB_POOL_MAX, init=_init_connection
+            )
+            if DB_INSTRUMENTATION:
+                record_connect(time.perf_counter() - started)
+            _pools[loop] = pool
+    return pool
+
+async def close_pool():
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+
+
+# ===================== Queries =====================
+def to_asyncpg(query):
+    # %s placeholders -> $1, $2, ...; = ANY(%s) takes a Python list as-is
+    sql = _translations.get(query)
+    if sql is None:
+        counter = iter(range(1, query.count("%s") + 1))
+        sql = re.sub(r"%s", lambda _: f"${next(counter)}", query).replace("%%", "%")
+        _translations[query] = sql
+    return sql
+
+def unnest_rows(query, types):
+    # execute_values' "VALUES %s" as one set-based statement: each column travels as
+    # a typed array, so a whole batch is one round trip just like execute_values
+    arrays = ", ".join(f"%s::{t}[]" for t in types)
+    return query.replace("VALUES %s", f"SELECT * FROM unnest({arrays})", 1)
+
+def columns(rows, width):
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(width)]
+
+async def run(conn, method, query, *args):
+    # conn.fetch/fetchrow/fetchval/execute/executemany with timing per fingerprint
+    statement = fingerprint(query)
+    started = time.perf_counter()
+    try:
+        result = await getattr(conn, method)(to_asyncpg(query), *args, timeout=ASYNC_DB_TIMEOUT)
+    except Exception:
+        if DB_INSTRUMENTATION:
+            record_query(statement, time.perf_counter() - started, 0, error=True)
+        raise
+    if DB_INSTRUMENTATION:
+        record_query(statement, time.perf_counter() - started, len(result) if method == "fetch" else -1)
+    return result
+
+async def fetch_dicts(query, *args):
+    pool = await get_pool()
+    return [dict(row) for row in await run(pool, "fetch", query, *args)]
+
+async def _rehydrate(rows, id_key="resume_id"):
+    # Cold-tier text comes off disk; keep that off the event loop
+    if any(isinstance(r.get("parsed_data"), dict) and r["parsed_data"].get("text_tier") == "cold" for r in rows):
+        await asyncio.to_thread(rehydrate_parsed_text, rows, id_key)
+    return rows
+
+
+# ------------------- Applications -------------------
+@sync_fallback(database.fetch_applications_by_job)
+async def fetch_applications_by_job(job_id):
+    try:
+        return await _rehydrate(await fetch_dicts(APPLICATIONS_BY_JOB_SQL, job_id))
+    except Exception as e:
+        logging.error("Error fetching applications with resume: %s", e)
+        return []
+
+@sync_fallback(database.fetch_applications_by_jobs)
+async def fetch_applications_by_jobs(job_ids):
+    if not job_ids:
+        return []
+    try:
+        return await _rehydrate(await fetch_dicts(APPLICATIONS_BY_JOBS_SQL, list(job_ids)))
+    except Exception as e:
+        logging.error("Error fetching applications for jobs: %s", e)
+        return []
+
+@sync_fallback(database.apply_to_job)
+async def apply_to_job(candidate_id, job_id):
+    pool = await get_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                resume_row = await run(conn, "fetchrow", """
+                    SELECT id, parsed_data->>'text_tier' AS text_tier FROM resumes
+                    WHERE candidate_id = %s ORDER BY uploaded_at DESC LIMIT 1
+                """, candidate_id)
+                if not resume_row:
+                    raise Exception("No resume found for this candidate.")
+                resume_id = resume_row["id"]
+                if await run(conn, "fetchval", "SELECT 1 FROM applications WHERE candidate_id = %s AND job_id = %s",
+                             candidate_id, job_id):
+                    raise Exception("You have already applied for this job.")
+                if resume_row["text_tier"] == "cold":
+                    parsed = dict(await run(conn, "fetchval", "SELECT parsed_data FROM resumes WHERE id = %s", resume_id) or {})
+                    parsed.pop("text_tier", None)
+                    parsed["text"] = await asyncio.to_thread(get_cold_text, resume_id) or ""
+                    await run(conn, "execute", "UPDATE resumes SET parsed_data = %s WHERE id = %s", parsed, resume_id)
+                await run(conn, "execute", """
+                    INSERT INTO applications (candidate_id, job_id, resume_id, applied_at)
+                    VALUES (%s, %s, %s, %s)
+                """, candidate_id, job_id, resume_id, dt.datetime.now())
+    except Exception as e:
+        logging.error("Error applying to job: %s", e)
+        raise
+
+
+# ------------------- Resumes -------------------
+@sync_fallback(database.fetch_resumes_by_candidates)
+async def fetch_resumes_by_candidates(candidate_ids):
+    if not candidate_ids:
+        return []
+    try:
+        return await _rehydrate(await fetch_dicts(RESUMES_BY_CANDIDATES_SQL, list(candidate_ids)))
+    except Exception as e:
+        logging.error("Error fetching resumes by candidates: %s", e)
+        return []
+
+@sync_fallback(database.fetch_resume_by_candidate)
+async def fetch_resume_by_candidate(candidate_id):
+    try:
+        rows = await fetch_dicts(RESUME_BY_CANDIDATE_SQL, candidate_id)
+        return (await _rehydrate(rows[:1], "id"))[0] if rows else None
+    except Exception as e:
+        logging.error("Error fetching resume: %s", e)
+        return None
+
+@sync_fallback(database.fetch_user_ids_by_emails)
+async def fetch_user_ids_by_emails(emails):
+    try:
+        rows = await fetch_dicts("SELECT id, LOWER(email) AS email FROM users WHERE LOWER(email) = ANY(%s)",
+                                 [e.lower() for e in emails])
+    except Exception as e:
+        logging.error("Fetch all error: %s", e)
+        return {}
+    return {row["email"]: row["id"] for row in rows}
+
+@sync_fallback(database.fetch_known_resume_hashes)
+async def fetch_known_resume_hashes(file_hashes):
+    if not file_hashes:
+        return set()
+    try:
+        rows = await fetch_dicts("""
+            SELECT DISTINCT file_sha256
+            FROM resumes
+            WHERE file_sha256 = ANY(%s)
+        """, list(file_hashes))
+    except Exception as e:
+        logging.error("Fetch all error: %s", e)
+        return set()
+    return {row["file_sha256"] for row in rows}
+
+RESUME_ROW_TYPES = ("int", "text", "text", "int", "text", "timestamp")
+
+@sync_fallback(database.upsert_resumes_batch)
+async def upsert_resumes_batch(rows):
+    # Same contract as database.upsert_resumes_batch; blobs are written from a thread
+    if not rows:
+        return 0
+    now = dt.datetime.now()
+    latest = {}
+    for row in rows:
+        latest[row[0]] = row
+    hashes = await asyncio.to_thread(lambda: [put_blob(row[1]) for row in latest.values()])
+    values = [
+        (candidate_id, file_sha256, file_name, file_size, json.dumps(parsed_data), now)
+        for (candidate_id, _, file_name, file_size, parsed_data), file_sha256 in zip(latest.values(), hashes)
+    ]
+    pool = await get_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                existing = {r["candidate_id"] for r in await run(
+                    conn, "fetch", "SELECT candidate_id FROM resumes WHERE candidate_id = ANY(%s)", list(latest)
+                )}
+                inserts = [v for v in values if v[0] not in existing]
+                updates = [v for v in values if v[0] in existing]
+                # Same statements as database.upsert_resumes_batch, one per batch
+                if inserts:
+                    await run(conn, "execute", unnest_rows("""
+                        INSERT INTO resumes (candidate_id, file_sha256, file_name, file_size, parsed_data, uploaded_at)
+                        SELECT candidate_id, file_sha256, file_name, file_size, parsed_data::jsonb, uploaded_at
+                        FROM (VALUES %s) AS v (candidate_id, file_sha256, file_name, file_size, parsed_data, uploaded_at)
+                    """, RESUME_ROW_TYPES), *columns(inserts, 6))
+                if updates:
+                    await run(conn, "execute", unnest_rows("""
+                        UPDATE resumes AS r SET
+                            file_data = NULL, file_sha256 = v.file_sha256, file_name = v.file_name, file_size = v.file_size,
+                            parsed_data = v.parsed_data::jsonb, uploaded_at = v.uploaded_at
+                        FROM (VALUES %s) AS v (candidate_id, file_sha256, file_name, file_size, parsed_data, uploaded_at)
+                        WHERE r.candidate_id = v.candidate_id
+                    """, RESUME_ROW_TYPES), *columns(updates, 6))
+        return len(values)
+    except Exception as e:
+        logging.error("Error in upsert_resumes_batch: %s", e)
+        raise
+
+
+# ------------------- Jobs -------------------
+@sync_fallback(database.fetch_job_by_id)
+async def fetch_job_by_id(job_id):
+    try:
+        rows = await fetch_dicts("SELECT * FROM jobs WHERE id = %s", job_id)
+        return rows[0] if rows else None
+    except Exception as e:
+        logging.error("Fetch one error: %s", e)
+        return None
+
+@sync_fallback(database.fetch_active_jobs)
+async def fetch_active_jobs():
+    try:
+        return await fetch_dicts("SELECT * FROM jobs WHERE status = 'active' ORDER BY created_at DESC")
+    except Exception as e:
+        logging.error("Fetch all error: %s", e)
+        return []
+
+@sync_fallback(database.fetch_active_jobs_by_recruiter)
+async def fetch_active_jobs_by_recruiter(recruiter_id):
+    try:
+        return await fetch_dicts(
+            "SELECT * FROM jobs WHERE recruiter_id = %s AND status = 'active' ORDER BY created_at DESC", recruiter_id
+        )
+    except Exception as e:
+        logging.error("Fetch all error: %s", e)
+        return []
+
+
+# ------------------- Rankings -------------------
+@sync_fallback(database.save_ranking_results)
+async def save_ranking_results(rows):
+    now = dt.datetime.now()
+    pool = await get_pool()
+    try:
+        async with pool.acquire() as conn:
+            await run(conn, "execute", unnest_rows(SAVE_RANKINGS_SQL, ("int", "real", "timestamp")),
+                      *columns([(application_id, float(score), now) for application_id, score in rows], 3))
+        return True
+    except Exception as e:
+        logging.error("Error saving ranking results: %s", e)
+        return False
+
+
+# ===================== Sync Callers =====================
+# One long-lived event loop on a daemon thread, so sync code (bulk ingest, CLI
+# tools) can hand database work off and keep its own thread busy with CPU work.
+_loop = None
+_loop_lock = threading.Lock()
+
+def background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-db", daemon=True).start()
+    return _loop
+
+def submit(coro):
+    # Returns a concurrent.futures.Future for the coroutine's result
+    return asyncio.run_coroutine_threadsafe(coro, background_loop())
+
+def run_sync(coro, timeout=None):
+    return submit(coro).result(timeout)
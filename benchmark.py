@@ -0,0 +1,305 @@
+"""
+Offline benchmarks for the parsing and ranking hot paths on a synthetic corpus.
+
+    python benchmark.py --scales 100,1000,10000 --output data/benchmarks/latest.json
+    python benchmark.py --scales 1000 --compare data/benchmarks/baseline.json
+    python benchmark.py --scales 100000 --encoder hashing --skip parse
+
+Measures parse_resume, rule_based_score, rank_resumes (end to end, cold and
+with warm caches), PDF/CSV report generation and the float16/int8 embedding
+stores (recall@10 and score drift against float32, plus query latency). Each result records
+throughput, p50/p95 latency and peak RSS; the JSON file carries the commit and
+machine details so runs can be compared across commits. No database server is
+needed: rank_resumes reads its applications from the synthetic corpus, and the
+"db" stage seeds a throwaway embedded SQLite database (DB_BACKEND=sqlite).
+
+--encoder hashing swaps the sentence-transformer for a deterministic hashed
+bag-of-words encoder, isolating everything except model inference.
+"""
+import os
+import io
+import sys
+import copy
+import json
+import time
+import zlib
+import atexit
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+
+# Keep benchmark runs out of the real caches (and the real caches out of the benchmark)
+_CACHE_ROOT = tempfile.mkdtemp(prefix="resume-bench-")
+atexit.register(shutil.rmtree, _CACHE_ROOT, True)
+os.environ.setdefault("PARSE_CACHE_DIR", os.path.join(_CACHE_ROOT, "parse_cache"))
+os.environ.setdefault("CHUNK_CACHE_DIR", os.path.join(_CACHE_ROOT, "chunk_cache"))
+os.environ.setdefault("BLOB_STORE_DIR", os.path.join(_CACHE_ROOT, "blobs"))
+
+import numpy as np
+
+import ml_ranking
+import database
+import db_backends
+import synthetic_corpus as corpus
+from resume_parser import parse_resume
+from ml_ranking import rule_based_score, build_filters_from_job, rank_resumes
+from resume_chunks import clear_chunk_cache
+from feature_precompute import precompute_job
+from parse_cache import clear_parse_cache
+from report_generator import generate_pdf_report_with_explanations, generate_csv_report_with_explanations
+from embedding_store import EmbeddingStore, quantization_report
+
+DEFAULT_SCALES = "100,1000"
+REGRESSION_THRESHOLD = 0.10
+
+
+# ===================== Measurement =====================
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+    except ImportError:
+        return None
+
+def summarize(name, scale, latencies, items, total_seconds=None, **extra):
+    latencies = np.asarray(latencies, dtype=np.float64)
+    total = float(total_seconds if total_seconds is not None else latencies.sum())
+    return {
+        "name": name,
+        "scale": scale,
+        "items": items,
+        "runs": len(latencies),
+        "seconds": round(total, 6),
+        "throughput_per_sec": round(items / total, 3) if total else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        **extra
+    }
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+# ===================== Encoders =====================
+def hashing_encoder(dim=768):
+    # Deterministic stand-in for the transformer: hashed bag of words, L2-normalised
+    def encode(texts):
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                out[row, zlib.crc32(word.encode("utf-8")) % dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+    return encode
+
+
+# ===================== Benchmarks =====================
+def bench_parse(sample, seed):
+    # Every PDF is distinct, so each call is a parse-cache miss
+    pdfs = [corpus.resume_pdf(corpus.resume_fields(i, seed)) for i in range(sample)]
+    latencies = []
+    for pdf_bytes in pdfs:
+        _, seconds = timed(parse_resume, io.BytesIO(pdf_bytes))
+        latencies.append(seconds)
+    return summarize("parse_resume", sample, latencies, sample)
+
+def bench_rule_score(applications, filters, scale):
+    latencies = []
+    for app in applications:
+        _, seconds = timed(rule_based_score, app, filters)
+        latencies.append(seconds)
+    return summarize("rule_based_score", scale, latencies, len(applications))
+
+def bench_rank(job, applications, filters, scale, repeats):
+    # rank_resumes mutates the rows it scores, so every run gets a fresh copy. Stored
+    # application scores are off here; bench_database times the precomputed path
+    ml_ranking.fetch_applications_by_job = lambda job_id: copy.deepcopy(applications)
+    ml_ranking.fetch_job_by_id = lambda job_id: None
+    ml_ranking.PRECOMPUTED_SCORES = False
+    clear_chunk_cache()
+    ranked, cold = timed(rank_resumes, job["id"], filters, True)
+    results = [summarize("rank_resumes_cold", scale, [cold], scale)]
+    warm = [timed(rank_resumes, job["id"], filters, True)[1] for _ in range(repeats)]
+    results.append(summarize("rank_resumes_warm", scale, warm, scale * repeats))
+    return ranked, results
+
+def bench_reports(job, ranked, scale, pdf_rows):
+    results = []
+    _, seconds = timed(generate_csv_report_with_explanations, job["job_title"], ranked)
+    results.append(summarize("report_csv", scale, [seconds], len(ranked)))
+    shortlist = ranked[:pdf_rows]
+    _, seconds = timed(generate_pdf_report_with_explanations, job["job_title"], shortlist)
+    results.append(summarize("report_pdf", scale, [seconds], len(shortlist)))
+    return results
+
+def bench_quantization(applications, scale, seed, queries=50, k=10):
+    # Whole-resume vectors (as in the discovery index) queried with job texts; recall and
+    # drift come from quantization_report, latency from top_k on each mode's store
+    vectors = ml_ranking.encode_texts([a["parsed_data"]["text"] for a in applications])
+    job_texts = [ml_ranking.job_text_from_filters(build_filters_from_job(corpus.job_posting(i, seed)))
+                 for i in range(queries)]
+    query_vectors = ml_ranking.encode_texts(job_texts)
+    report = quantization_report(vectors, query_vectors, k=k)
+    results = []
+    for mode in ("float32", "float16", "int8"):
+        store = EmbeddingStore(vectors.shape[1], mode)
+        store.add(list(range(len(vectors))), vectors)
+        latencies = [timed(store.top_k, query, k)[1] for query in query_vectors]
+        results.append(summarize(f"embedding_store_{mode}", scale, latencies, len(query_vectors), **report[mode]))
+    return results
+
+def bench_database(job, applications, scale, repeats):
+    # The dashboard's read and write paths against an embedded SQLite file
+    db_backends.set_backend("sqlite", os.path.join(_CACHE_ROOT, f"bench_{scale}.db"))
+    with database.get_cursor() as cur:
+        db_backends.execute_values(cur, "INSERT INTO users (username, email, password_hash, phone, role) VALUES %s",
+                                   [("recruiter", "recruiter@example.com", "x", "", "recruiter")] +
+                                   [(a["name"], a["email"], "x", a["phone"], "candidate") for a in applications])
+        cur.execute("INSERT INTO jobs (recruiter_id, job_title, description, skills, num_resumes_to_shortlist, status) "
+                    "VALUES (1, %s, %s, %s, %s, 'active')",
+                    (job["job_title"], job["description"], job["skills"], job["num_resumes_to_shortlist"]))
+    database.upsert_resumes_batch([
+        (i + 2, b"", a["file_name"], 0, a["parsed_data"]) for i, a in enumerate(applications)
+    ])
+    with database.get_cursor() as cur:
+        db_backends.execute_values(cur, "INSERT INTO applications (candidate_id, job_id, resume_id) VALUES %s",
+                                   [(i + 2, 1, i + 1) for i in range(len(applications))], page_size=1000)
+
+    results = []
+    fetched = []
+    latencies = []
+    for _ in range(repeats):
+        fetched, seconds = timed(database.fetch_applications_by_job, 1)
+        latencies.append(seconds)
+    results.append(summarize("db_fetch_applications", scale, latencies, len(fetched) * repeats))
+    lookups = [timed(database.fetch_job_by_id, 1)[1] for _ in range(200)]
+    results.append(summarize("db_fetch_job", scale, lookups, len(lookups)))
+    rows = [(a["id"], 0.5) for a in fetched]
+    latencies = [timed(database.save_ranking_results, rows)[1] for _ in range(repeats)]
+    results.append(summarize("db_save_rankings", scale, latencies, len(rows) * repeats))
+
+    # Ranking once feature_precompute has stored every application's scores
+    db_job = database.fetch_job_by_id(1)
+    ml_ranking.fetch_applications_by_job = database.fetch_applications_by_job
+    ml_ranking.fetch_job_by_id = database.fetch_job_by_id
+    ml_ranking.PRECOMPUTED_SCORES = True
+    _, seconds = timed(precompute_job, db_job)
+    results.append(summarize("precompute_job", scale, [seconds], scale))
+    filters = build_filters_from_job(db_job)
+    latencies = [timed(rank_resumes, 1, filters, True)[1] for _ in range(repeats)]
+    results.append(summarize("rank_resumes_precomputed", scale, latencies, scale * repeats))
+    db_backends.close_sqlite_connections()
+    return results
+
+def run(scales, seed=0, parse_sample=100, repeats=3, pdf_rows=100, encoder="model", skip=()):
+    if encoder == "hashing":
+        ml_ranking.encode_texts = hashing_encoder()
+    results = []
+    if "parse" not in skip:
+        clear_parse_cache()
+        results.append(bench_parse(parse_sample, seed))
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    job = corpus.job_posting(0, seed)
+    filters = build_filters_from_job(job)
+    for scale in scales:
+        applications = corpus.applications_for_job(job, scale, seed)
+        stage_results = []
+        if "rule" not in skip:
+            stage_results.append(bench_rule_score(applications, filters, scale))
+        if "rank" not in skip:
+            ranked, rank_results = bench_rank(job, applications, filters, scale, repeats)
+            stage_results.extend(rank_results)
+            if "report" not in skip:
+                stage_results.extend(bench_reports(job, ranked, scale, pdf_rows))
+        if "quant" not in skip:
+            stage_results.extend(bench_quantization(applications, scale, seed))
+        if "db" not in skip:
+            stage_results.extend(bench_database(job, applications, scale, repeats))
+        for result in stage_results:
+            print(json.dumps(result), file=sys.stderr)
+        results.extend(stage_results)
+    return results
+
+
+# ===================== Results =====================
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_metadata(args, scales):
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "encoder": args.encoder,
+        "model": ml_ranking.MODEL_NAME if args.encoder == "model" else None,
+        "seed": args.seed,
+        "scales": scales,
+        "parse_sample": args.parse_sample,
+        "repeats": args.repeats
+    }
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    # Rows of (name, scale, baseline p50, current p50, ratio, flag) for matching benchmarks
+    previous = {(r["name"], r["scale"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = previous.get((result["name"], result["scale"]))
+        if not old or not old["p50_ms"]:
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        flag = "REGRESSION" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "")
+        rows.append((result["name"], result["scale"], old["p50_ms"], result["p50_ms"], ratio, flag))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing and ranking on a synthetic corpus")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated applicant pool sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parse-sample", type=int, default=100, help="PDFs to generate and parse")
+    parser.add_argument("--repeats", type=int, default=3, help="Warm rank_resumes runs per scale")
+    parser.add_argument("--pdf-rows", type=int, default=100, help="Candidates in the PDF report")
+    parser.add_argument("--encoder", choices=["model", "hashing"], default="model")
+    parser.add_argument("--skip", default="", help="Comma-separated stages to skip: parse,rule,rank,report,quant,db")
+    parser.add_argument("--output", default=None, help="Results JSON (default: data/benchmarks/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    skip = {s.strip() for s in args.skip.split(",") if s.strip()}
+    report = {
+        "meta": run_metadata(args, scales),
+        "results": run(scales, args.seed, args.parse_sample, args.repeats, args.pdf_rows, args.encoder, skip)
+    }
+
+    output = args.output or os.path.join("data", "benchmarks", f"{report['meta']['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"{'benchmark':<22} {'scale':>7} {'base p50 ms':>12} {'p50 ms':>10} {'ratio':>7}")
+        for name, scale, old, new, ratio, flag in compare(report, baseline):
+            print(f"{name:<22} {scale:>7} {old:>12.3f} {new:>10.3f} {ratio:>7.2f} {flag}")
+
+if __name__ == "__main__":
+    main()
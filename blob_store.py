@@ -0,0 +1,159 @@
+import os
+import mmap
+import hashlib
+import time
+import logging
+import tempfile
+
+from cold_storage import write_cold, read_cold, delete_cold, cold_keys, cold_path
+
+# Resume PDFs live outside the relational tables, content-addressed by SHA-256:
+# resumes keeps only file_sha256 and file_size, identical uploads share one file.
+#   BLOB_STORE=filesystem   files under BLOB_STORE_DIR/ab/cd/<sha256> (default)
+# Other stores register a factory in BLOB_STORES and implement put/open/exists/delete/hashes/freeze.
+BLOB_STORE = os.getenv("BLOB_STORE", "filesystem")
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "data/blobs")
+
+
+def blob_sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class FilesystemBlobStore:
+    def __init__(self, root=BLOB_STORE_DIR):
+        self.root = root
+
+    def path_for(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def put(self, data, sha256=None):
+        # Written once: a blob that is already stored is never rewritten, only touched
+        # so garbage collection's grace period covers the new reference too
+        sha256 = sha256 or blob_sha256(data)
+        path = self.path_for(sha256)
+        if os.path.exists(path):
+            os.utime(path)
+            return sha256
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)  # readers never see a partial file
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return sha256
+
+    def open(self, sha256):
+        # Read-only memory map: pages are faulted in from the page cache as the
+        # consumer reads them, no Python-side copy of the whole file up front.
+        # Frozen blobs are decompressed from the cold tier instead (and stay there).
+        # Raises FileNotFoundError for unknown hashes.
+        try:
+            f = open(self.path_for(sha256), "rb")
+        except FileNotFoundError:
+            data = read_cold("blobs", sha256)
+            if data is None:
+                raise
+            return data
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def freeze(self, sha256):
+        # Compress into the cold tier and drop the hot copy: (hot bytes freed, cold bytes)
+        path = self.path_for(sha256)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0, 0
+        cold_size = write_cold("blobs", sha256, data)
+        os.remove(path)
+        return len(data), cold_size
+
+    def exists(self, sha256):
+        return os.path.exists(self.path_for(sha256)) or os.path.exists(cold_path("blobs", sha256))
+
+    def delete(self, sha256):
+        removed = delete_cold("blobs", sha256)
+        try:
+            os.remove(self.path_for(sha256))
+            return True
+        except FileNotFoundError:
+            return removed
+
+    def hashes(self, older_than=None):
+        # Stored hashes in both tiers, optionally only those last written before a
+        # timestamp; a blob with a hot and a frozen copy is listed once, by its hot copy
+        seen = set()
+        if os.path.isdir(self.root):
+            for directory, _, files in os.walk(self.root):
+                for file_name in files:
+                    if len(file_name) != 64 or file_name.endswith(".tmp"):
+                        continue
+                    # A recent hot copy also protects an older frozen one
+                    seen.add(file_name)
+                    if older_than is not None:
+                        try:
+                            if os.stat(os.path.join(directory, file_name)).st_mtime >= older_than:
+                                continue
+                        except OSError:
+                            continue
+                    yield file_name
+        for sha256 in cold_keys("blobs", older_than):
+            if len(sha256) == 64 and sha256 not in seen:
+                yield sha256
+
+
+BLOB_STORES = {"filesystem": FilesystemBlobStore}
+_store = None
+
+def get_blob_store():
+    global _store
+    if _store is None:
+        factory = BLOB_STORES.get(BLOB_STORE)
+        if factory is None:
+            raise ValueError(f"Unknown BLOB_STORE {BLOB_STORE!r}; expected one of {sorted(BLOB_STORES)}")
+        _store = factory()
+    return _store
+
+def set_blob_store(store):
+    # For scripts and benchmarks that point the store somewhere else
+    global _store
+    _store = store
+
+
+# ===================== Public API =====================
+def put_blob(data):
+    return get_blob_store().put(bytes(data))
+
+def open_blob(sha256):
+    try:
+        return get_blob_store().open(sha256)
+    except FileNotFoundError:
+        logging.error("Resume blob %s is missing from the blob store", sha256)
+        return None
+
+def freeze_blob(sha256):
+    return get_blob_store().freeze(sha256)
+
+def collect_garbage(referenced, min_age=3600, dry_run=False):
+    # Deletes blobs no resume references any more; returns how many (would have) gone.
+    # Blobs written in the last min_age seconds are kept: their resume row may not be
+    # committed yet.
+    store = get_blob_store()
+    removed = 0
+    for sha256 in list(store.hashes(older_than=time.time() - min_age)):
+        if sha256 not in referenced:
+            if dry_run or store.delete(sha256):
+                removed += 1
+    return removed
@@ -0,0 +1,210 @@
+"""
+Bulk resume ingestion: parse a directory or archive of PDFs across a process pool.
+
+    python bulk_ingest.py /data/resumes/ --workers 8
+    python bulk_ingest.py historical.zip --checkpoint historical.ckpt
+
+Resumes are matched to candidates by the email address found in the PDF.
+Each committed batch is appended to the checkpoint file, so re-running the same
+command resumes where the previous run stopped. Stored resumes are also added to
+the discovery (ANN) index.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tarfile
+import zipfile
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import async_database
+from database import fetch_known_resume_hashes, ensure_blob_columns
+from ml_ranking import reindex_candidates
+
+DEFAULT_BATCH_SIZE = 200
+
+
+# ===================== Input Sources =====================
+def iter_pdf_sources(path):
+    # Yields (name, loader) pairs; loader() returns the PDF bytes when called
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for file_name in sorted(files):
+                if file_name.lower().endswith(".pdf"):
+                    full_path = os.path.join(root, file_name)
+                    yield os.path.relpath(full_path, path), (lambda p=full_path: open(p, "rb").read())
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                    yield info.filename, (lambda i=info: archive.read(i))
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(".pdf"):
+                    data = archive.extractfile(member).read()
+                    yield member.name, (lambda d=data: d)
+    else:
+        raise ValueError(f"{path} is not a directory, zip or tar archive")
+
+
+# ===================== Worker =====================
+def init_parse_worker():
+    # Importing the parser loads spaCy once for the lifetime of this worker
+    global parse_resume_bytes
+    from resume_parser import parse_resume_bytes
+
+def parse_in_worker(pdf_bytes):
+    # Only the parsed dict travels back; the parent keeps its own copy of the bytes
+    try:
+        return parse_resume_bytes(pdf_bytes), None
+    except Exception as e:
+        return None, str(e)
+
+
+# ===================== Checkpoint =====================
+def load_checkpoint(path):
+    done = set()
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    done.update(json.loads(line)["files"])
+                except (ValueError, KeyError):
+                    continue  # torn final line from an interrupted run
+    return done
+
+def append_checkpoint(path, names, stats):
+    if not path:
+        return
+    with open(path, "a") as f:
+        f.write(json.dumps({"files": names, "stats": stats}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ===================== Pipeline =====================
+async def flush_batch_async(batch, checkpoint, stats):
+    # Runs on the async-db loop, so the next batch keeps parsing while this one is written
+    emails = {parsed["email"].lower() for _, _, parsed in batch if parsed.get("email")}
+    user_ids = await async_database.fetch_user_ids_by_emails(list(emails)) if emails else {}
+    rows = []
+    for name, pdf_bytes, parsed in batch:
+        candidate_id = user_ids.get((parsed.get("email") or "").lower())
+        if candidate_id is None:
+            stats["unmatched"] += 1
+            logging.warning("No candidate account for %s (email=%r)", name, parsed.get("email"))
+            continue
+        rows.append((candidate_id, pdf_bytes, os.path.basename(name), len(pdf_bytes), parsed))
+    stored = await async_database.upsert_resumes_batch(rows)
+    stats["stored"] += stored
+    if stored:
+        await asyncio.to_thread(index_batch, [row[0] for row in rows])
+    await asyncio.to_thread(append_checkpoint, checkpoint, [name for name, _, _ in batch], dict(stats))
+
+def index_batch(candidate_ids):
+    # Discovery can still be rebuilt from the table, so a failed index update doesn't stop the ingest
+    try:
+        reindex_candidates(candidate_ids)
+    except Exception as e:
+        logging.error("Failed to index %s ingested resumes: %s", len(candidate_ids), e)
+
+def flush_batch(batch, checkpoint, stats):
+    async_database.run_sync(flush_batch_async(batch, checkpoint, stats))
+
+def log_progress(stats, started):
+    elapsed = time.perf_counter() - started
+    rate = stats["parsed"] / elapsed if elapsed else 0.0
+    logging.info(
+        "Parsed %s | stored %s | unmatched %s | failed %s | skipped %s | unchanged %s | %.1f resumes/sec",
+        stats["parsed"], stats["stored"], stats["unmatched"], stats["failed"], stats["skipped"], stats["unchanged"], rate
+    )
+
+def ingest(path, workers=None, batch_size=DEFAULT_BATCH_SIZE, checkpoint=None):
+    workers = workers or os.cpu_count() or 1
+    # The duplicate check looks hashes up through idx_resumes_file_sha256
+    ensure_blob_columns()
+    done = load_checkpoint(checkpoint)
+    stats = {"parsed": 0, "stored": 0, "unmatched": 0, "failed": 0, "skipped": 0, "unchanged": 0}
+    started = time.perf_counter()
+    batch, failed_names, in_flight = [], [], {}
+    # One database write in flight at a time: batches stay in order and a slow
+    # database holds back parsing instead of piling up batches in memory
+    pending_flush = None
+    # Bound queued PDFs so a huge archive never sits in memory all at once
+    max_in_flight = workers * 4
+
+    def flush(ready):
+        nonlocal pending_flush
+        if pending_flush is not None:
+            pending_flush.result()
+        pending_flush = async_database.submit(flush_batch_async(ready, checkpoint, stats)) if ready else None
+
+    def collect(futures):
+        nonlocal batch
+        for future in futures:
+            name, pdf_bytes = in_flight.pop(future)
+            parsed, error = future.result()
+            if error:
+                stats["failed"] += 1
+                failed_names.append(name)
+                logging.error("Failed to parse %s: %s", name, error)
+                continue
+            stats["parsed"] += 1
+            batch.append((name, pdf_bytes, parsed))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+                log_progress(stats, started)
+
+    def submit_group(pool, group):
+        # Files whose exact bytes are already stored are skipped without parsing
+        hashes = [hashlib.sha256(pdf_bytes).hexdigest() for _, pdf_bytes in group]
+        known = fetch_known_resume_hashes(set(hashes))
+        for (name, pdf_bytes), file_hash in zip(group, hashes):
+            if file_hash in known:
+                stats["unchanged"] += 1
+                continue
+            in_flight[pool.submit(parse_in_worker, pdf_bytes)] = (name, pdf_bytes)
+            if len(in_flight) >= max_in_flight:
+                finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                collect(finished)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_parse_worker) as pool:
+        group = []
+        for name, load in iter_pdf_sources(path):
+            if name in done:
+                stats["skipped"] += 1
+                continue
+            group.append((name, load()))
+            if len(group) >= max_in_flight:
+                submit_group(pool, group)
+                group = []
+        if group:
+            submit_group(pool, group)
+        finished, _ = wait(list(in_flight))
+        collect(finished)
+
+    flush(batch)
+    flush([])  # wait for the last write
+    log_progress(stats, started)
+    if failed_names:
+        logging.warning("%s files failed to parse and will be retried on the next run", len(failed_names))
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory or archive of resume PDFs")
+    parser.add_argument("path", help="Directory, .zip or .tar(.gz) of PDFs")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Resumes per database write")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <path>.ingest.ckpt)")
+    args = parser.parse_args()
+    checkpoint = args.checkpoint or args.path.rstrip("/\\") + ".ingest.ckpt"
+    stats = ingest(args.path, args.workers, args.batch_size, checkpoint)
+    print(json.dumps(stats))
+
+if __name__ == "__main__":
+    main()
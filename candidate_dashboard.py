@@ -1,4 +1,5 @@
 import streamlit as st
+import logging
 
 from database import (
     store_uploaded_resume,
@@ -9,9 +10,11 @@ from database import (
     apply_to_job,
     fetch_resume_by_candidate,
     has_uploaded_resume,
-    delete_resume_by_candidate
+    delete_resume_by_candidate,
+    fetch_resume_text_by_candidate
 )
-from resume_parser import save_resume
+from ml_ranking import index_resume, unindex_resume
+from feature_precompute import enqueue_candidate
 from resume_preview import show_resume_preview
 
 
@@ -32,11 +35,17 @@ def candidate_panel(candidate_id, candidate_name):
         if uploaded_file:
             with st.spinner("⏳ Uploading and parsing resume... Please wait."):
                 uploaded_file.seek(0)
-                store_uploaded_resume(candidate_id, uploaded_file)
-                uploaded_file.seek(0)
-                success = save_resume(candidate_id, uploaded_file)
+                # One sandboxed parse and one write; a failed parse leaves the stored resume as it was
+                success = store_uploaded_resume(candidate_id, uploaded_file)
 
             if success:
+                try:
+                    parsed = fetch_resume_text_by_candidate(candidate_id) or {}
+                    index_resume(candidate_id, parsed.get("text", ""))
+                except Exception as e:
+                    logging.error("Failed to index resume for candidate_id=%s: %s", candidate_id, e)
+                # Re-score existing applications against the new resume in the background
+                enqueue_candidate(candidate_id)
                 st.success("✅ Resume uploaded and parsed successfully.")
                 st.rerun()
             else:
@@ -56,6 +65,10 @@ def candidate_panel(candidate_id, candidate_name):
                 if st.button("🗑️ Delete Uploaded Resume", use_container_width=True):
                     deleted = delete_resume_by_candidate(candidate_id)
                     if deleted:
+                        try:
+                            unindex_resume(candidate_id)
+                        except Exception as e:
+                            logging.error("Failed to unindex resume for candidate_id=%s: %s", candidate_id, e)
                         st.success("🗑️ Resume deleted successfully.")
                         st.rerun()
                     else:
@@ -123,6 +136,7 @@ def candidate_panel(candidate_id, candidate_name):
                             if st.button("🚀 Apply", key=f"apply_{job['id']}"):
                                 try:
                                     apply_to_job(candidate_id, job['id'])
+                                    enqueue_candidate(candidate_id, job['id'])
                                     st.success("✅ Application submitted!")
                                     st.rerun()
                                 except Exception as e:
@@ -0,0 +1,104 @@
+import os
+import gzip
+import tempfile
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip is used when zstandard is not installed
+    zstandard = None
+
+# Compressed cold tier for resumes that only belong to archived or expired jobs
+# (see tier_resumes.py). Records are single compressed files keyed by kind and
+# key; the codec is detected from each file's magic bytes, so switching
+# COLD_CODEC never strands existing records.
+COLD_STORAGE_DIR = os.getenv("COLD_STORAGE_DIR", "data/cold")
+COLD_CODEC = os.getenv("COLD_CODEC") or ("zstd" if zstandard is not None else "gzip")
+COLD_LEVEL = int(os.getenv("COLD_LEVEL", "9"))
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+# ===================== Codec =====================
+def compress(data):
+    if COLD_CODEC == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard is required for COLD_CODEC=zstd (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=COLD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=min(COLD_LEVEL, 9))
+
+def decompress(data):
+    if data[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ImportError("zstandard is required to read zstd cold records (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if data[:2] == _GZIP_MAGIC:
+        return gzip.decompress(data)
+    raise ValueError("Unknown cold storage record format")
+
+
+# ===================== Records =====================
+def cold_path(kind, key):
+    key = str(key)
+    return os.path.join(COLD_STORAGE_DIR, kind, key[-2:].rjust(2, "0"), key + ".z")
+
+def write_cold(kind, key, data):
+    # Returns the compressed size; the record is replaced atomically
+    path = cold_path(kind, key)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    packed = compress(data)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(packed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(packed)
+
+def read_cold(kind, key):
+    try:
+        with open(cold_path(kind, key), "rb") as f:
+            return decompress(f.read())
+    except FileNotFoundError:
+        return None
+
+def delete_cold(kind, key):
+    try:
+        os.remove(cold_path(kind, key))
+        return True
+    except FileNotFoundError:
+        return False
+
+def cold_keys(kind, older_than=None):
+    # Keys stored under kind (as strings), optionally only those written before a timestamp
+    root = os.path.join(COLD_STORAGE_DIR, kind)
+    if not os.path.isdir(root):
+        return
+    for directory, _, files in os.walk(root):
+        for file_name in files:
+            if not file_name.endswith(".z"):
+                continue
+            if older_than is not None:
+                try:
+                    if os.stat(os.path.join(directory, file_name)).st_mtime >= older_than:
+                        continue
+                except OSError:
+                    continue
+            yield file_name[:-2]
+
+
+# ------------------- Resume Text -------------------
+def put_cold_text(resume_id, text):
+    return write_cold("texts", resume_id, text.encode("utf-8"))
+
+def get_cold_text(resume_id):
+    data = read_cold("texts", resume_id)
+    return data.decode("utf-8") if data is not None else None
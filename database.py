@@ -1,12 +1,19 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
+try:
+    import psycopg2
+except ImportError:  # SQLite-only deployments (DB_BACKEND=sqlite)
+    psycopg2 = None
 from contextlib import contextmanager
 import os
 import json
 import datetime as dt
 from dotenv import load_dotenv
 import logging
+import time
 from resume_parser import parse_resume
+from db_instrumentation import cursor_factory, record_connect, DB_INSTRUMENTATION
+from db_backends import using_sqlite, sqlite_connection, execute_values, Binary
+from blob_store import put_blob, open_blob
+from cold_storage import put_cold_text, get_cold_text
 import datetime
 
 load_dotenv()
@@ -19,18 +26,29 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "your password name")
 DB_PORT = os.getenv("DB_PORT", "your port")
 
 def get_connection():
-    return psycopg2.connect(
+    # Ad-hoc conn.cursor() calls get the instrumented cursor as the connection default
+    if using_sqlite():
+        return sqlite_connection()
+    started = time.perf_counter()
+    conn = psycopg2.connect(
         host=DB_HOST,
         dbname=DB_NAME,
         user=DB_USER,
         password=DB_PASSWORD,
-        port=DB_PORT
+        port=DB_PORT,
+        cursor_factory=cursor_factory()
     )
+    if DB_INSTRUMENTATION:
+        record_connect(time.perf_counter() - started)
+    return conn
 
 @contextmanager
 def get_cursor(dict_cursor=False):
     conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor if dict_cursor else None)
+    if using_sqlite():
+        cur = conn.cursor(dict_rows=dict_cursor)
+    else:
+        cur = conn.cursor(cursor_factory=cursor_factory(dict_cursor))
     try:
         yield cur
         conn.commit()
@@ -88,6 +106,11 @@ def get_user_id_by_email(email):
         logging.error("Error fetching user ID: %s", e)
         return None
 
+def fetch_user_ids_by_emails(emails):
+    rows = fetch_all("SELECT id, LOWER(email) AS email FROM users WHERE LOWER(email) = ANY(%s)",
+                     ([e.lower() for e in emails],))
+    return {row["email"]: row["id"] for row in rows}
+
 # ------------------- Resume Handling -------------------
 
 def save_resume(candidate_id, parsed_data, uploaded_file):
@@ -95,42 +118,147 @@ def save_resume(candidate_id, parsed_data, uploaded_file):
         file_data = uploaded_file.getvalue()
         file_name = uploaded_file.name
         file_size = len(file_data)
+        file_sha256 = put_blob(file_data)
         with get_cursor() as cur:
             cur.execute("SELECT 1 FROM resumes WHERE candidate_id = %s", (candidate_id,))
             exists = cur.fetchone()
             if exists:
                 cur.execute("""
-                    UPDATE resumes SET file_data = %s, file_name = %s, file_size = %s,
+                    UPDATE resumes SET file_data = NULL, file_sha256 = %s, file_name = %s, file_size = %s,
                     parsed_data = %s, uploaded_at = %s
                     WHERE candidate_id = %s
                 """, (
-                    psycopg2.Binary(file_data), file_name, file_size, json.dumps(parsed_data), dt.datetime.now(), candidate_id
+                    file_sha256, file_name, file_size, json.dumps(parsed_data), dt.datetime.now(), candidate_id
                 ))
             else:
                 cur.execute("""
-                    INSERT INTO resumes (candidate_id, file_data, file_name, file_size, parsed_data, uploaded_at)
+                    INSERT INTO resumes (candidate_id, file_sha256, file_name, file_size, parsed_data, uploaded_at)
                     VALUES (%s, %s, %s, %s, %s, %s)
                 """, (
-                    candidate_id, psycopg2.Binary(file_data), file_name, file_size, json.dumps(parsed_data), dt.datetime.now()
+                    candidate_id, file_sha256, file_name, file_size, json.dumps(parsed_data), dt.datetime.now()
                 ))
     except Exception as e:
         logging.error("Error saving resume: %s", e)
 
-def get_resume_file_by_candidate_id(candidate_id):
+def upsert_resumes_batch(rows):
+    # rows: (candidate_id, file_data, file_name, file_size, parsed_data) tuples.
+    # Inserts new candidates and replaces existing resumes in one transaction.
+    if not rows:
+        return 0
+    now = dt.datetime.now()
+    latest = {}
+    for row in rows:
+        latest[row[0]] = row  # last file wins if a candidate appears twice
     try:
         with get_cursor() as cur:
-            cur.execute("SELECT file_name, file_data FROM resumes WHERE candidate_id = %s", (candidate_id,))
+            cur.execute("SELECT candidate_id FROM resumes WHERE candidate_id = ANY(%s)", (list(latest),))
+            existing = {r[0] for r in cur.fetchall()}
+            values = [
+                (candidate_id, put_blob(file_data), file_name, file_size, json.dumps(parsed_data), now)
+                for candidate_id, file_data, file_name, file_size, parsed_data in latest.values()
+            ]
+            inserts = [v for v in values if v[0] not in existing]
+            updates = [v for v in values if v[0] in existing]
+            if inserts:
+                execute_values(cur, """
+                    INSERT INTO resumes (candidate_id, file_sha256, file_name, file_size, parsed_data, uploaded_at)
+                    VALUES %s
+                """, inserts, page_size=100)
+            if updates:
+                execute_values(cur, """
+                    UPDATE resumes AS r SET
+                        file_data = NULL, file_sha256 = v.file_sha256, file_name = v.file_name, file_size = v.file_size,
+                        parsed_data = v.parsed_data::jsonb, uploaded_at = v.uploaded_at
+                    FROM (VALUES %s) AS v (candidate_id, file_sha256, file_name, file_size, parsed_data, uploaded_at)
+                    WHERE r.candidate_id = v.candidate_id
+                """, updates, page_size=100)
+        return len(values)
+    except Exception as e:
+        logging.error("Error in upsert_resumes_batch: %s", e)
+        raise
+
+def fetch_known_resume_hashes(file_hashes):
+    # Which of these PDF hashes are already stored; uses idx_resumes_file_sha256
+    # (legacy inline rows only get the column once migrate_blobs.py has run)
+    if not file_hashes:
+        return set()
+    rows = fetch_all("""
+        SELECT DISTINCT file_sha256
+        FROM resumes
+        WHERE file_sha256 = ANY(%s)
+    """, (list(file_hashes),))
+    return {row["file_sha256"] for row in rows}
+
+def fetch_outdated_resumes(parser_version, after_id=0, limit=100):
+    # Keyset page of resumes parsed by an older parser version (or never stamped)
+    return fetch_all("""
+        SELECT id, candidate_id, file_sha256, file_data
+        FROM resumes
+        WHERE id > %s
+          AND COALESCE((parsed_data->>'parser_version')::int, 0) < %s
+        ORDER BY id
+        LIMIT %s
+    """, (after_id, parser_version, limit))
+
+def count_outdated_resumes(parser_version):
+    row = fetch_one("""
+        SELECT COUNT(*) AS total FROM resumes
+        WHERE COALESCE((parsed_data->>'parser_version')::int, 0) < %s
+    """, (parser_version,))
+    return row["total"] if row else 0
+
+def update_parsed_data_batch(rows, page_size=100):
+    # rows: (resume_id, file_sha256, parsed_data); parsed_data is replaced, the file is
+    # untouched. Rows whose file changed since it was read (a re-upload) are skipped.
+    # Returns the number of rows actually updated.
+    if not rows:
+        return 0
+    values = [(resume_id, file_sha256, json.dumps(parsed)) for resume_id, file_sha256, parsed in rows]
+    updated = 0
+    try:
+        with get_cursor() as cur:
+            for start in range(0, len(values), page_size):
+                execute_values(cur, """
+                    UPDATE resumes AS r SET parsed_data = v.parsed_data::jsonb
+                    FROM (VALUES %s) AS v (id, file_sha256, parsed_data)
+                    WHERE r.id = v.id AND r.file_sha256 IS NOT DISTINCT FROM v.file_sha256
+                """, values[start:start + page_size], page_size=page_size)
+                updated += max(cur.rowcount, 0)
+        return updated
+    except Exception as e:
+        logging.error("Error in update_parsed_data_batch: %s", e)
+        raise
+
+def resume_file_data(row):
+    # PDF bytes for a resume row: memory-mapped from the blob store, or the inline
+    # file_data of rows not yet moved out by migrate_blobs.py
+    if row.get("file_sha256"):
+        return open_blob(row["file_sha256"])
+    file_data = row.get("file_data")
+    return bytes(file_data) if file_data is not None else None
+
+def get_resume_file_by_candidate_id(candidate_id):
+    try:
+        with get_cursor(dict_cursor=True) as cur:
+            cur.execute("SELECT file_name, file_sha256, file_data FROM resumes WHERE candidate_id = %s", (candidate_id,))
             result = cur.fetchone()
-            return {"file_name": result[0], "file_data": bytes(result[1])} if result else None
+            return {"file_name": result["file_name"], "file_data": resume_file_data(result)} if result else None
     except Exception as e:
         logging.error("Error fetching resume file: %s", e)
         return None
 
+RESUME_BY_CANDIDATE_SQL = """
+    SELECT id, candidate_id, file_name, file_size, file_sha256, parsed_data, uploaded_at
+    FROM resumes WHERE candidate_id = %s
+"""
+
 def fetch_resume_by_candidate(candidate_id):
+    # Everything but the PDF; use get_resume_file_by_candidate_id for the file
     try:
         with get_cursor(dict_cursor=True) as cur:
-            cur.execute("SELECT * FROM resumes WHERE candidate_id = %s", (candidate_id,))
-            return cur.fetchone()
+            cur.execute(RESUME_BY_CANDIDATE_SQL, (candidate_id,))
+            row = cur.fetchone()
+            return rehydrate_parsed_text([row], "id")[0] if row else None
     except Exception as e:
         logging.error("Error fetching resume: %s", e)
         return None
@@ -173,13 +301,56 @@ def insert_job(recruiter_id, job_title, job_description, description, company_na
                 experience_required, education, certifications, perks, num_positions, deadline,
                 algorithm_choice, num_resumes_to_shortlist, created_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
             """, (
                 recruiter_id, job_title, description, company_name, salary, job_type, skills,
                 experience_required, education, certifications, perks, num_positions, deadline,
                 algorithm_choice, num_resumes_to_shortlist, created_at
             ))
+            job_id = cur.fetchone()[0]
     except Exception as e:
         logging.error("Error inserting job: %s", e)
+        return None
+    compile_job_profile_for(job_id)
+    return job_id
+
+def compile_job_profile_for(job_id):
+    # Skill/alias sets, education threshold and job vector are compiled once per save
+    try:
+        from ml_ranking import refresh_job_profile  # ml_ranking imports this module
+        refresh_job_profile(job_id)
+    except Exception as e:
+        logging.error("Error compiling profile for job_id=%s: %s", job_id, e)
+
+_job_profile_columns_ready = False
+
+def ensure_job_profile_columns():
+    global _job_profile_columns_ready
+    if _job_profile_columns_ready:
+        return
+    with get_cursor() as cur:
+        if using_sqlite():
+            cur.execute("PRAGMA table_info(jobs)")
+            columns = {row[1] for row in cur.fetchall()}
+            if "profile" not in columns:
+                cur.execute("ALTER TABLE jobs ADD COLUMN profile JSON")
+            if "profile_embedding" not in columns:
+                cur.execute("ALTER TABLE jobs ADD COLUMN profile_embedding BLOB")
+        else:
+            cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS profile JSONB")
+            cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS profile_embedding BYTEA")
+    _job_profile_columns_ready = True
+
+def save_job_profile(job_id, profile, embedding):
+    try:
+        ensure_job_profile_columns()
+        with get_cursor() as cur:
+            cur.execute("UPDATE jobs SET profile = %s, profile_embedding = %s WHERE id = %s",
+                        (json.dumps(profile), Binary(embedding), job_id))
+        return True
+    except Exception as e:
+        logging.error("Error saving job profile: %s", e)
+        return False
 
 def fetch_jobs_by_recruiter(recruiter_id):
     try:
@@ -204,7 +375,10 @@ def get_all_active_jobs():
 def apply_to_job(candidate_id, job_id):
     try:
         with get_cursor(dict_cursor=True) as cur:
-            cur.execute("SELECT id FROM resumes WHERE candidate_id = %s ORDER BY uploaded_at DESC LIMIT 1", (candidate_id,))
+            cur.execute("""
+                SELECT id, parsed_data->>'text_tier' AS text_tier FROM resumes
+                WHERE candidate_id = %s ORDER BY uploaded_at DESC LIMIT 1
+            """, (candidate_id,))
             resume_row = cur.fetchone()
             if not resume_row:
                 raise Exception("No resume found for this candidate.")
@@ -212,6 +386,9 @@ def apply_to_job(candidate_id, job_id):
             cur.execute("SELECT 1 FROM applications WHERE candidate_id = %s AND job_id = %s", (candidate_id, job_id))
             if cur.fetchone():
                 raise Exception("You have already applied for this job.")
+            if resume_row['text_tier'] == "cold":
+                # Back in play for an open job: restore the text to the hot row
+                thaw_resume_text(cur, resume_id)
             cur.execute("""
                 INSERT INTO applications (candidate_id, job_id, resume_id, applied_at)
                 VALUES (%s, %s, %s, %s)
@@ -229,29 +406,320 @@ def has_candidate_applied(candidate_id, job_id):
         logging.error("Error checking application: %s", e)
         return False
 
+APPLICATIONS_BY_JOB_SQL = """
+    SELECT 
+        a.*, 
+        u.username AS name, 
+        u.email, 
+        u.phone,  -- ✅ add this
+        r.file_name, 
+        r.file_sha256, 
+        r.parsed_data
+    FROM applications a
+    JOIN users u ON a.candidate_id = u.id
+    JOIN resumes r ON a.resume_id = r.id
+    WHERE a.job_id = %s
+    ORDER BY a.applied_at DESC
+"""
+
 def fetch_applications_by_job(job_id):
     try:
         with get_cursor(dict_cursor=True) as cur:
-            cur.execute("""
-                SELECT 
-                    a.*, 
-                    u.username AS name, 
-                    u.email, 
-                    u.phone,  -- ✅ add this
-                    r.file_name, 
-                    r.file_data, 
-                    r.parsed_data
-                FROM applications a
-                JOIN users u ON a.candidate_id = u.id
-                JOIN resumes r ON a.resume_id = r.id
-                WHERE a.job_id = %s
-                ORDER BY a.applied_at DESC
-            """, (job_id,))
-            return cur.fetchall()
+            cur.execute(APPLICATIONS_BY_JOB_SQL, (job_id,))
+            return rehydrate_parsed_text(cur.fetchall())
     except Exception as e:
         logging.error("Error fetching applications with resume: %s", e)
         return []
 
+APPLICATIONS_BY_JOBS_SQL = """
+    SELECT
+        a.*,
+        u.username AS name,
+        u.email,
+        u.phone,
+        r.file_name,
+        r.parsed_data
+    FROM applications a
+    JOIN users u ON a.candidate_id = u.id
+    JOIN resumes r ON a.resume_id = r.id
+    WHERE a.job_id = ANY(%s)
+    ORDER BY a.job_id, a.applied_at DESC
+"""
+
+def fetch_applications_by_jobs(job_ids):
+    # Applications for many jobs in one round trip; skips the PDF blob since batch
+    # ranking only needs parsed data
+    if not job_ids:
+        return []
+    try:
+        with get_cursor(dict_cursor=True) as cur:
+            cur.execute(APPLICATIONS_BY_JOBS_SQL, (list(job_ids),))
+            return rehydrate_parsed_text(cur.fetchall())
+    except Exception as e:
+        logging.error("Error fetching applications for jobs: %s", e)
+        return []
+
+RESUMES_BY_CANDIDATES_SQL = """
+    SELECT
+        r.id,
+        r.id AS resume_id,
+        r.candidate_id,
+        u.username AS name,
+        u.email,
+        u.phone,
+        r.file_name,
+        r.file_sha256,
+        r.parsed_data
+    FROM resumes r
+    JOIN users u ON r.candidate_id = u.id
+    WHERE r.candidate_id = ANY(%s)
+"""
+
+def fetch_resumes_by_candidates(candidate_ids):
+    # Resume rows shaped like fetch_applications_by_job rows, for pool-wide discovery
+    if not candidate_ids:
+        return []
+    try:
+        with get_cursor(dict_cursor=True) as cur:
+            cur.execute(RESUMES_BY_CANDIDATES_SQL, (list(candidate_ids),))
+            return rehydrate_parsed_text(cur.fetchall())
+    except Exception as e:
+        logging.error("Error fetching resumes by candidates: %s", e)
+        return []
+
+def iter_resume_texts(batch_size=500):
+    # Keyset pagination over resume text without loading the PDF blobs
+    last_id = 0
+    while True:
+        rows = fetch_all("""
+            SELECT id, candidate_id, COALESCE(parsed_data->>'text', '') AS text,
+                   parsed_data->>'text_tier' AS text_tier
+            FROM resumes
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (last_id, batch_size))
+        if not rows:
+            return
+        for row in rows:
+            if row["text_tier"] == "cold":
+                row["text"] = get_cold_text(row["id"]) or ""
+        yield rows
+        last_id = rows[-1]["id"]
+
+# ------------------- Precomputed Scores -------------------
+
+APPLICATIONS_BY_CANDIDATE_SQL = """
+    SELECT
+        a.*,
+        u.username AS name,
+        u.email,
+        u.phone,
+        r.file_name,
+        r.parsed_data
+    FROM applications a
+    JOIN users u ON a.candidate_id = u.id
+    JOIN resumes r ON a.resume_id = r.id
+    WHERE a.candidate_id = %s
+"""
+
+def fetch_applications_by_candidate(candidate_id, job_id=None):
+    # Rows shaped like fetch_applications_by_job, for precomputing one candidate's scores
+    query, params = APPLICATIONS_BY_CANDIDATE_SQL, (candidate_id,)
+    if job_id is not None:
+        query, params = query + " AND a.job_id = %s", (candidate_id, job_id)
+    try:
+        with get_cursor(dict_cursor=True) as cur:
+            cur.execute(query, params)
+            return rehydrate_parsed_text(cur.fetchall())
+    except Exception as e:
+        logging.error("Error fetching applications by candidate: %s", e)
+        return []
+
+_scores_table_ready = False
+
+def ensure_application_scores_table():
+    # SQLite creates it with the rest of its schema (db_backends.SQLITE_SCHEMA)
+    global _scores_table_ready
+    if _scores_table_ready or using_sqlite():
+        return
+    with get_cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS application_scores (
+                application_id INTEGER PRIMARY KEY REFERENCES applications(id) ON DELETE CASCADE,
+                resume_key TEXT, rule_key TEXT, rule_score REAL, explanation TEXT, breakdown JSONB,
+                semantic_key TEXT, similarity REAL, computed_at TIMESTAMP
+            )
+        """)
+    _scores_table_ready = True
+
+def fetch_application_scores(application_ids):
+    if not application_ids:
+        return {}
+    try:
+        ensure_application_scores_table()
+        with get_cursor(dict_cursor=True) as cur:
+            cur.execute("""
+                SELECT application_id, resume_key, rule_key, rule_score, explanation, breakdown,
+                       semantic_key, similarity
+                FROM application_scores
+                WHERE application_id = ANY(%s)
+            """, (list(application_ids),))
+            return {row["application_id"]: row for row in cur.fetchall()}
+    except Exception as e:
+        logging.error("Error fetching application scores: %s", e)
+        return {}
+
+SAVE_APPLICATION_SCORES_SQL = """
+    INSERT INTO application_scores (application_id, resume_key, rule_key, rule_score, explanation, breakdown,
+                                    semantic_key, similarity, computed_at)
+    VALUES %s
+    ON CONFLICT (application_id) DO UPDATE
+    SET resume_key = EXCLUDED.resume_key,
+        rule_key = EXCLUDED.rule_key,
+        rule_score = EXCLUDED.rule_score,
+        explanation = EXCLUDED.explanation,
+        breakdown = EXCLUDED.breakdown,
+        semantic_key = EXCLUDED.semantic_key,
+        similarity = EXCLUDED.similarity,
+        computed_at = EXCLUDED.computed_at
+"""
+
+def save_application_scores(rows):
+    # rows: (application_id, resume_key, rule_key, rule_score, explanation, breakdown,
+    # semantic_key, similarity) tuples
+    if not rows:
+        return True
+    now = dt.datetime.now()
+    try:
+        ensure_application_scores_table()
+        with get_cursor() as cur:
+            execute_values(cur, SAVE_APPLICATION_SCORES_SQL, [
+                (application_id, resume_key, rule_key, rule_score, explanation, json.dumps(breakdown),
+                 semantic_key, similarity, now)
+                for application_id, resume_key, rule_key, rule_score, explanation, breakdown, semantic_key, similarity
+                in rows
+            ], page_size=500)
+        return True
+    except Exception as e:
+        logging.error("Error saving application scores: %s", e)
+        return False
+
+# ------------------- Blob Store Migration -------------------
+
+def ensure_blob_columns():
+    # resumes.file_sha256 points into the blob store (see blob_store.py)
+    with get_cursor() as cur:
+        if using_sqlite():
+            cur.execute("PRAGMA table_info(resumes)")
+            if "file_sha256" not in {row[1] for row in cur.fetchall()}:
+                cur.execute("ALTER TABLE resumes ADD COLUMN file_sha256 TEXT")
+        else:
+            cur.execute("ALTER TABLE resumes ADD COLUMN IF NOT EXISTS file_sha256 TEXT")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_resumes_file_sha256 ON resumes (file_sha256)")
+
+def fetch_inline_blobs(after_id=0, limit=100):
+    # Keyset page of resumes still carrying the PDF in file_data; errors propagate
+    with get_cursor(dict_cursor=True) as cur:
+        cur.execute("""
+            SELECT id, file_data FROM resumes
+            WHERE id > %s AND file_data IS NOT NULL
+            ORDER BY id
+            LIMIT %s
+        """, (after_id, limit))
+        return cur.fetchall()
+
+def move_blobs_batch(rows):
+    # rows: (resume_id, file_sha256, file_size). Rows re-uploaded meanwhile already
+    # have file_data = NULL and are left alone.
+    if not rows:
+        return 0
+    with get_cursor() as cur:
+        execute_values(cur, """
+            UPDATE resumes AS r SET file_sha256 = v.file_sha256, file_size = v.file_size, file_data = NULL
+            FROM (VALUES %s) AS v (id, file_sha256, file_size)
+            WHERE r.id = v.id AND r.file_data IS NOT NULL
+        """, rows, page_size=100)
+    return len(rows)
+
+def fetch_referenced_blob_hashes():
+    # Raises rather than returning an empty set: garbage collection trusts this list
+    with get_cursor() as cur:
+        cur.execute("SELECT DISTINCT file_sha256 FROM resumes WHERE file_sha256 IS NOT NULL")
+        return {row[0] for row in cur.fetchall()}
+
+# ------------------- Cold Storage Tiering -------------------
+
+def rehydrate_parsed_text(rows, id_key="resume_id"):
+    # Cold resumes keep their ranking features in parsed_data; the raw text is
+    # read back from cold storage for this result only
+    for row in rows:
+        parsed = row.get("parsed_data")
+        if isinstance(parsed, dict) and parsed.get("text_tier") == "cold" and "text" not in parsed:
+            parsed["text"] = get_cold_text(row[id_key]) or ""
+    return rows
+
+def thaw_resume_text(cur, resume_id):
+    # cur: a dict cursor inside the caller's transaction
+    cur.execute("SELECT parsed_data FROM resumes WHERE id = %s", (resume_id,))
+    row = cur.fetchone()
+    parsed = dict(row["parsed_data"] or {})
+    parsed.pop("text_tier", None)
+    parsed["text"] = get_cold_text(resume_id) or ""
+    cur.execute("UPDATE resumes SET parsed_data = %s WHERE id = %s", (json.dumps(parsed), resume_id))
+
+def move_resumes_to_cold(today, after_id=0, limit=100):
+    # One keyset page of resumes whose applications are all to archived or expired
+    # jobs. Their text goes to cold storage (inline PDFs to the blob store) while
+    # the rows are locked; returns [(resume_id, file_sha256, text bytes moved)].
+    with get_cursor(dict_cursor=True) as cur:
+        cur.execute("""
+            SELECT r.id, r.file_sha256, r.file_data, r.parsed_data
+            FROM resumes r
+            WHERE r.id > %s
+              AND COALESCE(r.parsed_data->>'text_tier', 'hot') = 'hot'
+              AND EXISTS (SELECT 1 FROM applications a WHERE a.resume_id = r.id)
+              AND NOT EXISTS (
+                  SELECT 1 FROM applications a JOIN jobs j ON j.id = a.job_id
+                  WHERE a.resume_id = r.id
+                    AND COALESCE(j.status, 'active') <> 'archived'
+                    AND (j.deadline IS NULL OR j.deadline >= %s)
+              )
+            ORDER BY r.id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (after_id, today, limit))
+        rows = cur.fetchall()
+        moved, updates = [], []
+        for row in rows:
+            parsed = dict(row["parsed_data"] or {})
+            text = parsed.pop("text", "") or ""
+            put_cold_text(row["id"], text)
+            parsed["text_tier"] = "cold"
+            file_sha256 = row["file_sha256"]
+            if row["file_data"] is not None:
+                file_sha256 = put_blob(row["file_data"])
+            updates.append((row["id"], json.dumps(parsed), file_sha256))
+            moved.append((row["id"], file_sha256, len(text.encode("utf-8"))))
+        if updates:
+            execute_values(cur, """
+                UPDATE resumes AS r SET
+                    parsed_data = v.parsed_data::jsonb, file_sha256 = v.file_sha256, file_data = NULL
+                FROM (VALUES %s) AS v (id, parsed_data, file_sha256)
+                WHERE r.id = v.id
+            """, updates, page_size=100)
+        return moved
+
+def fetch_hot_blob_hashes(file_hashes):
+    # Which of these blobs a hot resume still points at (identical files are shared)
+    if not file_hashes:
+        return set()
+    with get_cursor() as cur:
+        cur.execute("""
+            SELECT DISTINCT file_sha256 FROM resumes
+            WHERE file_sha256 = ANY(%s) AND COALESCE(parsed_data->>'text_tier', 'hot') = 'hot'
+        """, (list(file_hashes),))
+        return {row[0] for row in cur.fetchall()}
 
 def get_applied_jobs_by_candidate(candidate_id):
     try:
@@ -277,30 +745,38 @@ def store_uploaded_resume(candidate_id, uploaded_file):
         file_name = uploaded_file.name
         file_size = len(file_data)
         uploaded_at = dt.datetime.now()
+        # Parsed once, in the sandbox; a failed parse keeps the stored file and parsed_data
         parsed_data = parse_resume(uploaded_file)
         uploaded_file.seek(0)
+        if parsed_data.get("parse_status") == "failed":
+            logging.error("Parse failed for candidate_id=%s, keeping the stored resume: %s",
+                          candidate_id, parsed_data.get("parse_error"))
+            return False
+        file_sha256 = put_blob(file_data)
         with get_cursor() as cur:
             cur.execute("SELECT id FROM resumes WHERE candidate_id = %s", (candidate_id,))
             existing = cur.fetchone()
             if existing:
                 cur.execute("""
-                    UPDATE resumes SET file_data = %s, file_name = %s, file_size = %s,
+                    UPDATE resumes SET file_data = NULL, file_sha256 = %s, file_name = %s, file_size = %s,
                     parsed_data = %s, uploaded_at = %s
                     WHERE candidate_id = %s
                 """, (
-                    psycopg2.Binary(file_data), file_name, file_size,
+                    file_sha256, file_name, file_size,
                     json.dumps(parsed_data), uploaded_at, candidate_id
                 ))
             else:
                 cur.execute("""
-                    INSERT INTO resumes (candidate_id, file_data, file_name, file_size, parsed_data, uploaded_at)
+                    INSERT INTO resumes (candidate_id, file_sha256, file_name, file_size, parsed_data, uploaded_at)
                     VALUES (%s, %s, %s, %s, %s, %s)
                 """, (
-                    candidate_id, psycopg2.Binary(file_data), file_name,
+                    candidate_id, file_sha256, file_name,
                     file_size, json.dumps(parsed_data), uploaded_at
                 ))
+        return True
     except Exception as e:
         logging.error("Error in store_uploaded_resume: %s", e)
+        return False
 def soft_delete_job(job_id):
     try:
         with get_cursor() as cur:
@@ -312,10 +788,18 @@ def soft_delete_job(job_id):
 def fetch_active_jobs_by_recruiter(recruiter_id):
     return fetch_all("SELECT * FROM jobs WHERE recruiter_id = %s AND status = 'active' ORDER BY created_at DESC", (recruiter_id,))
 
+def fetch_job_by_id(job_id):
+    return fetch_one("SELECT * FROM jobs WHERE id = %s", (job_id,))
+
+def fetch_active_jobs():
+    return fetch_all("SELECT * FROM jobs WHERE status = 'active' ORDER BY created_at DESC")
+
 def fetch_archived_jobs_by_recruiter(recruiter_id):
     return fetch_all("SELECT * FROM jobs WHERE recruiter_id = %s AND status = 'archived' ORDER BY created_at DESC", (recruiter_id,))
 def update_job(job_id, job_data):
     try:
+        # The stored profile is cleared with the edit, so a failed recompile leaves none rather than a stale one
+        ensure_job_profile_columns()
         query = """
         UPDATE jobs SET
             job_title = %s,
@@ -329,7 +813,9 @@ def update_job(job_id, job_data):
             perks = %s,
             description = %s,
             num_positions = %s,
-            deadline = %s
+            deadline = %s,
+            profile = NULL,
+            profile_embedding = NULL
         WHERE id = %s
         """
         values = (
@@ -353,10 +839,11 @@ def update_job(job_id, job_data):
         try:
             cur.execute(query, values)
             conn.commit()
-            return True
         finally:
             cur.close()
             conn.close()
+        compile_job_profile_for(job_id)
+        return True
 
     except Exception as e:
         print("Update Job Error:", e)
@@ -379,6 +866,25 @@ def save_ranking_result(application_id, score):
     except Exception as e:
         print(f"[❌ Ranking Save Error] {e}")
         return False    
+SAVE_RANKINGS_SQL = """
+    INSERT INTO rankings (application_id, score, created_at)
+    VALUES %s
+    ON CONFLICT (application_id) DO UPDATE
+    SET score = EXCLUDED.score,
+        created_at = EXCLUDED.created_at
+"""
+
+def save_ranking_results(rows):
+    # rows: iterable of (application_id, score); one statement per page of rows
+    now = datetime.datetime.now()
+    try:
+        with get_cursor() as cur:
+            execute_values(cur, SAVE_RANKINGS_SQL,
+                           [(application_id, score, now) for application_id, score in rows], page_size=1000)
+        return True
+    except Exception as e:
+        logging.error("Error saving ranking results: %s", e)
+        return False
 def count_applications_for_job(job_id):
     try:
         conn = get_connection()
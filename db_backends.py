@@ -0,0 +1,341 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+import weakref
+import datetime as dt
+
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values as _pg_execute_values
+except ImportError:  # SQLite-only deployments
+    psycopg2 = _pg_execute_values = None
+
+from db_instrumentation import InstrumentedMixin, record_connect, DB_INSTRUMENTATION
+
+# Which database database.py talks to:
+#   DB_BACKEND=postgres   the shared server configured by DB_HOST/DB_NAME/... (default)
+#   DB_BACKEND=sqlite     an embedded file at SQLITE_PATH; no server, created on first use
+# The SQLite backend runs the same queries: psycopg2-style SQL is translated on the
+# way in (%s placeholders, = ANY(%s), ->> and :: casts, FOR UPDATE, execute_values pages).
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join("data", "resume_ranker.db"))
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MAX_VARIABLES = 32766
+
+# file_data is the last column of resumes on purpose: SQLite only walks a row's
+# overflow pages when a column at or after the blob is read, so parsed_data
+# scans never touch the PDFs and the blob effectively lives in its own table.
+# New uploads go to the blob store (file_sha256); file_data holds legacy rows.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY, username TEXT, email TEXT UNIQUE, password_hash TEXT,
+    phone TEXT, role TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY, recruiter_id INTEGER REFERENCES users(id), job_title TEXT,
+    job_description TEXT, description TEXT, company_name TEXT, salary TEXT, job_type TEXT,
+    skills TEXT, experience_required TEXT, education TEXT, certifications TEXT, perks TEXT,
+    num_positions INTEGER, deadline DATE, algorithm_choice TEXT, num_resumes_to_shortlist INTEGER,
+    status TEXT DEFAULT 'active', created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    profile JSON, profile_embedding BLOB
+);
+CREATE TABLE IF NOT EXISTS resumes (
+    id INTEGER PRIMARY KEY, candidate_id INTEGER REFERENCES users(id),
+    file_name TEXT, file_size INTEGER, file_sha256 TEXT, parsed_data JSON,
+    uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, file_data BLOB
+);
+CREATE TABLE IF NOT EXISTS applications (
+    id INTEGER PRIMARY KEY, candidate_id INTEGER REFERENCES users(id), job_id INTEGER REFERENCES jobs(id),
+    resume_id INTEGER REFERENCES resumes(id), applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS rankings (
+    id INTEGER PRIMARY KEY, application_id INTEGER UNIQUE REFERENCES applications(id),
+    score REAL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS application_scores (
+    application_id INTEGER PRIMARY KEY REFERENCES applications(id) ON DELETE CASCADE,
+    resume_key TEXT, rule_key TEXT, rule_score REAL, explanation TEXT, breakdown JSON,
+    semantic_key TEXT, similarity REAL, computed_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_resumes_candidate ON resumes (candidate_id);
+CREATE INDEX IF NOT EXISTS idx_resumes_file_sha256 ON resumes (file_sha256);
+CREATE INDEX IF NOT EXISTS idx_jobs_recruiter ON jobs (recruiter_id, status);
+CREATE INDEX IF NOT EXISTS idx_applications_job ON applications (job_id);
+CREATE INDEX IF NOT EXISTS idx_applications_candidate_job ON applications (candidate_id, job_id);
+"""
+
+_lock = threading.Lock()
+_local = threading.local()
+# Finalizers of the open per-thread connections. Each connection is closed when the
+# thread-local wrapper that owns it is collected, i.e. when its thread exits, so
+# short-lived threads (a Streamlit rerun each) don't leave connections behind.
+_connections = []
+_initialized = set()
+
+
+def backend():
+    return DB_BACKEND
+
+def using_sqlite():
+    return DB_BACKEND == "sqlite"
+
+def set_backend(name, sqlite_path=None):
+    # For benchmarks and scripts that pick the backend at runtime
+    global DB_BACKEND, SQLITE_PATH
+    close_sqlite_connections()
+    DB_BACKEND = name.lower()
+    if sqlite_path:
+        SQLITE_PATH = sqlite_path
+
+
+# ===================== Type Adapters =====================
+# Timestamps and dates go in as ISO text and come back as datetime/date (the
+# declared column type picks the converter), parsed_data comes back as a dict
+# like psycopg2's jsonb.
+def _to_datetime(value):
+    return dt.datetime.fromisoformat(value.decode())
+
+def _to_date(value):
+    return dt.date.fromisoformat(value.decode()[:10])
+
+sqlite3.register_adapter(dt.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(dt.date, lambda value: value.isoformat())
+sqlite3.register_converter("TIMESTAMP", _to_datetime)
+sqlite3.register_converter("DATE", _to_date)
+sqlite3.register_converter("JSON", json.loads)
+
+def Binary(data):
+    # psycopg2.Binary on Postgres; SQLite stores bytes as a BLOB directly
+    if using_sqlite():
+        return bytes(data)
+    return psycopg2.Binary(data)
+
+
+# ===================== SQL Translation =====================
+_JSON_FIELD_RE = re.compile(r"([\w.]+)->>'(\w+)'")
+_INT_CAST_RE = re.compile(r"\(([^()]*)\)::int(?:eger)?\b")
+_CAST_RE = re.compile(r"::\w+")
+_NOW_RE = re.compile(r"\bNOW\(\)", re.IGNORECASE)
+# SQLite has a single writer, row locks have nothing to add
+_FOR_UPDATE_RE = re.compile(r"\s+FOR\s+UPDATE(?:\s+OF\s+\w+)?(?:\s+(?:SKIP\s+LOCKED|NOWAIT))?", re.IGNORECASE)
+_PLACEHOLDER_RE = re.compile(r"(=\s*ANY\(\s*%s\s*\)|%s)")
+_VALUES_FROM_RE = re.compile(r"FROM\s*\(\s*VALUES\s+%s\s*\)\s*AS\s+(\w+)\s*\(([^)]*)\)", re.IGNORECASE)
+_TRANSLATION_CACHE_SIZE = 1024
+_translations = {}
+
+def _compile(query):
+    # (text pieces, is-ANY flags, static SQL or None); static when no ANY lists to expand
+    compiled = _translations.get(query)
+    if compiled is not None:
+        return compiled
+    sql = _JSON_FIELD_RE.sub(r"json_extract(\1, '$.\2')", query)
+    sql = _INT_CAST_RE.sub(r"CAST(\1 AS INTEGER)", sql)
+    sql = _CAST_RE.sub("", sql)
+    sql = _NOW_RE.sub("CURRENT_TIMESTAMP", sql)
+    sql = _FOR_UPDATE_RE.sub("", sql)
+    pieces = _PLACEHOLDER_RE.split(sql)
+    texts = [p.replace("%%", "%") for p in pieces[0::2]]
+    any_flags = [p != "%s" for p in pieces[1::2]]
+    static = None if any(any_flags) else "?".join(texts)
+    if len(_translations) >= _TRANSLATION_CACHE_SIZE:
+        _translations.clear()
+    compiled = _translations[query] = (texts, any_flags, static)
+    return compiled
+
+def translate(query, params=None):
+    # psycopg2-style query and params -> SQLite query and flat params
+    texts, any_flags, static = _compile(query)
+    params = tuple(params) if params is not None else ()
+    if static is not None:
+        return static, params
+    parts, values = [texts[0]], []
+    for is_any, value, text in zip(any_flags, params, texts[1:]):
+        if is_any:
+            items = list(value)
+            values.extend(items)
+            parts.append(f"IN ({', '.join(['?'] * len(items))})" if items else "IN (NULL)")
+        else:
+            values.append(value)
+            parts.append("?")
+        parts.append(text)
+    return "".join(parts), tuple(values)
+
+
+# ===================== SQLite Cursors & Connections =====================
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    # The slice of the psycopg2 cursor API database.py uses
+    def __init__(self, raw, dict_rows=False):
+        self._cursor = raw.cursor()
+        if dict_rows:
+            self._cursor.row_factory = _dict_row
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, vars=None):
+        self._cursor.execute(*translate(query, vars))
+
+    def executemany(self, query, vars_list):
+        rows = [tuple(v) for v in vars_list]
+        if rows:
+            sql, _ = translate(query, rows[0])
+            self._cursor.executemany(sql, rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class InstrumentedSQLiteCursor(InstrumentedMixin, SQLiteCursor):
+    pass
+
+
+class SQLiteConnection:
+    # One long-lived sqlite3 connection per thread: close() only ends the transaction,
+    # so "connecting" per query (as database.py does) costs nothing
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self, dict_rows=False):
+        cursor_class = InstrumentedSQLiteCursor if DB_INSTRUMENTATION else SQLiteCursor
+        return cursor_class(self.raw, dict_rows)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        if self.raw.in_transaction:
+            self.raw.rollback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same as psycopg2: commit or roll back, but leave the connection open
+        if exc_type:
+            self.raw.rollback()
+        else:
+            self.raw.commit()
+        return False
+
+
+def _open_sqlite(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    raw = sqlite3.connect(
+        path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+    )
+    # WAL: readers never block the writer; NORMAL sync is durable across app crashes under WAL
+    raw.execute("PRAGMA journal_mode = WAL")
+    raw.execute("PRAGMA synchronous = NORMAL")
+    raw.execute("PRAGMA foreign_keys = ON")
+    raw.execute("PRAGMA temp_store = MEMORY")
+    raw.execute(f"PRAGMA cache_size = {-SQLITE_CACHE_MB * 1024}")
+    raw.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_MB * 1024 * 1024}")
+    raw.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    with _lock:
+        if path not in _initialized:
+            raw.executescript(SQLITE_SCHEMA)
+            _initialized.add(path)
+    return raw
+
+def _close_raw(raw):
+    try:
+        raw.close()
+    except sqlite3.Error as e:
+        logging.warning("Could not close SQLite connection: %s", e)
+
+def _track(conn):
+    finalizer = weakref.finalize(conn, _close_raw, conn.raw)
+    with _lock:
+        _connections[:] = [f for f in _connections if f.alive]
+        _connections.append(finalizer)
+    return conn
+
+def open_sqlite_connections():
+    with _lock:
+        return sum(f.alive for f in _connections)
+
+def sqlite_connection():
+    path = SQLITE_PATH
+    conn = getattr(_local, "sqlite", None)
+    if conn is None or _local.sqlite_path != path:
+        started = time.perf_counter()
+        conn = _local.sqlite = _track(SQLiteConnection(_open_sqlite(path)))
+        _local.sqlite_path = path
+        if DB_INSTRUMENTATION:
+            record_connect(time.perf_counter() - started)
+    return conn
+
+def close_sqlite_connections():
+    with _lock:
+        finalizers = list(_connections)
+        _connections.clear()
+        _initialized.clear()
+    for finalizer in finalizers:
+        finalizer()
+    _local.__dict__.clear()
+
+
+# ===================== Bulk Statements =====================
+def execute_values(cur, sql, argslist, template=None, page_size=100):
+    # psycopg2.extras.execute_values on Postgres. On SQLite each page becomes one
+    # multi-row VALUES list; "UPDATE ... FROM (VALUES %s) AS v (cols)" is rewritten
+    # to "UPDATE ... FROM (SELECT column1 AS col, ... FROM (VALUES ...)) AS v" (SQLite
+    # has no column aliases on derived tables, and a leading WITH hides the rowcount).
+    if not isinstance(cur, SQLiteCursor):
+        return _pg_execute_values(cur, sql, argslist, template=template, page_size=page_size)
+    rows = [tuple(r) for r in argslist]
+    if not rows:
+        return
+    width = len(rows[0])
+    page_size = max(1, min(page_size, SQLITE_MAX_VARIABLES // width))
+    row_sql = "(" + ", ".join(["?"] * width) + ")"
+    match = _VALUES_FROM_RE.search(sql)
+    for start in range(0, len(rows), page_size):
+        page = rows[start:start + page_size]
+        values_sql = ", ".join([row_sql] * len(page))
+        if match:
+            alias = match.group(1)
+            columns = ", ".join(f"column{i} AS {name.strip()}" for i, name in enumerate(match.group(2).split(","), 1))
+            statement = (f"{sql[:match.start()]}FROM (SELECT {columns} FROM (VALUES {values_sql})) AS {alias}"
+                         f"{sql[match.end():]}")
+        else:
+            statement = sql.replace("%s", values_sql, 1)
+        cur.execute(statement, [value for row in page for value in row])
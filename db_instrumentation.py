@@ -0,0 +1,239 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    from psycopg2.extensions import cursor as _BaseCursor
+    from psycopg2.extras import RealDictCursor
+except ImportError:  # SQLite-only deployments (DB_BACKEND=sqlite)
+    _BaseCursor = RealDictCursor = None
+
+from tracing import observe, count
+
+# Per-query timing, row counts and approximate bytes fetched for every cursor
+# handed out by database.py. Statements are aggregated by a normalised
+# fingerprint (literals and placeholders replaced by ?), per scope (dashboard
+# page, CLI command) so each page's database cost can be read off directly.
+DB_INSTRUMENTATION = os.getenv("DB_INSTRUMENTATION", "1") == "1"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+FINGERPRINT_CACHE_SIZE = 2048
+FINGERPRINT_MAX_CHARS = 4096
+
+_lock = threading.Lock()
+_stats = {}
+_fingerprints = {}
+_local = threading.local()
+slow_query_logger = logging.getLogger("slow_query")
+
+
+# ===================== Fingerprints =====================
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|%\(\w+\)s")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS_RE = re.compile(r"\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+def fingerprint(query):
+    # "SELECT * FROM jobs WHERE id = %s" and "... id = 42" share one fingerprint;
+    # execute_values pages collapse to a single VALUES (?...) row
+    # Only the head is normalised: execute_values pages of inlined blobs run to megabytes
+    if isinstance(query, bytes):
+        query = query[:FINGERPRINT_MAX_CHARS].decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        query = str(query)
+    query = query[:FINGERPRINT_MAX_CHARS]
+    cached = _fingerprints.get(query)
+    if cached is not None:
+        return cached
+    normalized = _COMMENT_RE.sub(" ", query)
+    normalized = _LITERAL_RE.sub("?", normalized)
+    normalized = _SPACE_RE.sub(" ", normalized).strip().rstrip(";")
+    normalized = _LIST_RE.sub("(?...)", normalized)
+    normalized = _ROWS_RE.sub("(?...)", normalized)
+    if len(_fingerprints) >= FINGERPRINT_CACHE_SIZE:
+        _fingerprints.clear()
+    _fingerprints[query] = normalized
+    return normalized
+
+def fingerprint_id(normalized):
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+# ===================== Aggregation =====================
+@contextmanager
+def db_scope(name):
+    # Attributes queries on this thread to a page or command
+    previous = getattr(_local, "scope", None)
+    _local.scope = name
+    try:
+        yield
+    finally:
+        _local.scope = previous
+
+def current_scope():
+    return getattr(_local, "scope", None) or "default"
+
+def _entry(scope, statement):
+    key = (scope, statement)
+    entry = _stats.get(key)
+    if entry is None:
+        entry = _stats[key] = {
+            "scope": scope, "statement": statement, "id": fingerprint_id(statement),
+            "calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+            "fetch_seconds": 0.0, "rows": 0, "bytes": 0
+        }
+    return entry
+
+def record_query(statement, seconds, rows, error=False):
+    scope = current_scope()
+    with _lock:
+        entry = _entry(scope, statement)
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        if rows and rows > 0:
+            entry["rows"] += rows
+        if error:
+            entry["errors"] += 1
+    observe("db_query_seconds", seconds, query=fingerprint_id(statement))
+    if error:
+        count("db_query_errors_total", query=fingerprint_id(statement))
+    if seconds * 1000 >= DB_SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "Slow query %.1fms scope=%s rows=%s id=%s: %s",
+            seconds * 1000, scope, rows, fingerprint_id(statement), statement[:500]
+        )
+
+def record_fetch(statement, seconds, nbytes):
+    with _lock:
+        entry = _entry(current_scope(), statement)
+        entry["fetch_seconds"] += seconds
+        entry["bytes"] += nbytes
+    count("db_fetched_bytes_total", nbytes)
+
+def record_connect(seconds):
+    # No pool: the wait for a connection is the connect() round trip
+    scope = current_scope()
+    with _lock:
+        entry = _entry(scope, "<connect>")
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+    observe("db_connect_seconds", seconds)
+
+def query_stats(scope=None, order_by="seconds", limit=None):
+    with _lock:
+        entries = [dict(e) for e in _stats.values() if scope is None or e["scope"] == scope]
+    entries.sort(key=lambda e: e[order_by], reverse=True)
+    return entries[:limit] if limit else entries
+
+def scope_totals():
+    # {scope: {"calls", "seconds", "rows", "bytes"}} — the per-page cost breakdown
+    totals = {}
+    for entry in query_stats():
+        total = totals.setdefault(entry["scope"], {"calls": 0, "seconds": 0.0, "rows": 0, "bytes": 0})
+        total["calls"] += entry["calls"]
+        total["seconds"] += entry["seconds"] + entry["fetch_seconds"]
+        total["rows"] += entry["rows"]
+        total["bytes"] += entry["bytes"]
+    return totals
+
+def reset_query_stats():
+    with _lock:
+        _stats.clear()
+
+def format_query_report(limit=20):
+    lines = [f"{'scope':<24} {'calls':>7} {'total ms':>10} {'max ms':>9} {'rows':>9} {'MB':>8}  statement"]
+    for e in query_stats(limit=limit):
+        lines.append(
+            f"{e['scope'][:24]:<24} {e['calls']:>7} {(e['seconds'] + e['fetch_seconds']) * 1000:>10.1f} "
+            f"{e['max_seconds'] * 1000:>9.1f} {e['rows']:>9} {e['bytes'] / 1e6:>8.2f}  {e['statement'][:120]}"
+        )
+    return "\n".join(lines)
+
+
+# ===================== Cursors =====================
+def _value_bytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(k) + _value_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_value_bytes(v) for v in value)
+    return 8
+
+def _rows_bytes(rows):
+    total = 0
+    for row in rows:
+        # Dict rows (RealDictCursor, SQLite dict rows) count their values, not the column names
+        total += _value_bytes(list(row.values()) if isinstance(row, dict) else row)
+    return total
+
+
+class InstrumentedMixin:
+    # Shared by the psycopg2 cursors below and the SQLite cursor in db_backends
+    _statement = None
+
+    def execute(self, query, vars=None):
+        self._statement = fingerprint(query)
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception:
+            record_query(self._statement, time.perf_counter() - started, 0, error=True)
+            raise
+        record_query(self._statement, time.perf_counter() - started, self.rowcount)
+        return result
+
+    def executemany(self, query, vars_list):
+        self._statement = fingerprint(query)
+        started = time.perf_counter()
+        try:
+            result = super().executemany(query, vars_list)
+        except Exception:
+            record_query(self._statement, time.perf_counter() - started, 0, error=True)
+            raise
+        record_query(self._statement, time.perf_counter() - started, self.rowcount)
+        return result
+
+    def _fetched(self, rows, started):
+        if self._statement is not None and rows:
+            record_fetch(self._statement, time.perf_counter() - started, _rows_bytes(rows))
+        return rows
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        if row is not None:
+            self._fetched([row], started)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        return self._fetched(super().fetchmany(size) if size is not None else super().fetchmany(), started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        return self._fetched(super().fetchall(), started)
+
+
+if _BaseCursor is not None:
+    class InstrumentedCursor(InstrumentedMixin, _BaseCursor):
+        pass
+
+    class InstrumentedDictCursor(InstrumentedMixin, RealDictCursor):
+        pass
+
+
+def cursor_factory(dict_cursor=False):
+    if _BaseCursor is None:
+        return None
+    if not DB_INSTRUMENTATION:
+        return RealDictCursor if dict_cursor else None
+    return InstrumentedDictCursor if dict_cursor else InstrumentedCursor
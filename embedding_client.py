@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+
+import numpy as np
+
+from embedding_protocol import HEADER, parse_address
+
+EMBEDDING_SERVER = os.getenv("EMBEDDING_SERVER", "")
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "30"))
+# After a connection failure or timeout, don't retry the server for this many seconds
+RETRY_AFTER = 30.0
+
+_local = threading.local()
+_down_until = 0.0
+
+
+class EmbeddingServerError(Exception):
+    pass
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed by embedding server")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def _recv_message(sock):
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return _recv_exactly(sock, size)
+
+def _connect(address):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.settimeout(EMBEDDING_TIMEOUT)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def _get_socket(address):
+    # One persistent connection per thread
+    sock = getattr(_local, "sock", None)
+    if sock is None or getattr(_local, "address", None) != address:
+        sock = _connect(address)
+        _local.sock = sock
+        _local.address = address
+    return sock
+
+def _drop_socket():
+    sock = getattr(_local, "sock", None)
+    if sock is not None:
+        try:
+            sock.close()
+        except OSError:
+            pass
+    _local.sock = None
+
+def server_available(address=None):
+    return bool(address or EMBEDDING_SERVER) and time.monotonic() >= _down_until
+
+def encode_remote(texts, address=None):
+    address = address or EMBEDDING_SERVER
+    payload = json.dumps({"texts": list(texts)}).encode("utf-8")
+    try:
+        sock = _get_socket(address)
+        sock.sendall(HEADER.pack(len(payload)) + payload)
+        header = json.loads(_recv_message(sock))
+        if "error" in header:
+            # The server answered, so the connection is still usable
+            raise EmbeddingServerError(header["error"])
+        data = _recv_message(sock)
+    except (OSError, ValueError):
+        _drop_socket()
+        raise
+    return np.frombuffer(data, dtype=np.float32).reshape(header["count"], header["dim"])
+
+def try_encode_remote(texts):
+    # Returns None when no server is configured or it is unreachable
+    global _down_until
+    if not server_available():
+        return None
+    try:
+        return encode_remote(texts)
+    except OSError as e:
+        # Refused, reset, closed or timed out: the server is down, stop trying for a while
+        _down_until = time.monotonic() + RETRY_AFTER
+        logging.warning("Embedding server %s unavailable, encoding in-process: %s", EMBEDDING_SERVER, e)
+        return None
+    except (ValueError, EmbeddingServerError) as e:
+        # The server is up but rejected or garbled this request; only this call falls back
+        logging.warning("Embedding server %s failed this request, encoding in-process: %s", EMBEDDING_SERVER, e)
+        return None
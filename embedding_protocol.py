@@ -0,0 +1,33 @@
+"""
+Wire protocol shared by embedding_server.py and embedding_client.py.
+
+Kept free of import-time side effects (no dotenv, no logging setup), so the
+client can be imported by every process that ranks.
+"""
+import struct
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+HEADER = struct.Struct("!I")
+
+
+# ===================== Wire Protocol =====================
+# Every message is a 4-byte big-endian length followed by the payload.
+# Request:  JSON {"texts": [...]}
+# Response: JSON {"count": n, "dim": d} or {"error": "..."}, then (on success)
+#           a second message holding n*d float32 values in native byte order.
+
+async def read_message(reader):
+    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds limit")
+    return await reader.readexactly(size)
+
+def pack_message(payload):
+    return HEADER.pack(len(payload)) + payload
+
+def parse_address(address):
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
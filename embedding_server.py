@@ -0,0 +1,150 @@
+"""
+Local embedding service: one SentenceTransformer shared by every Streamlit worker.
+
+Concurrent encode requests are coalesced into micro-batches: the batcher waits
+at most EMBED_BATCH_WAIT_MS after the first queued request (or until
+EMBED_MAX_BATCH texts are pending) and runs a single model.encode call.
+
+Run:  python embedding_server.py --address unix:/tmp/resume-ranker-embed.sock
+      python embedding_server.py --address 127.0.0.1:8765
+and point the app at it with EMBEDDING_SERVER=<same address>.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+
+from embedding_protocol import read_message, pack_message, parse_address
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2")
+DEFAULT_ADDRESS = os.getenv("EMBEDDING_SERVER", "unix:/tmp/resume-ranker-embed.sock")
+MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "10"))
+
+
+# ===================== Micro-Batcher =====================
+class MicroBatcher:
+    def __init__(self, model, max_batch=MAX_BATCH, wait_ms=BATCH_WAIT_MS):
+        self.model = model
+        self.max_batch = max_batch
+        self.wait = wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        # The model runs on one thread; torch parallelises each batch internally
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.texts = 0
+
+    async def encode(self, texts):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            batch = [text for texts, _ in pending for text in texts]
+            try:
+                vectors = await loop.run_in_executor(self.executor, self._encode_batch, batch)
+            except Exception as e:
+                logging.error("Embedding batch failed: %s", e)
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(batch)
+            offset = 0
+            for texts, future in pending:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def _encode_batch(self, batch):
+        vectors = self.model.encode(batch, batch_size=self.max_batch, convert_to_numpy=True)
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+# ===================== Server =====================
+async def handle_client(batcher, reader, writer):
+    try:
+        while True:
+            try:
+                request = json.loads(await read_message(reader))
+            except asyncio.IncompleteReadError:
+                break
+            texts = request.get("texts", [])
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                writer.write(pack_message(json.dumps({"error": "texts must be a list of strings"}).encode()))
+                await writer.drain()
+                continue
+            try:
+                vectors = await batcher.encode(texts) if texts else np.zeros((0, 0), dtype=np.float32)
+            except Exception as e:
+                writer.write(pack_message(json.dumps({"error": str(e)}).encode()))
+                await writer.drain()
+                continue
+            header = {"count": int(vectors.shape[0]), "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0}
+            writer.write(pack_message(json.dumps(header).encode()))
+            writer.write(pack_message(vectors.tobytes()))
+            await writer.drain()
+    except Exception as e:
+        logging.error("Embedding client connection error: %s", e)
+    finally:
+        writer.close()
+
+async def serve(address=DEFAULT_ADDRESS, max_batch=MAX_BATCH, wait_ms=BATCH_WAIT_MS):
+    from sentence_transformers import SentenceTransformer
+
+    started = time.perf_counter()
+    model = SentenceTransformer(MODEL_NAME)
+    logging.info("Loaded %s in %.1fs", MODEL_NAME, time.perf_counter() - started)
+
+    batcher = MicroBatcher(model, max_batch=max_batch, wait_ms=wait_ms)
+    asyncio.create_task(batcher.run())
+
+    kind, target = parse_address(address)
+    callback = lambda r, w: handle_client(batcher, r, w)
+    if kind == "unix":
+        if os.path.exists(target):
+            os.remove(target)
+        server = await asyncio.start_unix_server(callback, path=target)
+    else:
+        server = await asyncio.start_server(callback, host=target[0], port=target[1])
+    logging.info("Embedding server listening on %s (max_batch=%s, wait=%sms)", address, max_batch, wait_ms)
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared micro-batching embedding server")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="unix:/path/to.sock or host:port")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--wait-ms", type=float, default=BATCH_WAIT_MS)
+    args = parser.parse_args()
+    asyncio.run(serve(args.address, args.max_batch, args.wait_ms))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import json
+import logging
+
+import numpy as np
+
+# Storage modes: float32 (exact), float16 (half size), int8 (quarter size,
+# one float32 scale per vector). All vectors are L2-normalised on insert, so a
+# dot product with a normalised query is the cosine similarity.
+STORE_MODES = ("float32", "float16", "int8")
+# Rows dequantised at a time while scoring, bounding scratch memory
+SCORE_CHUNK_ROWS = 16384
+
+
+def normalize_rows(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors, mode):
+    vectors = normalize_rows(vectors)
+    if mode == "float32":
+        return vectors, np.ones(len(vectors), dtype=np.float32)
+    if mode == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    if mode == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown embedding store mode: {mode}")
+
+
+class EmbeddingStore:
+    def __init__(self, dim, mode="float16"):
+        if mode not in STORE_MODES:
+            raise ValueError(f"Unknown embedding store mode: {mode}")
+        self.dim = dim
+        self.mode = mode
+        self._vectors = np.zeros((0, dim), dtype=np.dtype(mode))
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._ids = []
+        self._index = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, item_id):
+        return item_id in self._index
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    def nbytes(self):
+        return self._vectors[:self._size].nbytes + self._scales[:self._size].nbytes
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._vectors)
+        if needed <= capacity and self._vectors.flags.writeable:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        vectors = np.zeros((new_capacity, self.dim), dtype=self._vectors.dtype)
+        vectors[:self._size] = self._vectors[:self._size]
+        scales = np.ones(new_capacity, dtype=np.float32)
+        scales[:self._size] = self._scales[:self._size]
+        self._vectors, self._scales = vectors, scales
+
+    def add(self, ids, vectors):
+        codes, scales = quantize(vectors, self.mode)
+        if codes.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d vectors, got {codes.shape[1]}-d")
+        self._reserve(len(ids))
+        for item_id, code, scale in zip(ids, codes, scales):
+            row = self._index.get(item_id)
+            if row is None:
+                row = self._size
+                self._index[item_id] = row
+                if row < len(self._ids):
+                    self._ids[row] = item_id
+                else:
+                    self._ids.append(item_id)
+                self._size += 1
+            self._vectors[row] = code
+            self._scales[row] = scale
+
+    def remove(self, item_id):
+        # Moves the last row into the hole so the matrix stays contiguous
+        row = self._index.pop(item_id, None)
+        if row is None:
+            return False
+        self._reserve(0)
+        last = self._size - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._vectors[row] = self._vectors[last]
+            self._scales[row] = self._scales[last]
+            self._ids[row] = moved_id
+            self._index[moved_id] = row
+        self._size -= 1
+        self._ids = self._ids[:self._size]
+        return True
+
+    def get(self, item_id):
+        row = self._index.get(item_id)
+        if row is None:
+            return None
+        return self._vectors[row].astype(np.float32) * self._scales[row]
+
+    def rows(self, item_ids):
+        return np.array([self._index[i] for i in item_ids], dtype=np.int64)
+
+    def scores(self, query, rows=None):
+        # Cosine similarity of a query against every stored vector (or the given rows)
+        query = normalize_rows(query)[0]
+        vectors = self._vectors[:self._size] if rows is None else self._vectors[rows]
+        scales = self._scales[:self._size] if rows is None else self._scales[rows]
+        out = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_CHUNK_ROWS):
+            chunk = vectors[start:start + SCORE_CHUNK_ROWS]
+            if self.mode == "float32":
+                out[start:start + len(chunk)] = chunk @ query
+            else:
+                out[start:start + len(chunk)] = chunk.astype(np.float32) @ query
+        if self.mode == "int8":
+            out *= scales
+        return out
+
+    def score_matrix(self, queries):
+        # Similarity of every stored vector (rows) against every query (columns)
+        queries = normalize_rows(queries).T
+        out = np.empty((self._size, queries.shape[1]), dtype=np.float32)
+        for start in range(0, self._size, SCORE_CHUNK_ROWS):
+            chunk = self._vectors[start:min(start + SCORE_CHUNK_ROWS, self._size)]
+            out[start:start + len(chunk)] = chunk.astype(np.float32, copy=False) @ queries
+        if self.mode == "int8":
+            out *= self._scales[:self._size, None]
+        return out
+
+    def top_k(self, query, k=10):
+        scores = self.scores(query)
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self._ids[i], float(scores[i])) for i in best]
+
+    @classmethod
+    def from_arrays(cls, dim, mode, vectors, scales, ids):
+        # Wraps existing (possibly memory-mapped) arrays without copying
+        store = cls(dim, mode)
+        store._vectors = vectors
+        store._scales = scales
+        store._ids = list(ids)
+        store._index = {item_id: row for row, item_id in enumerate(store._ids)}
+        store._size = len(store._ids)
+        return store
+
+    def arrays(self):
+        return self._vectors[:self._size], self._scales[:self._size], self.ids
+
+    # ------------------- Persistence -------------------
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self._vectors[:self._size])
+        np.save(os.path.join(path, "scales.npy"), self._scales[:self._size])
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"dim": self.dim, "mode": self.mode, "ids": self.ids}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        # With mmap=True the matrix is paged in on demand and shared between processes;
+        # the first write copies it into private memory
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        mmap_mode = "r" if mmap else None
+        return cls.from_arrays(
+            meta["dim"], meta["mode"],
+            np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, "scales.npy"), mmap_mode=mmap_mode),
+            meta["ids"]
+        )
+
+
+# ===================== Quantization Report =====================
+def quantization_report(vectors, queries, k=10, modes=("float16", "int8")):
+    # Recall@k and score drift of each quantized mode against exact float32 scoring
+    vectors = normalize_rows(vectors)
+    queries = normalize_rows(queries)
+    ids = list(range(len(vectors)))
+    exact = EmbeddingStore(vectors.shape[1], "float32")
+    exact.add(ids, vectors)
+
+    report = {"vectors": len(vectors), "queries": len(queries), "k": k,
+              "float32": {"bytes_per_vector": exact.nbytes() / max(len(vectors), 1)}}
+    for mode in modes:
+        store = EmbeddingStore(vectors.shape[1], mode)
+        store.add(ids, vectors)
+        recalls, drifts = [], []
+        for query in queries:
+            exact_scores = exact.scores(query)
+            quant_scores = store.scores(query)
+            drifts.append(np.abs(exact_scores - quant_scores))
+            expected = {i for i, _ in exact.top_k(query, k)}
+            found = {i for i, _ in store.top_k(query, k)}
+            recalls.append(len(expected & found) / max(len(expected), 1))
+        drift = np.concatenate(drifts) if drifts else np.zeros(1)
+        report[mode] = {
+            "bytes_per_vector": store.nbytes() / max(len(vectors), 1),
+            f"recall_at_{k}": float(np.mean(recalls)) if recalls else 1.0,
+            "mean_abs_score_drift": float(drift.mean()),
+            "max_abs_score_drift": float(drift.max()),
+        }
+        logging.info("Embedding store %s: %s", mode, report[mode])
+    return report
@@ -0,0 +1,110 @@
+"""
+Precompute ranking inputs for applications in the background.
+
+    python feature_precompute.py --job-id 42
+    python feature_precompute.py --all-active
+
+Applying to a job or uploading a resume enqueues the candidate here; a daemon
+thread embeds the resume (warming the chunk cache) and stores each affected
+application's similarity and rule scores against the job's own filters in
+application_scores. rank_resumes then looks them up and only computes what is
+missing or stale. The CLI backfills applications that existed before.
+"""
+import os
+import json
+import queue
+import logging
+import argparse
+import threading
+
+from database import fetch_applications_by_candidate, fetch_applications_by_job, fetch_job_by_id, fetch_active_jobs
+from ml_ranking import build_filters_from_job, complete_application_scores
+from tracing import span, count
+
+PRECOMPUTE_FEATURES = os.getenv("PRECOMPUTE_FEATURES", "1") == "1"
+
+_queue = queue.Queue()
+_pending = set()
+_lock = threading.Lock()
+_worker = None
+
+
+# ===================== Precompute =====================
+def precompute_applications(applications, jobs=None):
+    # Groups rows by job and scores them against build_filters_from_job(job)
+    jobs = jobs or {}
+    by_job = {}
+    for app in applications:
+        parsed = app.get("parsed_data") or {}
+        if isinstance(parsed, dict) and parsed.get("text", "").strip():
+            by_job.setdefault(app["job_id"], []).append(app)
+    done = 0
+    for job_id, apps in by_job.items():
+        job = jobs.get(job_id) or fetch_job_by_id(job_id)
+        if not job:
+            continue
+        with span("precompute", job_id=job_id, applications=len(apps)):
+            complete_application_scores(apps, build_filters_from_job(job))
+        done += len(apps)
+    count("precomputed_applications_total", done)
+    return done
+
+def precompute_candidate(candidate_id, job_id=None):
+    return precompute_applications(fetch_applications_by_candidate(candidate_id, job_id))
+
+def precompute_job(job):
+    return precompute_applications(fetch_applications_by_job(job["id"]), {job["id"]: job})
+
+
+# ===================== Background Queue =====================
+def enqueue_candidate(candidate_id, job_id=None):
+    # Called after apply_to_job (with job_id) or a resume upload (every application)
+    if not PRECOMPUTE_FEATURES:
+        return
+    key = (candidate_id, job_id)
+    with _lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+        _start_worker()
+    _queue.put(key)
+
+def _start_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run_worker, name="feature-precompute", daemon=True)
+        _worker.start()
+
+def _run_worker():
+    while True:
+        key = _queue.get()
+        with _lock:
+            _pending.discard(key)
+        try:
+            precompute_candidate(*key)
+        except Exception as e:
+            # Ranking computes whatever is missing, so a failure here only costs speed
+            logging.error("Precompute failed for candidate_id=%s job_id=%s: %s", key[0], key[1], e)
+        finally:
+            _queue.task_done()
+
+def wait_for_precompute():
+    _queue.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute application scores for ranking")
+    parser.add_argument("--job-id", type=int, default=None)
+    parser.add_argument("--all-active", action="store_true", help="Every active job")
+    args = parser.parse_args()
+    if args.job_id is not None:
+        job = fetch_job_by_id(args.job_id)
+        jobs = [job] if job else []
+    elif args.all_active:
+        jobs = fetch_active_jobs()
+    else:
+        parser.error("pass --job-id or --all-active")
+    print(json.dumps({"jobs": len(jobs), "applications": sum(precompute_job(job) for job in jobs)}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Concurrent-user load test for the dashboard data paths.
+
+    python load_test.py --embedded --concurrency 1,4,16,32 --duration 30
+    python load_test.py --setup --concurrency 8,16 --mix browse=60,apply=25,upload=10,rank=5
+
+Simulated users call the same database.py / ml_ranking functions the
+Streamlit pages do: get_all_active_jobs (browse), apply_to_job (apply),
+store_uploaded_resume (upload) and rank_resumes (rank). For every
+concurrency level it reports throughput, p50/p95/p99 latency and error rate
+per operation, plus server connection counts sampled from pg_stat_activity.
+
+--embedded starts a throwaway Postgres cluster (initdb/pg_ctl from PATH or
+PG_BIN) in a temp directory and seeds it; otherwise the DB_* settings are used
+and --setup creates and seeds the tables there. Only point --setup at a
+scratch database.
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import itertools
+import subprocess
+
+import numpy as np
+
+DEFAULT_MIX = "browse=60,apply=25,upload=10,rank=5"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY, username TEXT, email TEXT UNIQUE, password_hash TEXT,
+    phone TEXT, role TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY, recruiter_id INTEGER REFERENCES users(id), job_title TEXT,
+    job_description TEXT, description TEXT, company_name TEXT, salary TEXT, job_type TEXT,
+    skills TEXT, experience_required TEXT, education TEXT, certifications TEXT, perks TEXT,
+    num_positions INTEGER, deadline DATE, algorithm_choice TEXT, num_resumes_to_shortlist INTEGER,
+    status TEXT DEFAULT 'active', created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS resumes (
+    id SERIAL PRIMARY KEY, candidate_id INTEGER REFERENCES users(id), file_data BYTEA,
+    file_name TEXT, file_size INTEGER, file_sha256 TEXT, parsed_data JSONB, uploaded_at TIMESTAMP DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS applications (
+    id SERIAL PRIMARY KEY, candidate_id INTEGER REFERENCES users(id), job_id INTEGER REFERENCES jobs(id),
+    resume_id INTEGER REFERENCES resumes(id), applied_at TIMESTAMP DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS rankings (
+    id SERIAL PRIMARY KEY, application_id INTEGER UNIQUE REFERENCES applications(id),
+    score REAL, created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_resumes_candidate ON resumes (candidate_id);
+CREATE INDEX IF NOT EXISTS idx_applications_job ON applications (job_id);
+CREATE INDEX IF NOT EXISTS idx_applications_candidate_job ON applications (candidate_id, job_id);
+"""
+
+
+# ===================== Embedded Postgres =====================
+def find_pg_binary(name):
+    candidates = [os.path.join(os.getenv("PG_BIN", ""), name)] if os.getenv("PG_BIN") else []
+    found = shutil.which(name)
+    if found:
+        candidates.append(found)
+    for root in ("/usr/lib/postgresql", "/usr/local/pgsql", "/opt/homebrew/opt/postgresql/bin"):
+        if os.path.isdir(root):
+            for version in sorted(os.listdir(root), reverse=True):
+                candidates.append(os.path.join(root, version, "bin", name))
+    for path in candidates:
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    raise RuntimeError(f"{name} not found; install PostgreSQL or set PG_BIN")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class EmbeddedPostgres:
+    # A private cluster under a temp directory, trust auth on localhost only
+    def __init__(self, max_connections=100):
+        self.max_connections = max_connections
+        self.port = free_port()
+        self.root = tempfile.mkdtemp(prefix="resume-loadtest-pg-")
+        self.data_dir = os.path.join(self.root, "data")
+
+    def start(self):
+        subprocess.run(
+            [find_pg_binary("initdb"), "-D", self.data_dir, "-U", "postgres", "-A", "trust", "-E", "UTF8"],
+            check=True, capture_output=True
+        )
+        options = f"-p {self.port} -k {self.root} -c listen_addresses=127.0.0.1 -c max_connections={self.max_connections} -c fsync=off"
+        subprocess.run(
+            [find_pg_binary("pg_ctl"), "-D", self.data_dir, "-o", options, "-l", os.path.join(self.root, "server.log"), "-w", "start"],
+            check=True, capture_output=True
+        )
+        return {"DB_HOST": "127.0.0.1", "DB_PORT": str(self.port), "DB_NAME": "postgres", "DB_USER": "postgres", "DB_PASSWORD": ""}
+
+    def stop(self):
+        try:
+            subprocess.run([find_pg_binary("pg_ctl"), "-D", self.data_dir, "-m", "fast", "stop"], capture_output=True, timeout=60)
+        finally:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+# ===================== Seeding =====================
+def seed_database(candidates, recruiters, jobs, applicants_per_job, distinct_pdfs, seed):
+    # Users, active jobs, resumes for every candidate and a pre-filled applicant pool per job
+    from psycopg2.extras import execute_values
+    import synthetic_corpus as corpus
+    from database import get_connection
+    from blob_store import put_blob
+
+    pdfs = [corpus.resume_pdf(corpus.resume_fields(i, seed)) for i in range(distinct_pdfs)]
+    hashes = [put_blob(pdf) for pdf in pdfs]
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SCHEMA)
+            cur.execute("TRUNCATE rankings, applications, resumes, jobs, users RESTART IDENTITY CASCADE")
+            execute_values(cur, "INSERT INTO users (username, email, password_hash, phone, role) VALUES %s", [
+                (f"recruiter{i}", f"recruiter{i}@example.com", "x", "", "recruiter") for i in range(recruiters)
+            ] + [
+                (f"candidate{i}", f"candidate{i}@example.com", "x", "", "candidate") for i in range(candidates)
+            ])
+            execute_values(cur, """
+                INSERT INTO jobs (recruiter_id, job_title, description, company_name, skills, experience_required,
+                                  education, certifications, num_resumes_to_shortlist, status)
+                VALUES %s
+            """, [
+                (1 + j % recruiters, p["job_title"], p["description"], p["company_name"], p["skills"],
+                 p["experience_required"], p["education"], p["certifications"], p["num_resumes_to_shortlist"], "active")
+                for j, p in enumerate(corpus.job_posting(j, seed) for j in range(jobs))
+            ])
+            first_candidate = recruiters + 1
+            execute_values(cur, """
+                INSERT INTO resumes (candidate_id, file_sha256, file_name, file_size, parsed_data) VALUES %s
+            """, [
+                (first_candidate + i, hashes[i % distinct_pdfs], f"resume_{i}.pdf",
+                 len(pdfs[i % distinct_pdfs]), json.dumps(corpus.parsed_resume(corpus.resume_fields(i, seed))))
+                for i in range(candidates)
+            ], page_size=200)
+            # Resume ids follow candidate order, so applicant i of every job is candidate i
+            execute_values(cur, "INSERT INTO applications (candidate_id, job_id, resume_id) VALUES %s", [
+                (first_candidate + i, job_id, 1 + i)
+                for job_id in range(1, jobs + 1) for i in range(min(applicants_per_job, candidates))
+            ], page_size=1000)
+        conn.commit()
+    finally:
+        conn.close()
+    return {"candidate_ids": list(range(recruiters + 1, recruiters + 1 + candidates)),
+            "job_ids": list(range(1, jobs + 1)), "pdfs": pdfs, "preapplied": min(applicants_per_job, candidates)}
+
+
+# ===================== Simulated Users =====================
+class UploadedPDF(io.BytesIO):
+    # What Streamlit's file_uploader hands the candidate dashboard
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+class Workload:
+    def __init__(self, fixture, mix, seed):
+        import database
+        import ml_ranking
+        self.database = database
+        self.ml_ranking = ml_ranking
+        self.fixture = fixture
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.seed = seed
+        jobs = {job["id"]: job for job in database.get_all_active_jobs()}
+        self.filters = {job_id: ml_ranking.build_filters_from_job(job) for job_id, job in jobs.items()}
+        # Each apply uses a (candidate, job) pair nobody has used yet
+        fresh = fixture["candidate_ids"][fixture["preapplied"]:] or fixture["candidate_ids"]
+        self.pairs = itertools.product(fixture["job_ids"], fresh)
+        self.pairs_lock = threading.Lock()
+
+    def browse(self, rng):
+        self.database.get_all_active_jobs()
+
+    def apply(self, rng):
+        with self.pairs_lock:
+            job_id, candidate_id = next(self.pairs)
+        self.database.apply_to_job(candidate_id, job_id)
+
+    def upload(self, rng):
+        candidate_id = rng.choice(self.fixture["candidate_ids"])
+        pdf = rng.choice(self.fixture["pdfs"])
+        self.database.store_uploaded_resume(candidate_id, UploadedPDF(pdf, f"upload_{candidate_id}.pdf"))
+
+    def rank(self, rng):
+        job_id = rng.choice(self.fixture["job_ids"])
+        self.ml_ranking.rank_resumes(job_id, self.filters[job_id])
+
+
+def sample_connections(stop, samples, interval=0.5):
+    from database import fetch_one
+    while not stop.is_set():
+        row = fetch_one("SELECT COUNT(*) AS n FROM pg_stat_activity WHERE datname = current_database()")
+        if row:
+            samples.append(row["n"])
+        stop.wait(interval)
+
+def run_level(workload, concurrency, duration, think_ms):
+    from db_instrumentation import query_stats
+    records = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    before = {(e["scope"], e["statement"]): e for e in query_stats()}
+
+    def user(index):
+        rng = random.Random(workload.seed * 10007 + concurrency * 101 + index)
+        local = []
+        while time.perf_counter() < deadline:
+            op = rng.choices(workload.ops, workload.weights)[0]
+            started = time.perf_counter()
+            try:
+                getattr(workload, op)(rng)
+                ok = True
+            except StopIteration:
+                ok = None  # apply pairs exhausted; not an app error
+            except Exception as e:
+                logging.debug("%s failed: %s", op, e)
+                ok = False
+            if ok is not None:
+                local.append((op, time.perf_counter() - started, ok))
+            if think_ms:
+                time.sleep(rng.expovariate(1000.0 / think_ms))
+        with lock:
+            records.extend(local)
+
+    stop, connection_samples = threading.Event(), []
+    sampler = threading.Thread(target=sample_connections, args=(stop, connection_samples), daemon=True)
+    sampler.start()
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join(timeout=5)
+
+    # Helpers that swallow their exceptions still show up as failed statements
+    after = query_stats()
+    db_errors = sum(e["errors"] - before.get((e["scope"], e["statement"]), {}).get("errors", 0) for e in after)
+    connects = sum(e["calls"] - before.get((e["scope"], e["statement"]), {}).get("calls", 0)
+                   for e in after if e["statement"] == "<connect>")
+    return summarize_level(concurrency, elapsed, records, connection_samples, db_errors, connects)
+
+def summarize_level(concurrency, elapsed, records, connection_samples, db_errors, connects):
+    operations = {}
+    for op in sorted({r[0] for r in records}):
+        latencies = np.array([r[1] for r in records if r[0] == op])
+        errors = sum(1 for r in records if r[0] == op and not r[2])
+        operations[op] = {
+            "count": len(latencies),
+            "per_sec": round(len(latencies) / elapsed, 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 2),
+            "error_rate": round(errors / len(latencies), 4)
+        }
+    total = len(records)
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "operations": operations,
+        "total_per_sec": round(total / elapsed, 3) if elapsed else 0.0,
+        "error_rate": round(sum(1 for r in records if not r[2]) / total, 4) if total else 0.0,
+        "db_statement_errors": db_errors,
+        "connections_opened": connects,
+        "server_connections_max": max(connection_samples, default=None),
+        "server_connections_mean": round(float(np.mean(connection_samples)), 1) if connection_samples else None
+    }
+
+def print_level(result):
+    print(f"\n== {result['concurrency']} users: {result['total_per_sec']} ops/s, "
+          f"error rate {result['error_rate']:.2%}, server connections max {result['server_connections_max']}, "
+          f"{result['connections_opened']} connections opened, {result['db_statement_errors']} failed statements")
+    print(f"{'operation':<10} {'count':>7} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for op, stats in result["operations"].items():
+        print(f"{op:<10} {stats['count']:>7} {stats['per_sec']:>9.2f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['error_rate']:>8.2%}")
+
+
+# ===================== CLI =====================
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        op, _, weight = part.partition("=")
+        if op.strip() not in ("browse", "apply", "upload", "rank"):
+            raise ValueError(f"Unknown operation in --mix: {op}")
+        mix[op.strip()] = float(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the dashboard data paths with many simulated users")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated user counts, run in order")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a user's operations")
+    parser.add_argument("--embedded", action="store_true", help="Run against a throwaway local Postgres")
+    parser.add_argument("--setup", action="store_true", help="Create and seed tables in the DB_* database")
+    parser.add_argument("--max-connections", type=int, default=100, help="max_connections for --embedded")
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--recruiters", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--applicants-per-job", type=int, default=200)
+    parser.add_argument("--distinct-pdfs", type=int, default=50)
+    parser.add_argument("--encoder", choices=["model", "hashing"], default="hashing",
+                        help="hashing keeps rank cost on the database side; model runs the real encoder")
+    parser.add_argument("--stop-error-rate", type=float, default=0.5, help="Stop ramping once errors exceed this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write all levels as JSON")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    server = None
+    if args.embedded:
+        server = EmbeddedPostgres(args.max_connections)
+        os.environ.update(server.start())  # before database.py reads DB_* at import
+    try:
+        if args.embedded or args.setup:
+            fixture = seed_database(args.candidates, args.recruiters, args.jobs,
+                                    args.applicants_per_job, args.distinct_pdfs, args.seed)
+        else:
+            raise SystemExit("Pass --embedded, or --setup to seed the configured scratch database")
+        if args.encoder == "hashing":
+            import ml_ranking
+            from benchmark import hashing_encoder
+            ml_ranking.encode_texts = hashing_encoder()
+
+        workload = Workload(fixture, parse_mix(args.mix), args.seed)
+        results = []
+        for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+            result = run_level(workload, concurrency, args.duration, args.think_ms)
+            print_level(result)
+            results.append(result)
+            if result["error_rate"] > args.stop_error_rate:
+                print(f"\nStopping: error rate {result['error_rate']:.0%} at {concurrency} users")
+                break
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"args": vars(args), "levels": results}, f, indent=2)
+    finally:
+        if server:
+            server.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Move resume PDFs out of resumes.file_data into the content-addressed blob store.
+
+    python migrate_blobs.py --batch-size 100 --max-rate 200
+    python migrate_blobs.py --gc --dry-run
+
+Adds resumes.file_sha256 if it is missing, then visits rows that still carry
+an inline PDF in id order (keyset pagination): each file is written to the
+blob store (identical files once) and the row keeps only the hash and size.
+The last finished id is saved to the state file, so a stopped run picks up
+where it left off. --gc deletes stored blobs no resume references any more,
+hot or frozen in the cold tier (COLD_STORAGE_DIR/blobs).
+Run VACUUM (FULL on Postgres) afterwards to give the freed space back.
+"""
+import os
+import json
+import time
+import logging
+import argparse
+
+from database import ensure_blob_columns, fetch_inline_blobs, move_blobs_batch, fetch_referenced_blob_hashes
+from blob_store import put_blob, collect_garbage
+
+DEFAULT_STATE_FILE = "data/migrate_blobs.json"
+
+
+def load_state(path):
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except ValueError:
+            pass
+    return {"last_id": 0, "moved": 0, "bytes": 0}
+
+def save_state(path, state):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def migrate(batch_size=100, max_rate=200.0, pause=0.0, state_file=DEFAULT_STATE_FILE, limit=None):
+    ensure_blob_columns()
+    state = load_state(state_file)
+    logging.info("Moving resume blobs to the blob store, resuming after id %s", state["last_id"])
+    started = time.perf_counter()
+    processed = 0
+    seen = set()
+
+    while limit is None or processed < limit:
+        batch_started = time.perf_counter()
+        rows = fetch_inline_blobs(state["last_id"], batch_size)
+        if not rows:
+            break
+        moves = []
+        for row in rows:
+            file_data = bytes(row["file_data"])
+            file_sha256 = put_blob(file_data)
+            seen.add(file_sha256)
+            state["bytes"] += len(file_data)
+            moves.append((row["id"], file_sha256, len(file_data)))
+        # Blobs are durable before the rows stop pointing at the inline copy
+        state["moved"] += move_blobs_batch(moves)
+        state["last_id"] = rows[-1]["id"]
+        save_state(state_file, state)
+        processed += len(rows)
+
+        elapsed = time.perf_counter() - started
+        logging.info("Moved %s blobs (%.1f MB, last id %s, %.1f/sec)",
+                     state["moved"], state["bytes"] / 1e6, state["last_id"], processed / elapsed if elapsed else 0.0)
+
+        if max_rate:
+            min_duration = len(rows) / max_rate
+            spent = time.perf_counter() - batch_started
+            if spent < min_duration:
+                time.sleep(min_duration - spent)
+        if pause:
+            time.sleep(pause)
+
+    logging.info("Blob migration finished: %s moved, %s distinct files this run", state["moved"], len(seen))
+    return state
+
+def main():
+    parser = argparse.ArgumentParser(description="Move resume PDFs from the database into the blob store")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--max-rate", type=float, default=200.0, help="Max resumes/sec (0 = unlimited)")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to idle between batches")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many rows")
+    parser.add_argument("--gc", action="store_true", help="Delete blobs no resume references instead of migrating")
+    parser.add_argument("--min-age", type=float, default=3600, help="--gc keeps blobs younger than this (seconds)")
+    parser.add_argument("--dry-run", action="store_true", help="With --gc, only count what would be deleted")
+    args = parser.parse_args()
+
+    if args.gc:
+        removed = collect_garbage(fetch_referenced_blob_hashes(), args.min_age, args.dry_run)
+        print(json.dumps({"unreferenced": removed, "deleted": not args.dry_run}))
+        return
+    print(json.dumps(migrate(args.batch_size, args.max_rate, args.pause, args.state_file, args.limit)))
+
+if __name__ == "__main__":
+    main()
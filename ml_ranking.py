@@ -1,11 +1,74 @@
 # === FINAL & IMPROVED Resume Ranking Code ===
+import os
 import re
-from collections import Counter
-from sentence_transformers import SentenceTransformer, util
-from database import fetch_applications_by_job
+import json
+import hashlib
+import asyncio
+import logging
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from database import (
+    fetch_applications_by_job, fetch_applications_by_jobs, fetch_resumes_by_candidates, iter_resume_texts,
+    save_ranking_results, fetch_application_scores,
+    save_application_scores, fetch_job_by_id, save_job_profile
+)
+import async_database
+from embedding_client import try_encode_remote
+from embedding_store import EmbeddingStore, normalize_rows
+from ann_index import IVFIndex, MIN_TRAIN_SIZE, get_resume_index, reset_resume_index
+from near_duplicates import collapse_duplicate_applications
+from resume_chunks import embed_resume_chunks, extend_offsets, pool_chunk_scores, CHUNK_POOLING, RESUME_CHUNKING
+from tracing import span, count
 
-# Load enhanced BERT model
-bert_model = SentenceTransformer("all-mpnet-base-v2")
+# Enhanced BERT model, loaded on first local use. When EMBEDDING_SERVER is set the
+# shared embedding server encodes instead and this process never loads a copy.
+MODEL_NAME = "all-mpnet-base-v2"
+# float32 | float16 | int8 — precision of resume vectors held for scoring
+EMBEDDING_STORE_MODE = os.getenv("EMBEDDING_STORE_MODE", "float16")
+# Compiled job profiles, job vectors and rule sets kept in memory (LRU, per kind)
+JOB_PROFILE_CACHE_SIZE = int(os.getenv("JOB_PROFILE_CACHE_SIZE", "512"))
+_bert_model = None
+
+_job_profiles = OrderedDict()
+_job_vectors = OrderedDict()
+_compiled_rules = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _lru_get(cache, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+def _lru_put(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > JOB_PROFILE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+def get_bert_model():
+    global _bert_model
+    if _bert_model is None:
+        _bert_model = SentenceTransformer(MODEL_NAME)
+    return _bert_model
+
+def model_version():
+    # Everything that changes semantic scores, recorded with each ranking run
+    chunking = CHUNK_POOLING if RESUME_CHUNKING else "off"
+    return f"{MODEL_NAME}+chunks:{chunking}+store:{EMBEDDING_STORE_MODE}"
+
+def encode_texts(texts):
+    with span("encode", texts=len(texts)) as s:
+        vectors = try_encode_remote(texts)
+        s.set(remote=vectors is not None)
+        if vectors is None:
+            vectors = get_bert_model().encode(texts, convert_to_numpy=True)
+    count("encoded_texts_total", len(texts))
+    return np.asarray(vectors, dtype=np.float32)
 
 # Education Levels
 EDUCATION_LEVELS = {
@@ -57,25 +120,74 @@ def expand_aliases(keywords, alias_map):
         expanded.update(alias_map.get(word, []))
     return expanded
 
+def filters_fingerprint(filters):
+    canonical = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+# The filters the rule scorer reads; the rest only affect the semantic side or the shortlist
+RULE_FILTER_KEYS = ("required_skills", "certifications", "project_domains", "education", "min_experience")
+
+def rule_key(filters):
+    return filters_fingerprint({key: filters.get(key) for key in RULE_FILTER_KEYS})
+
 def rule_based_score(app, filters):
+    match_score, explanation, _ = rule_based_score_details(app, filters)
+    return match_score, explanation
+
+def resume_features(parsed):
+    # Job-independent inputs of the rule scorer, computed once per resume
+    try:
+        exp = int(re.sub(r"[^0-9]", "", str(parsed.get("experience", "0"))))
+    except:
+        exp = 0
+    return {
+        "token_counts": Counter(normalize_tokens(parsed.get("text", ""))),
+        "certifications": set([c.lower() for c in parsed.get("certifications", [])]),
+        "project_domains": set([p.lower() for p in parsed.get("project_domains", [])]),
+        "education_score": max([EDUCATION_LEVELS.get(e.lower(), 0) for e in parsed.get("education", [])], default=0),
+        "experience": exp
+    }
+
+def compile_rules(filters):
+    # Job-side inputs of the rule scorer (alias-expanded skill and certification sets,
+    # education threshold), computed once per distinct set of filters
+    key = rule_key(filters)
+    rules = _lru_get(_compiled_rules, key)
+    if rules is None:
+        req_certs = filters.get("certifications", [])
+        rules = {
+            "skills": [
+                (skill, frozenset(expand_aliases([skill], SKILL_ALIASES)))
+                for skill in dict.fromkeys(filters.get("required_skills", []))
+            ],
+            "certifications": frozenset(expand_aliases(req_certs, CERTIFICATION_ALIASES)),
+            "certification_count": len(req_certs),
+            "project_domains": frozenset(p.lower() for p in filters.get("project_domains", [])),
+            "education_level": EDUCATION_LEVELS.get((filters.get("education") or "").lower(), 0),
+            "min_experience": filters.get("min_experience", 0)
+        }
+        _lru_put(_compiled_rules, key, rules)
+    return rules
+
+def rule_based_score_details(app, filters, features=None, rules=None):
+    # Same as rule_based_score, plus the points earned per rule category
     parsed = app.get("parsed_data", {})
     if not isinstance(parsed, dict):
-        return 0, "Invalid parsed data"
+        return 0, "Invalid parsed data", {}
+    if features is None:
+        features = resume_features(parsed)
+    if rules is None:
+        rules = compile_rules(filters)
 
     score = 0
     max_score = 0
     explanation = []
+    breakdown = {}
 
-    tokens = normalize_tokens(parsed.get("text", ""))
-    token_counts = Counter(tokens)
+    token_counts = features["token_counts"]
 
     # Skills
-    req_skills = filters.get("required_skills", [])
-    skills_expanded_map = {
-        skill: expand_aliases([skill], SKILL_ALIASES)
-        for skill in req_skills
-    }
-    for skill, variants in skills_expanded_map.items():
+    for skill, variants in rules["skills"]:
         freq = sum(token_counts.get(w, 0) for w in variants)
         if freq >= 3:
             score += 10
@@ -89,77 +201,517 @@ def rule_based_score(app, filters):
         else:
             explanation.append(f"\u274C Skill '{skill}' not found [+0]")
         max_score += 10
+    breakdown["skills"] = score
 
     # Certifications
-    req_certs = filters.get("certifications", [])
-    certs_expanded = expand_aliases(req_certs, CERTIFICATION_ALIASES)
-    found_certs = set([c.lower() for c in parsed.get("certifications", [])])
-    matches = certs_expanded.intersection(found_certs)
+    found_certs = features["certifications"]
+    matches = rules["certifications"].intersection(found_certs)
     score += len(matches) * 5
-    max_score += len(req_certs) * 5
+    breakdown["certifications"] = len(matches) * 5
+    max_score += rules["certification_count"] * 5
     explanation.append(f"🎓 Certification matches: {len(matches)} [+{len(matches)*5}]")
 
     # Project Domains
-    req_projects = set([p.lower() for p in filters.get("project_domains", [])])
-    found_projects = set([p.lower() for p in parsed.get("project_domains", [])])
+    req_projects = rules["project_domains"]
+    found_projects = features["project_domains"]
     matches = len(req_projects.intersection(found_projects))
     score += matches * 4
+    breakdown["project_domains"] = matches * 4
     max_score += len(req_projects) * 4
     explanation.append(f"🧪 Project domain matches: {matches} [+{matches * 4}]")
 
     # Education
-    edu_level = filters.get("education", "").lower()
-    edu_score = max([EDUCATION_LEVELS.get(e.lower(), 0) for e in parsed.get("education", [])], default=0)
-    if edu_score >= EDUCATION_LEVELS.get(edu_level, 0):
+    edu_score = features["education_score"]
+    breakdown["education"] = 0
+    if edu_score >= rules["education_level"]:
         score += edu_score
+        breakdown["education"] = edu_score
     explanation.append(f"📘 Education match score: {edu_score}/5")
     max_score += 5
 
     # Experience
-    try:
-        exp = int(re.sub(r"[^0-9]", "", str(parsed.get("experience", "0"))))
-    except:
-        exp = 0
+    exp = features["experience"]
 
     explanation.append(f"📌 Candidate has {exp} year(s) experience")
-    if exp >= filters.get("min_experience", 0):
+    breakdown["experience"] = 0
+    if exp >= rules["min_experience"]:
         score += 5
+        breakdown["experience"] = 5
         explanation.append(f"💼 Experience meets/exceeds required [+5]")
     else:
         explanation.append(f"⚠️ Experience below required [+0]")
     max_score += 5
 
     match_score = (score / max_score) * 100 if max_score else 0
-    return match_score, "\n".join(explanation)
+    breakdown["max_score"] = max_score
+    return match_score, "\n".join(explanation), breakdown
 
-def rank_resumes(job_id, filters):
-    applications = fetch_applications_by_job(job_id)
-    if not applications:
-        return []
-
-    job_text = filters.get("job_description") or " ".join(
+def job_text_from_filters(filters):
+    return filters.get("job_description") or " ".join(
         filters.get("required_skills", []) +
         filters.get("certifications", []) +
         filters.get("project_domains", [])
     )
-    job_embedding = bert_model.encode(job_text, convert_to_tensor=True)
 
-    ranked = []
-    for app in applications:
-        parsed = app.get("parsed_data", {})
-        resume_text = parsed.get("text", "")
-        if not resume_text.strip():
-            continue
+def score_applications(applications, filters, similarities, features=None, rules=None):
+    with span("rank.score", candidates=len(applications)):
+        return _score_applications(applications, filters, similarities, features, rules)
 
-        resume_embedding = bert_model.encode(resume_text, convert_to_tensor=True)
-        semantic_sim = float(util.cos_sim(job_embedding, resume_embedding).item()) * 100
+def _score_applications(applications, filters, similarities, features=None, rules=None):
+    # Hybrid score: rule-based match blended with semantic similarity (0-1 cosine).
+    # rules holds already computed rule_based_score_details results (None = compute)
+    ranked = []
+    features = features or [None] * len(applications)
+    rules = rules or [None] * len(applications)
+    compiled = compile_rules(filters)
+    for app, similarity, app_features, rule in zip(applications, similarities, features, rules):
+        semantic_sim = float(similarity) * 100
 
-        rule_score, explanation = rule_based_score(app, filters)
+        rule_score, explanation, breakdown = rule or rule_based_score_details(app, filters, app_features, compiled)
         final_score = round(0.5 * rule_score + 0.5 * semantic_sim, 2)
 
+        app["rule_score"] = rule_score
+        app["semantic_score"] = semantic_sim
+        app["final_score"] = final_score
+        app["score_breakdown"] = breakdown
         app["match_score"] = int(final_score)
         app["explanation"] = explanation + f"\n🧠 BERT Semantic Similarity to Job Description: {semantic_sim:.2f}%"
         ranked.append(app)
 
-    ranked = sorted(ranked, key=lambda x: x["match_score"], reverse=True)
+    return sorted(ranked, key=lambda x: x["match_score"], reverse=True)
+
+def rank_resumes(job_id, filters, full_pool=False):
+    with span("rank", job_id=job_id, full_pool=full_pool):
+        return _rank_resumes(job_id, filters, full_pool)
+
+def _rank_resumes(job_id, filters, full_pool=False):
+    prime_job_profile(job_id)
+    with span("rank.fetch_applications") as s:
+        applications = fetch_applications_by_job(job_id)
+        s.set(rows=len(applications))
+    return _rank_applications(applications, filters, full_pool)
+
+def _rank_applications(applications, filters, full_pool=False, job_vector=None):
+    # job_vector may be encoded ahead of time (rank_resumes_async overlaps it with the fetch)
+    if not applications:
+        return []
+
+    candidates = [
+        app for app in applications
+        if app.get("parsed_data", {}).get("text", "").strip()
+    ]
+    # Near-duplicate resumes share one slot (and one encode) when requested
+    if filters.get("collapse_duplicates"):
+        with span("rank.collapse_duplicates"):
+            candidates = collapse_duplicate_applications(candidates)
+    if not candidates:
+        return []
+    count("ranked_candidates_total", len(candidates))
+
+    similarities, rules = complete_application_scores(candidates, filters, job_vector)
+    ranked = score_applications(candidates, filters, similarities, rules=rules)
+    if full_pool:
+        return ranked
     return ranked[:int(filters.get("num_shortlist", 5))]
+
+# ===================== Precomputed Scores =====================
+# Similarity and rule scores per application are stored in application_scores
+# (filled in the background by feature_precompute.py when a candidate applies or
+# uploads). Each row records what it was computed from, so a replaced resume,
+# edited job text or different ranking filters simply miss and are recomputed.
+PRECOMPUTED_SCORES = os.getenv("PRECOMPUTED_SCORES", "1") == "1"
+
+# Every parsed field the scorers read (see resume_features); the parser version
+# covers fields a re-parse may fill in differently
+RESUME_KEY_FIELDS = ("text", "certifications", "project_domains", "education", "experience", "parser_version")
+
+def resume_key(parsed):
+    inputs = {field: parsed.get(field) for field in RESUME_KEY_FIELDS}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def semantic_key(job_text):
+    # model_version() covers the model, chunking on/off with its pooling, and the store mode
+    return hashlib.sha256(f"{model_version()}\0{job_text}".encode("utf-8")).hexdigest()[:16]
+
+def lookup_application_scores(applications, filters):
+    # Per application: stored similarity (or None) and rule_based_score_details result (or None)
+    similarities, rules = [None] * len(applications), [None] * len(applications)
+    if not PRECOMPUTED_SCORES or not applications:
+        return similarities, rules
+    stored = fetch_application_scores([app["id"] for app in applications])
+    wanted_rule, wanted_semantic = rule_key(filters), semantic_key(job_text_from_filters(filters))
+    for i, app in enumerate(applications):
+        row = stored.get(app["id"])
+        if row is None or row["resume_key"] != resume_key(app["parsed_data"]):
+            continue
+        if row["semantic_key"] == wanted_semantic and row["similarity"] is not None:
+            similarities[i] = row["similarity"]
+        if row["rule_key"] == wanted_rule and row["rule_score"] is not None:
+            rules[i] = (row["rule_score"], row["explanation"], row["breakdown"] or {})
+    return similarities, rules
+
+def complete_application_scores(applications, filters, job_vector=None):
+    # Stored scores where they are current; only the rest are embedded/scored and saved back
+    with span("rank.lookup_scores") as s:
+        similarities, rules = lookup_application_scores(applications, filters)
+        missing = [i for i, similarity in enumerate(similarities) if similarity is None]
+        s.set(hits=len(applications) - len(missing))
+    count("precomputed_similarity_hits_total", len(applications) - len(missing))
+
+    if missing:
+        # Resume chunks come from the chunk cache where possible; the rest are encoded in
+        # one batch, scored as one matrix and pooled back to one similarity per resume
+        with span("rank.embed", resumes=len(missing)):
+            if job_vector is None:
+                job_vector = job_vector_for(job_text_from_filters(filters))
+            chunk_vectors, offsets = embed_resume_chunks(
+                [applications[i]["parsed_data"]["text"] for i in missing], encode_texts, MODEL_NAME
+            )
+        with span("rank.similarity", chunks=len(chunk_vectors)):
+            # These vectors are already in memory as float32; quantizing them here would only add error
+            scores = normalize_rows(chunk_vectors) @ normalize_rows(job_vector)[0]
+            for i, similarity in zip(missing, pool_chunk_scores(scores, offsets)):
+                similarities[i] = float(similarity)
+
+    changed = set(missing)
+    compiled = compile_rules(filters)
+    for i, (app, rule) in enumerate(zip(applications, rules)):
+        if rule is None:
+            rules[i] = rule_based_score_details(app, filters, rules=compiled)
+            changed.add(i)
+
+    if PRECOMPUTED_SCORES and changed:
+        wanted_rule, wanted_semantic = rule_key(filters), semantic_key(job_text_from_filters(filters))
+        save_application_scores([
+            (applications[i]["id"], resume_key(applications[i]["parsed_data"]), wanted_rule,
+             rules[i][0], rules[i][1], rules[i][2], wanted_semantic, similarities[i])
+            for i in sorted(changed)
+        ])
+    return similarities, rules
+
+# ===================== Job Profiles =====================
+# insert_job/update_job compile each job once: normalised skill, certification and
+# perk lists, the alias-expanded rule sets, the education threshold and the job
+# vector, stored on the jobs row (profile, profile_embedding). Ranking seeds the
+# in-memory caches from it, so a job's text is encoded and its aliases expanded
+# once per edit rather than once per ranking. The profile records a key of the
+# columns it was compiled from and is ignored once they no longer match.
+JOB_PROFILE_VERSION = 2
+JOB_PROFILE_SOURCE_FIELDS = ("skills", "certifications", "perks", "education", "experience_required",
+                             "description", "num_resumes_to_shortlist", "num_positions")
+
+def job_source_key(job):
+    inputs = {field: job.get(field) for field in JOB_PROFILE_SOURCE_FIELDS}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def current_job_profile(job):
+    # Stored profile of a jobs row, or None if it is missing, outdated or older than the row's columns
+    profile = job.get("profile")
+    if (not isinstance(profile, dict) or profile.get("version") != JOB_PROFILE_VERSION
+            or profile.get("source_key") != job_source_key(job)):
+        return None
+    return profile
+
+def job_vector_for(job_text):
+    # (1, dim) job vector, encoded only the first time this text is seen
+    key = semantic_key(job_text)
+    vector = _lru_get(_job_vectors, key)
+    if vector is None:
+        vector = encode_texts([job_text])
+        _lru_put(_job_vectors, key, vector)
+    return vector
+
+def compile_job_profile(job):
+    filters = build_filters_from_job(dict(job, profile=None))
+    job_text = job_text_from_filters(filters)
+    rules = compile_rules(filters)
+    profile = {
+        "version": JOB_PROFILE_VERSION,
+        "source_key": job_source_key(job),
+        "skills": split_job_field(job.get("skills")),
+        "certifications": split_job_field(job.get("certifications")),
+        "perks": split_job_field(job.get("perks")),
+        "education": split_job_field(job.get("education")),
+        "filters": filters,
+        "rule_key": rule_key(filters),
+        "semantic_key": semantic_key(job_text),
+        # Lists, not dicts: jsonb does not keep key order and skill order shows in explanations
+        "skill_variants": [[skill, sorted(variants)] for skill, variants in rules["skills"]],
+        "certification_variants": sorted(rules["certifications"]),
+        "certification_count": rules["certification_count"],
+        "project_domains": sorted(rules["project_domains"]),
+        "education_threshold": rules["education_level"],
+        "min_experience": rules["min_experience"]
+    }
+    return profile, job_vector_for(job_text)[0]
+
+def _remember_job_profile(job_id, profile):
+    _lru_put(_job_profiles, job_id, profile)
+    _lru_put(_job_vectors, profile["semantic_key"], profile["vector"].reshape(1, -1))
+    _lru_put(_compiled_rules, profile["rule_key"], {
+        "skills": [(skill, frozenset(variants)) for skill, variants in profile["skill_variants"]],
+        "certifications": frozenset(profile["certification_variants"]),
+        "certification_count": profile["certification_count"],
+        "project_domains": frozenset(profile["project_domains"]),
+        "education_level": profile["education_threshold"],
+        "min_experience": profile["min_experience"]
+    })
+
+def refresh_job_profile(job_id):
+    # Called by insert_job/update_job after the row is written
+    job = fetch_job_by_id(job_id)
+    if not job:
+        return None
+    profile, vector = compile_job_profile(job)
+    save_job_profile(job_id, profile, vector.astype(np.float32).tobytes())
+    profile = dict(profile, vector=vector.astype(np.float32))
+    _remember_job_profile(job_id, profile)
+    return profile
+
+def load_job_profile(job):
+    # Profile from a jobs row (SELECT * carries profile and profile_embedding), or None
+    stored, embedding = current_job_profile(job), job.get("profile_embedding")
+    profile = _lru_get(_job_profiles, job["id"])
+    if profile is not None and profile.get("source_key") == job_source_key(job):
+        return profile
+    if stored is None or not embedding:
+        return None
+    profile = dict(stored, vector=np.frombuffer(bytes(embedding), dtype=np.float32))
+    _remember_job_profile(job["id"], profile)
+    return profile
+
+def get_job_profile(job_id):
+    # Caches are keyed by content (job text, rule filters), so a profile another
+    # process has since replaced can only cost an encode, never a wrong score
+    profile = _lru_get(_job_profiles, job_id)
+    if profile is None:
+        job = fetch_job_by_id(job_id)
+        if job:
+            # Jobs posted before profiles existed are compiled on first use
+            profile = load_job_profile(job) or refresh_job_profile(job_id)
+    return profile
+
+def prime_job_profile(job_id):
+    # Ranking works without a profile, it just has to encode the job text itself
+    try:
+        get_job_profile(job_id)
+    except Exception as e:
+        logging.error("Could not load job profile for job_id=%s: %s", job_id, e)
+
+# ===================== Multi-Job Batch Ranking =====================
+def split_job_field(value):
+    # skills/certifications/perks/education are stored comma-joined
+    if isinstance(value, (list, tuple)):
+        return [v.strip() for v in value if v and v.strip()]
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+def build_filters_from_job(job, num_shortlist=None):
+    # Ranking filters derived from what the recruiter stored on the job posting;
+    # the compiled profile already holds them for jobs saved through insert/update_job
+    profile = current_job_profile(job)
+    if profile is not None:
+        filters = dict(profile["filters"])
+        if num_shortlist:
+            filters["num_shortlist"] = num_shortlist
+        return filters
+    split = split_job_field
+    education = split(job.get("education"))
+    education_keys = [re.sub(r"[^a-z ]", "", e.lower()).strip() for e in education]
+    known = [e for e in education_keys if e in EDUCATION_LEVELS]
+    experience = re.findall(r"\d+", str(job.get("experience_required") or ""))
+    return {
+        "required_skills": [s.lower() for s in split(job.get("skills"))],
+        "certifications": [c.lower() for c in split(job.get("certifications"))],
+        "project_domains": [],
+        "education": min(known, key=EDUCATION_LEVELS.get) if known else "",
+        "min_experience": int(experience[0]) if experience else 0,
+        "job_description": job.get("description", ""),
+        "num_shortlist": num_shortlist or job.get("num_resumes_to_shortlist") or job.get("num_positions") or 5
+    }
+
+def rank_jobs_batch(jobs, filters_by_job=None, save_results=True, encode_batch_size=256):
+    jobs = list(jobs)
+    with span("rank_batch", jobs=len(jobs)):
+        return _rank_jobs_batch(jobs, filters_by_job, save_results, encode_batch_size)
+
+def _rank_jobs_batch(jobs, filters_by_job=None, save_results=True, encode_batch_size=256):
+    # Ranks many jobs in one pass: each distinct resume chunk and job text is encoded once,
+    # the candidates x jobs similarity matrix comes from one matrix product, and
+    # resume features are shared by every job the candidate applied to.
+    filters_by_job = filters_by_job or {}
+    if not jobs:
+        return {}
+    job_filters = [filters_by_job.get(job["id"]) or build_filters_from_job(job) for job in jobs]
+
+    with span("rank_batch.fetch_applications") as s:
+        applications = fetch_applications_by_jobs([job["id"] for job in jobs])
+        s.set(rows=len(applications))
+    results, ranking_rows = _rank_fetched_jobs(jobs, job_filters, applications, encode_batch_size)
+
+    if save_results and ranking_rows:
+        with span("rank_batch.save", rows=len(ranking_rows)):
+            save_ranking_results(ranking_rows)
+    return results
+
+def _rank_fetched_jobs(jobs, job_filters, applications, encode_batch_size=256):
+    # CPU side of batch ranking; returns the shortlists and the (application_id, score) rows to save
+    job_columns = {job["id"]: col for col, job in enumerate(jobs)}
+    resume_rows = {}
+    resume_texts, resume_feature_list = [], []
+    for app in applications:
+        parsed = app.get("parsed_data") or {}
+        if not isinstance(parsed, dict) or not parsed.get("text", "").strip():
+            continue
+        if app["resume_id"] not in resume_rows:
+            resume_rows[app["resume_id"]] = len(resume_texts)
+            resume_texts.append(parsed["text"])
+            resume_feature_list.append(resume_features(parsed))
+
+    results = {job["id"]: [] for job in jobs}
+    ranking_rows = []
+    if not resume_texts:
+        return results, ranking_rows
+
+    count("ranked_candidates_total", len(resume_texts))
+    with span("rank_batch.embed", resumes=len(resume_texts)):
+        for job in jobs:
+            load_job_profile(job)
+        job_vectors = np.vstack([job_vector_for(job_text_from_filters(f)) for f in job_filters])
+        # Resumes are chunked and embedded a group at a time so only the quantised store
+        # holds every chunk vector; offsets map chunk rows back to resumes
+        store = EmbeddingStore(job_vectors.shape[1], EMBEDDING_STORE_MODE)
+        offsets = [0]
+        for start in range(0, len(resume_texts), encode_batch_size):
+            chunk_vectors, chunk_offsets = embed_resume_chunks(
+                resume_texts[start:start + encode_batch_size], encode_texts, MODEL_NAME, encode_batch_size
+            )
+            base = extend_offsets(offsets, chunk_offsets)
+            store.add(list(range(base, base + len(chunk_vectors))), chunk_vectors)
+    with span("rank_batch.similarity", chunks=offsets[-1]):
+        similarity_matrix = pool_chunk_scores(store.score_matrix(job_vectors), offsets)
+
+    by_job = {}
+    for app in applications:
+        row = resume_rows.get(app["resume_id"])
+        if row is not None:
+            by_job.setdefault(app["job_id"], []).append((app, row))
+
+    for job, filters in zip(jobs, job_filters):
+        entries = by_job.get(job["id"], [])
+        if not entries:
+            continue
+        if filters.get("collapse_duplicates"):
+            rows_by_app = {id(app): row for app, row in entries}
+            entries = [(app, rows_by_app[id(app)]) for app in collapse_duplicate_applications([app for app, _ in entries])]
+        col = job_columns[job["id"]]
+        apps = [app for app, _ in entries]
+        similarities = [similarity_matrix[row, col] for _, row in entries]
+        features = [resume_feature_list[row] for _, row in entries]
+        ranked = score_applications(apps, filters, similarities, features)
+        ranking_rows.extend((app["id"], app["match_score"]) for app in ranked)
+        results[job["id"]] = ranked[:int(filters.get("num_shortlist", 5))]
+    return results, ranking_rows
+
+def rank_active_jobs(recruiter_id=None, save_results=True):
+    # Nightly entry point (ranker_cli batch and POST /rank/batch): one recruiter's
+    # active jobs, or every active job on the site, through the pipelined async path
+    return async_database.run_sync(rank_active_jobs_async(recruiter_id, save_results))
+
+# ===================== Async Ranking =====================
+# Same results as rank_jobs_batch, with database I/O overlapped with model work:
+# the next group of jobs is fetched while the current one is scored, and the
+# ranking saves run concurrently.
+async def rank_jobs_batch_async(jobs, filters_by_job=None, save_results=True, encode_batch_size=256, group_size=50):
+    jobs = list(jobs)
+    filters_by_job = filters_by_job or {}
+    groups = [jobs[i:i + group_size] for i in range(0, len(jobs), group_size)]
+    results, saves = {}, []
+    with span("rank_batch", jobs=len(jobs), mode="async"):
+        pending = async_database.fetch_applications_by_jobs([job["id"] for job in groups[0]]) if groups else None
+        for index, group in enumerate(groups):
+            applications = await pending
+            if index + 1 < len(groups):
+                pending = asyncio.ensure_future(
+                    async_database.fetch_applications_by_jobs([job["id"] for job in groups[index + 1]])
+                )
+            job_filters = [filters_by_job.get(job["id"]) or build_filters_from_job(job) for job in group]
+            group_results, ranking_rows = await asyncio.to_thread(
+                _rank_fetched_jobs, group, job_filters, applications, encode_batch_size
+            )
+            results.update(group_results)
+            if save_results and ranking_rows:
+                saves.append(asyncio.ensure_future(async_database.save_ranking_results(ranking_rows)))
+        if saves:
+            await asyncio.gather(*saves)
+    return results
+
+async def rank_active_jobs_async(recruiter_id=None, save_results=True):
+    if recruiter_id:
+        jobs = await async_database.fetch_active_jobs_by_recruiter(recruiter_id)
+    else:
+        jobs = await async_database.fetch_active_jobs()
+    return await rank_jobs_batch_async(jobs, save_results=save_results)
+
+# ===================== Pool-Wide Discovery =====================
+def index_resume(candidate_id, resume_text):
+    # Called after upload/replace so discovery sees the new resume immediately
+    if not resume_text or not resume_text.strip():
+        unindex_resume(candidate_id)
+        return
+    vector = encode_texts([resume_text])[0]
+    get_resume_index(len(vector)).log_add(candidate_id, vector)
+
+def unindex_resume(candidate_id):
+    get_resume_index().log_remove(candidate_id)
+
+def reindex_candidates(candidate_ids, batch_size=256):
+    # Re-encodes the stored resume text of these candidates into the discovery index;
+    # bulk_ingest and reparse_backfill call it for the resumes they rewrite
+    candidate_ids = list(candidate_ids)
+    indexed = 0
+    for start in range(0, len(candidate_ids), batch_size):
+        page = candidate_ids[start:start + batch_size]
+        texts = {r["candidate_id"]: (r.get("parsed_data") or {}).get("text", "") for r in fetch_resumes_by_candidates(page)}
+        ids = [cid for cid in page if (texts.get(cid) or "").strip()]
+        if ids:
+            vectors = encode_texts([texts[cid] for cid in ids])
+            get_resume_index(vectors.shape[1]).log_add_batch(ids, vectors)
+            indexed += len(ids)
+        for cid in set(page) - set(ids):
+            unindex_resume(cid)
+    return indexed
+
+def rebuild_resume_index(batch_size=256):
+    # Full rebuild from the resumes table, e.g. after first deploy or a model change
+    index = None
+    for rows in iter_resume_texts(batch_size):
+        rows = [r for r in rows if r["text"].strip()]
+        if not rows:
+            continue
+        vectors = encode_texts([r["text"] for r in rows])
+        if index is None:
+            index = IVFIndex(vectors.shape[1])
+        index.add([r["candidate_id"] for r in rows], vectors)
+    if index is None:
+        return 0
+    if len(index) >= MIN_TRAIN_SIZE:
+        index.retrain()
+    index.save()
+    reset_resume_index()
+    return len(index)
+
+def discover_candidates(filters, top_k=None):
+    # ANN top-K over every stored resume, reranked by the hybrid scorer
+    top_k = int(top_k or filters.get("num_shortlist", 5))
+    job_vector = job_vector_for(job_text_from_filters(filters))[0]
+    # Over-fetch so the rule-based rerank has room to reorder
+    with span("discover.ann_search"):
+        hits = get_resume_index(len(job_vector)).search(job_vector, k=max(top_k * 4, 50))
+    if not hits:
+        return []
+
+    similarity_by_candidate = dict(hits)
+    with span("discover.fetch_resumes", rows=len(hits)):
+        resumes = fetch_resumes_by_candidates(list(similarity_by_candidate))
+    similarities = [similarity_by_candidate[r["candidate_id"]] for r in resumes]
+    return score_applications(resumes, filters, similarities)[:top_k]
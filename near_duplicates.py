@@ -0,0 +1,145 @@
+import os
+import re
+import zlib
+import numpy as np
+
+# Near-duplicate resumes (the same file under several accounts, lightly edited
+# copies) found with MinHash signatures over word shingles, bucketed by LSH.
+MINHASH_PERMUTATIONS = 64
+SHINGLE_SIZE = 5
+# 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates, then the
+# signature estimate must reach DUPLICATE_THRESHOLD
+LSH_BANDS = 16
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+# Fixed seeds: signatures are stored in parsed_data and must stay comparable
+_PERM_A = _rng.randint(1, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_WORD_RE = re.compile(r"\w+")
+
+
+# ===================== MinHash =====================
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) <= size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+def minhash_signature(text):
+    # List of ints so it can be stored as-is in parsed_data; None for empty text
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return None
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).tolist()
+
+def estimated_similarity(sig_a, sig_b):
+    return float(np.mean(np.asarray(sig_a) == np.asarray(sig_b)))
+
+def signature_for(parsed):
+    # Resumes parsed before signatures existed fall back to hashing their text
+    if not isinstance(parsed, dict):
+        return None
+    signature = parsed.get("minhash")
+    if signature and len(signature) == MINHASH_PERMUTATIONS:
+        return signature
+    return minhash_signature(parsed.get("text", ""))
+
+
+# ===================== LSH Index =====================
+class LSHIndex:
+    def __init__(self, bands=LSH_BANDS, threshold=DUPLICATE_THRESHOLD):
+        self.bands = bands
+        self.rows = MINHASH_PERMUTATIONS // bands
+        self.threshold = threshold
+        self.buckets = {}
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, key, signature):
+        if signature is None:
+            return
+        if key in self.signatures:
+            self.remove(key)
+        self.signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self.buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band_key in self._band_keys(signature):
+            bucket = self.buckets.get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def query(self, signature, exclude=None):
+        # Keys whose estimated Jaccard similarity reaches the threshold, best first
+        if signature is None:
+            return []
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates |= self.buckets.get(band_key, set())
+        candidates.discard(exclude)
+        matches = []
+        for key in candidates:
+            similarity = estimated_similarity(signature, self.signatures[key])
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+# ===================== Clustering =====================
+def duplicate_clusters(signatures, threshold=DUPLICATE_THRESHOLD):
+    # signatures: list aligned with the items; returns lists of positions, one per cluster
+    parent = list(range(len(signatures)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index = LSHIndex(threshold=threshold)
+    for pos, signature in enumerate(signatures):
+        for other, _ in index.query(signature):
+            parent[find(pos)] = find(other)
+        index.add(pos, signature)
+
+    clusters = {}
+    for pos in range(len(signatures)):
+        clusters.setdefault(find(pos), []).append(pos)
+    return list(clusters.values())
+
+def collapse_duplicate_applications(applications, threshold=DUPLICATE_THRESHOLD):
+    # Keeps one application per near-duplicate cluster (the earliest submission) and
+    # records the others on it as duplicate_count / duplicates
+    signatures = [signature_for(app.get("parsed_data")) for app in applications]
+    kept = []
+    for cluster in duplicate_clusters(signatures, threshold):
+        members = [applications[pos] for pos in cluster]
+        keep = min(members, key=lambda app: (app.get("applied_at") is None, app.get("applied_at") or 0, app.get("id") or 0))
+        others = [app for app in members if app is not keep]
+        keep["duplicate_count"] = len(others)
+        keep["duplicates"] = [
+            {"candidate_id": app.get("candidate_id"), "name": app.get("name"), "email": app.get("email")}
+            for app in others
+        ]
+        kept.append(keep)
+    return kept
@@ -0,0 +1,130 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+# Parsed resumes keyed by SHA-256 of the PDF bytes plus the parser version, so
+# re-uploads of an identical file skip PDF extraction and NLP entirely.
+# Bump whenever extraction logic or keyword lists change; invalidates cached parses.
+# Kept here (not in resume_parser) so light modules can stamp it without loading spaCy.
+PARSER_VERSION = 3
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", "data/parse_cache")
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "20000"))
+PARSE_CACHE_MEMORY_ENTRIES = int(os.getenv("PARSE_CACHE_MEMORY_ENTRIES", "256"))
+# Evict this fraction of entries at once when the disk cache overflows
+EVICT_FRACTION = 0.1
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_disk_count = None
+
+
+def pdf_sha256(pdf_bytes):
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def cache_key(file_sha256, parser_version):
+    return f"{file_sha256}-v{parser_version}"
+
+def _path_for(key):
+    return os.path.join(PARSE_CACHE_DIR, key[:2], key + ".json")
+
+
+# ------------------- Memory Tier -------------------
+def _remember(key, payload):
+    with _lock:
+        _memory[key] = payload
+        _memory.move_to_end(key)
+        while len(_memory) > PARSE_CACHE_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+# ------------------- Disk Tier -------------------
+def _count_disk_entries():
+    global _disk_count
+    if _disk_count is None:
+        count = 0
+        if os.path.isdir(PARSE_CACHE_DIR):
+            for _, _, files in os.walk(PARSE_CACHE_DIR):
+                count += sum(1 for f in files if f.endswith(".json"))
+        _disk_count = count
+    return _disk_count
+
+def _evict_disk_entries():
+    # Least recently used first: hits bump the file's mtime
+    global _disk_count
+    entries = []
+    for root, _, files in os.walk(PARSE_CACHE_DIR):
+        for file_name in files:
+            if file_name.endswith(".json"):
+                path = os.path.join(root, file_name)
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    continue
+    entries.sort()
+    excess = len(entries) - PARSE_CACHE_MAX_ENTRIES
+    to_remove = max(excess, int(PARSE_CACHE_MAX_ENTRIES * EVICT_FRACTION)) if excess > 0 else 0
+    for _, path in entries[:to_remove]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    _disk_count = len(entries) - to_remove
+
+
+# ------------------- Public API -------------------
+def get_cached_parse(file_sha256, parser_version):
+    key = cache_key(file_sha256, parser_version)
+    with _lock:
+        payload = _memory.get(key)
+        if payload is not None:
+            _memory.move_to_end(key)
+    if payload is None:
+        path = _path_for(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        _remember(key, payload)
+    try:
+        return json.loads(payload)  # fresh dict, so callers may mutate it
+    except ValueError:
+        return None
+
+def store_cached_parse(file_sha256, parser_version, parsed):
+    global _disk_count
+    key = cache_key(file_sha256, parser_version)
+    payload = json.dumps(parsed)
+    _remember(key, payload)
+    path = _path_for(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        existed = os.path.exists(path)
+        os.replace(tmp_path, path)
+        with _lock:
+            if _disk_count is None:
+                _count_disk_entries()
+            elif not existed:
+                _disk_count += 1
+            if _disk_count > PARSE_CACHE_MAX_ENTRIES:
+                _evict_disk_entries()
+    except OSError as e:
+        logging.warning("Could not write parse cache entry %s: %s", key, e)
+
+def clear_parse_cache():
+    global _disk_count
+    with _lock:
+        _memory.clear()
+    if os.path.isdir(PARSE_CACHE_DIR):
+        for root, _, files in os.walk(PARSE_CACHE_DIR):
+            for file_name in files:
+                if file_name.endswith(".json"):
+                    os.remove(os.path.join(root, file_name))
+    _disk_count = 0
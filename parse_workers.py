@@ -0,0 +1,204 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing as mp
+
+from parse_cache import PARSER_VERSION
+
+# Resume parsing in isolated worker processes. A PDF that hangs PyMuPDF or blows
+# up spaCy/TextBlob memory only costs its own worker, which is killed and
+# replaced; the caller gets a parse marked as failed.
+PARSE_POOL_SIZE = int(os.getenv("PARSE_POOL_SIZE", "2"))
+PARSE_TIMEOUT = float(os.getenv("PARSE_TIMEOUT", "60"))
+PARSE_MAX_RSS_MB = int(os.getenv("PARSE_MAX_RSS_MB", "1536"))
+# Recycle workers periodically so slow leaks never accumulate
+PARSE_MAX_TASKS_PER_WORKER = int(os.getenv("PARSE_MAX_TASKS_PER_WORKER", "200"))
+POLL_INTERVAL = 0.1
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+def failed_parse(reason):
+    # Stamped with the parser version so reparse_backfill.py doesn't retry it forever
+    return {
+        "name": "", "email": "", "skills": [], "experience": 0, "education": [],
+        "certifications": [], "project_domains": [], "soft_skills": [],
+        "grammar_score": 0, "text": "",
+        "parse_status": "failed", "parse_error": reason, "parser_version": PARSER_VERSION
+    }
+
+
+# ===================== Worker Process =====================
+def _worker_main(conn, max_rss_mb):
+    # Address-space cap as a backstop; the parent also watches RSS while a task runs
+    try:
+        import resource
+        limit = max_rss_mb * 4 * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+    # Daemon processes can't start the PDF page pool; extract pages in this process
+    os.environ["PDF_PARALLEL_WORKERS"] = "0"
+    from resume_parser import parse_resume_bytes
+    conn.send(("ready", None))
+    while True:
+        try:
+            pdf_bytes = conn.recv()
+        except EOFError:
+            return
+        if pdf_bytes is None:
+            return
+        try:
+            conn.send(("ok", parse_resume_bytes(pdf_bytes)))
+        except MemoryError:
+            conn.send(("error", "memory limit exceeded"))
+            return
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, context, max_rss_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, max_rss_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+        self.ready = False
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        except Exception:
+            pass
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        except Exception:
+            pass
+        if self.process.is_alive():
+            self.kill()
+
+
+# ===================== Pool =====================
+class SandboxedParserPool:
+    def __init__(self, size=PARSE_POOL_SIZE, timeout=PARSE_TIMEOUT,
+                 max_rss_mb=PARSE_MAX_RSS_MB, max_tasks_per_worker=PARSE_MAX_TASKS_PER_WORKER):
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        # spawn: never fork a multi-threaded Streamlit server
+        self.context = mp.get_context("spawn")
+        self.idle = [self._spawn() for _ in range(size)]
+        self.slots = threading.Semaphore(size)
+        self.lock = threading.Lock()
+        self.stats = {"parsed": 0, "failed": 0, "timeouts": 0, "memory_kills": 0, "crashes": 0, "recycled": 0}
+
+    def _count(self, key):
+        # parse() runs on many caller threads at once
+        with self.lock:
+            self.stats[key] += 1
+
+    def _spawn(self):
+        return _Worker(self.context, self.max_rss_mb)
+
+    def _checkout(self):
+        self.slots.acquire()
+        with self.lock:
+            return self.idle.pop()
+
+    def _checkin(self, worker, replace=False):
+        if replace or worker.tasks >= self.max_tasks_per_worker:
+            if not replace:
+                self._count("recycled")
+            worker.kill() if replace else worker.stop()
+            worker = self._spawn()
+        with self.lock:
+            self.idle.append(worker)
+        self.slots.release()
+
+    def _wait_ready(self, worker, deadline):
+        # A freshly spawned worker first loads the parser (spaCy); that isn't billed to the task
+        while not worker.ready:
+            if worker.conn.poll(POLL_INTERVAL):
+                worker.conn.recv()
+                worker.ready = True
+            elif not worker.process.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("parse worker failed to start")
+
+    def parse(self, pdf_bytes):
+        worker = self._checkout()
+        try:
+            self._wait_ready(worker, time.monotonic() + 120)
+            worker.conn.send(pdf_bytes)
+        except Exception as e:
+            self._count("crashes")
+            self._checkin(worker, replace=True)
+            return failed_parse(f"worker unavailable: {e}")
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if worker.conn.poll(POLL_INTERVAL):
+                try:
+                    status, payload = worker.conn.recv()
+                except (EOFError, OSError):
+                    self._count("crashes")
+                    self._checkin(worker, replace=True)
+                    return failed_parse("parse worker crashed")
+                worker.tasks += 1
+                if status == "ok":
+                    self._count("parsed")
+                    self._checkin(worker)
+                    return payload
+                self._count("failed")
+                self._checkin(worker, replace=not worker.process.is_alive() or payload == "memory limit exceeded")
+                return failed_parse(payload)
+
+            if not worker.process.is_alive():
+                self._count("crashes")
+                self._checkin(worker, replace=True)
+                return failed_parse("parse worker crashed")
+            if time.monotonic() > deadline:
+                self._count("timeouts")
+                logging.warning("Resume parse exceeded %ss; killing worker pid=%s", self.timeout, worker.process.pid)
+                self._checkin(worker, replace=True)
+                return failed_parse(f"timed out after {self.timeout}s")
+            rss = process_rss_mb(worker.process.pid)
+            if rss > self.max_rss_mb:
+                self._count("memory_kills")
+                logging.warning("Resume parse used %.0fMB (limit %sMB); killing worker pid=%s", rss, self.max_rss_mb, worker.process.pid)
+                self._checkin(worker, replace=True)
+                return failed_parse(f"memory limit of {self.max_rss_mb}MB exceeded")
+
+    def close(self):
+        with self.lock:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_parser_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxedParserPool()
+        return _pool
+
+def parse_in_sandbox(pdf_bytes):
+    return get_parser_pool().parse(pdf_bytes)
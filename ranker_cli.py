@@ -0,0 +1,328 @@
+"""
+Headless access to resume ranking, for schedulers, ATS integrations and load tests.
+
+    python ranker_cli.py rank --job-id 12 --format csv --output shortlist.csv
+    python ranker_cli.py rank --job-id 12 --full-pool --format parquet --output run.parquet
+    python ranker_cli.py batch --recruiter-id 3
+    python ranker_cli.py serve --port 8502 --max-concurrency 4 --timeout 120 --queue-wait 0.5
+
+The HTTP API accepts the same filters dict as the dashboard:
+    POST /rank        {"job_id": 12, "filters": {...}, "full_pool": false, "format": "json"}
+    POST /rank/batch  {"recruiter_id": 3}   (omit recruiter_id for every active job)
+    POST /discover    {"filters": {...}, "top_k": 20}
+    GET  /health
+    GET  /metrics     Prometheus text (stage timings need TRACING=1)
+    GET  /db/stats    query fingerprints with calls, time, rows and bytes, per endpoint
+
+Add "profile": true to a POST body to capture a cProfile of that one request
+under PROFILE_DIR; the file name comes back in the X-Profile-File header.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime as dt
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from database import fetch_job_by_id
+from ml_ranking import (
+    rank_resumes, rank_active_jobs, discover_candidates, build_filters_from_job, encode_texts, model_version
+)
+from analytics_export import export_ranking_run
+from report_generator import iter_csv_report_with_explanations
+from tracing import profiled, render_prometheus, start_metrics_writer, write_metrics_file
+from db_instrumentation import db_scope, query_stats, scope_totals, format_query_report
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+# How long a request may wait for a free ranking slot before getting a 503
+RANK_QUEUE_WAIT = float(os.getenv("RANK_QUEUE_WAIT", "0.5"))
+
+RESULT_FIELDS = [
+    "id", "job_id", "candidate_id", "resume_id", "name", "email", "phone", "file_name",
+    "match_score", "final_score", "rule_score", "semantic_score", "score_breakdown", "explanation",
+    "duplicate_count", "duplicates"
+]
+
+
+# ===================== Shared Helpers =====================
+def resolve_filters(job_id, filters=None):
+    # Explicit filters win; otherwise use the ones stored on the job posting
+    if filters:
+        return filters
+    job = fetch_job_by_id(job_id)
+    if not job:
+        raise ValueError(f"Job {job_id} not found")
+    return build_filters_from_job(job)
+
+def serialize_candidate(rank, candidate):
+    row = {"rank": rank}
+    for field in RESULT_FIELDS:
+        value = candidate.get(field)
+        if isinstance(value, (dt.date, dt.datetime)):
+            value = value.isoformat()
+        row[field] = value
+    row["skills"] = (candidate.get("parsed_data") or {}).get("skills", [])
+    return row
+
+def render(candidates, fmt, job_title=""):
+    if fmt == "csv":
+        return "".join(iter_csv_report_with_explanations(job_title, candidates))
+    return json.dumps([serialize_candidate(i, c) for i, c in enumerate(candidates, 1)], default=str)
+
+def load_filters_arg(value):
+    # --filters accepts inline JSON or @path/to/filters.json
+    if not value:
+        return None
+    if value.startswith("@"):
+        with open(value[1:]) as f:
+            return json.load(f)
+    return json.loads(value)
+
+def with_profile(fn, output):
+    # cProfile only sees its own thread, so the capture wraps the call itself
+    def wrapper(*args, **kwargs):
+        with profiled(output) as profile:
+            result = fn(*args, **kwargs)
+        logging.info("Profile written to %s\n%s", output, profile["report"])
+        return result
+    return wrapper
+
+def in_scope(fn, scope):
+    # Queries run on the worker thread, so the scope has to be entered there
+    def wrapper(*args, **kwargs):
+        with db_scope(scope):
+            return fn(*args, **kwargs)
+    return wrapper
+
+def profile_path(command):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return os.path.join(PROFILE_DIR, f"{command}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}.prof")
+
+def warm_up():
+    started = time.perf_counter()
+    encode_texts(["warm up"])
+    logging.info("Ranking model warm in %.1fs", time.perf_counter() - started)
+
+
+# ===================== HTTP API =====================
+class RankingFailed(Exception):
+    """Raised by RankingService.run when the ranking work itself fails."""
+
+
+class RankingService:
+    def __init__(self, max_concurrency=4, timeout=120.0, queue_wait=RANK_QUEUE_WAIT):
+        self.timeout = timeout
+        self.queue_wait = queue_wait
+        self.max_concurrency = max_concurrency
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        # Timed-out work can't be interrupted; it finishes on spare threads without
+        # holding a request slot (at most max_concurrency of it at a time)
+        self.stragglers = threading.BoundedSemaphore(max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=2 * max_concurrency)
+
+    def run(self, fn, *args, **kwargs):
+        # Rejects instead of queueing when no slot frees up within the short wait budget
+        if not self.slots.acquire(timeout=self.queue_wait):
+            raise OverflowError("Too many concurrent ranking requests")
+        held = [self.slots]
+        guard = threading.Lock()
+
+        def release(_):
+            with guard:
+                held[0].release()
+
+        future = self.executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with guard:
+                if not future.done() and self.stragglers.acquire(blocking=False):
+                    held[0] = self.stragglers
+                    self.slots.release()
+                elif not future.done():
+                    logging.warning("Timed-out ranking keeps its slot; %s stragglers already running", self.max_concurrency)
+            raise
+        except Exception as e:
+            # Errors from inside ranking are server errors, not bad requests
+            raise RankingFailed(str(e)) from e
+
+
+def make_handler(service):
+    class RankingHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="application/json", headers=None):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _error(self, status, message):
+            self._send(status, json.dumps({"error": message}))
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, json.dumps({"status": "ok"}))
+            elif self.path == "/metrics":
+                self._send(200, render_prometheus(), "text/plain; version=0.0.4")
+            elif self.path == "/db/stats":
+                self._send(200, json.dumps({"scopes": scope_totals(), "queries": query_stats(limit=50)}))
+            else:
+                self._error(404, "Not found")
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._error(400, "Request body must be JSON")
+            if not isinstance(body, dict):
+                return self._error(400, "Request body must be a JSON object")
+
+            fmt = body.get("format", "json")
+            headers = {}
+            scope = "api" + self.path
+            if body.get("profile"):
+                headers["X-Profile-File"] = profile_path(self.path.strip("/").replace("/", "_"))
+                profile = lambda fn: in_scope(with_profile(fn, headers["X-Profile-File"]), scope)
+            else:
+                profile = lambda fn: in_scope(fn, scope)
+            try:
+                if self.path == "/rank":
+                    if "job_id" not in body:
+                        return self._error(400, "job_id is required")
+                    filters = resolve_filters(body["job_id"], body.get("filters"))
+                    ranked = service.run(profile(rank_resumes), body["job_id"], filters, bool(body.get("full_pool")))
+                    result = render(ranked, fmt)
+                elif self.path == "/rank/batch":
+                    shortlists = service.run(profile(rank_active_jobs), body.get("recruiter_id"))
+                    result = json.dumps({
+                        str(job_id): [serialize_candidate(i, c) for i, c in enumerate(ranked, 1)]
+                        for job_id, ranked in shortlists.items()
+                    }, default=str)
+                    fmt = "json"
+                elif self.path == "/discover":
+                    ranked = service.run(profile(discover_candidates), body.get("filters") or {}, body.get("top_k"))
+                    result = render(ranked, fmt)
+                else:
+                    return self._error(404, "Not found")
+            except OverflowError as e:
+                return self._error(503, str(e))
+            except FutureTimeout:
+                return self._error(504, f"Ranking exceeded {service.timeout}s")
+            except RankingFailed as e:
+                logging.error("Ranking API error: %s", e)
+                return self._error(500, "Ranking failed")
+            except ValueError as e:
+                return self._error(400, str(e))
+            except Exception as e:
+                logging.error("Ranking API error: %s", e)
+                return self._error(500, "Ranking failed")
+
+            self._send(200, result, "text/csv" if fmt == "csv" else "application/json", headers)
+
+        def log_message(self, format, *args):
+            logging.info("%s - %s", self.address_string(), format % args)
+
+    return RankingHandler
+
+def serve(host="127.0.0.1", port=8502, max_concurrency=4, timeout=120.0, queue_wait=RANK_QUEUE_WAIT):
+    warm_up()
+    start_metrics_writer()
+    service = RankingService(max_concurrency=max_concurrency, timeout=timeout, queue_wait=queue_wait)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    logging.info("Ranking API listening on http://%s:%s (concurrency=%s, timeout=%ss)", host, port, max_concurrency, timeout)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# ===================== CLI =====================
+def write_output(text, path):
+    if path:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text + ("\n" if not text.endswith("\n") else ""))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume ranking without the Streamlit UI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rank = sub.add_parser("rank", help="Rank applicants for one job")
+    rank.add_argument("--job-id", type=int, required=True)
+    rank.add_argument("--filters", help="Filters as JSON or @file.json (default: from the job posting)")
+    rank.add_argument("--full-pool", action="store_true", help="Return every applicant, not just the shortlist")
+    rank.add_argument("--format", choices=["json", "csv", "parquet", "arrow"], default="json",
+                      help="parquet/arrow write the typed analytics columns and need --output")
+    rank.add_argument("--output")
+
+    batch = sub.add_parser("batch", help="Rank every active job in one pass")
+    batch.add_argument("--recruiter-id", type=int)
+    batch.add_argument("--output")
+
+    discover = sub.add_parser("discover", help="Best matches across all resumes")
+    discover.add_argument("--filters", required=True)
+    discover.add_argument("--top-k", type=int, default=20)
+    discover.add_argument("--format", choices=["json", "csv"], default="json")
+    discover.add_argument("--output")
+
+    api = sub.add_parser("serve", help="Run the local HTTP API")
+    api.add_argument("--host", default="127.0.0.1")
+    api.add_argument("--port", type=int, default=8502)
+    api.add_argument("--max-concurrency", type=int, default=4)
+    api.add_argument("--timeout", type=float, default=120.0)
+    api.add_argument("--queue-wait", type=float, default=RANK_QUEUE_WAIT, help="Seconds to wait for a free slot before 503")
+
+    for command in (rank, batch, discover):
+        command.add_argument("--profile", metavar="PATH", help="Write a cProfile capture of this run to PATH")
+
+    args = parser.parse_args(argv)
+    if args.command == "rank" and args.format in ("parquet", "arrow") and not args.output:
+        parser.error(f"--format {args.format} needs --output")
+    if args.command == "serve":
+        serve(args.host, args.port, args.max_concurrency, args.timeout, args.queue_wait)
+        return
+    profile = (lambda fn: with_profile(fn, args.profile)) if args.profile else (lambda fn: fn)
+    with db_scope(f"cli_{args.command}"):
+        run_command(args, profile)
+    if args.profile:
+        logging.info("Database cost for this run:\n%s", format_query_report())
+    write_metrics_file()
+
+def run_command(args, profile):
+    if args.command == "rank":
+        filters = resolve_filters(args.job_id, load_filters_arg(args.filters))
+        candidates = profile(rank_resumes)(args.job_id, filters, args.full_pool)
+        if args.format in ("parquet", "arrow"):
+            ranking_run = {
+                "run_id": uuid.uuid4().hex, "filters": filters,
+                "candidates": candidates, "model_version": model_version()
+            }
+            rows = export_ranking_run(args.output, ranking_run, args.job_id, fmt=args.format)
+            logging.info("Exported run %s (%s rows) to %s", ranking_run["run_id"], rows, args.output)
+        else:
+            write_output(render(candidates, args.format), args.output)
+    elif args.command == "batch":
+        started = time.perf_counter()
+        shortlists = profile(rank_active_jobs)(args.recruiter_id)
+        logging.info("Ranked %s jobs in %.1fs", len(shortlists), time.perf_counter() - started)
+        write_output(json.dumps({
+            str(job_id): [serialize_candidate(i, c) for i, c in enumerate(ranked, 1)]
+            for job_id, ranked in shortlists.items()
+        }, default=str), args.output)
+    elif args.command == "discover":
+        ranked = profile(discover_candidates)(load_filters_arg(args.filters), args.top_k)
+        write_output(render(ranked, args.format), args.output)
+
+if __name__ == "__main__":
+    main()
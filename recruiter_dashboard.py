@@ -1,13 +1,16 @@
 import streamlit as st
 import pandas as pd
 import datetime
+import uuid
 from database import (
     insert_job, fetch_active_jobs_by_recruiter, fetch_archived_jobs_by_recruiter,
-    soft_delete_job, update_job, count_applications_for_job
+    soft_delete_job, update_job, count_applications_for_job, get_resume_file_by_candidate_id,
+    resume_file_data
 )
 from auth import get_logged_in_user
-from ml_ranking import rank_resumes
-from report_generator import generate_pdf_report_with_explanations, generate_csv_report_with_explanations
+from ml_ranking import rank_resumes, discover_candidates, rank_jobs_batch, build_filters_from_job, split_job_field, model_version, current_job_profile
+from report_generator import get_cached_report, invalidate_cached_reports
+from analytics_export import export_ranking_run_to_file, pa
 from resume_preview import show_resume_preview
 
 # ------------------- Constants -------------------
@@ -106,6 +109,97 @@ ALL_SKILLS = sorted(set([
 ]))
 
 
+# ------------------- Job Fields -------------------
+def job_list(job, field):
+    # Lists compiled when the job was saved; rows without a current profile split the string
+    profile = current_job_profile(job)
+    if profile is not None and isinstance(profile.get(field), list):
+        return profile[field]
+    return split_job_field(job.get(field))
+
+
+# ------------------- Ranking Results -------------------
+def show_ranking_results(job, ranking_run, allow_full_export=True):
+    ranked_candidates = ranking_run["candidates"]
+    run_id = ranking_run["run_id"]
+    if not ranked_candidates:
+        st.warning("❗ No applications or matching resumes found.")
+        return
+
+    for idx, candidate in enumerate(ranked_candidates, 1):
+        skills = ', '.join(candidate.get('parsed_data', {}).get('skills', []))
+        file_name = candidate.get("file_name", f"resume_{candidate.get('id', idx)}.pdf")
+        file_data = candidate.get("file_data")
+        if file_data is None:
+            # Rankings carry only the blob hash; map this one from the blob store on demand
+            file_data = resume_file_data(candidate)
+        if file_data is None:
+            resume_file = get_resume_file_by_candidate_id(candidate.get("candidate_id")) or {}
+            file_data = resume_file.get("file_data") or b""
+        file_bytes = bytes(file_data)
+        email = candidate.get('email', '')
+        phone = candidate.get('phone', '')
+        name = candidate.get('name', '')
+        match_score = f"{candidate.get('match_score', 0)}%"
+        explanation = candidate.get("explanation", "No explanation available.")
+
+        st.markdown(f"**Rank {idx}: {name}**")
+        col1, col2, col3, col4 = st.columns([3, 3, 2, 2])
+        col1.markdown(f"**Email:** {email}")
+        col2.markdown(f"**Phone:** {phone}")
+        col3.markdown(f"**Score:** {match_score}")
+        col4.download_button("📅 Download", data=file_bytes, file_name=file_name, mime="application/pdf", key=f"download_{run_id}_{candidate['id']}")
+        st.markdown(f"**Skills:** {skills}")
+        if candidate.get("duplicate_count"):
+            others = ', '.join(d.get("email") or str(d.get("candidate_id")) for d in candidate.get("duplicates", []))
+            st.warning(f"⚠️ {candidate['duplicate_count']} near-duplicate resume(s) collapsed into this one: {others}")
+        with st.expander(f"📓 Preview Resume - {name}"):
+            show_resume_preview(file_bytes, file_name)
+        with st.expander(f"📒 Explanation - Why Ranked {idx}"):
+            st.markdown(explanation)
+
+    # Reports are only built on request and then served from the per-run cache
+    report_name = job['job_title'].replace(' ', '_')
+    col1, col2, col3 = st.columns(3)
+    for col, kind, mime in ((col1, "pdf", "application/pdf"), (col2, "csv", "text/csv")):
+        ready_key = f"report_{kind}_{run_id}"
+        if not st.session_state.get(ready_key):
+            if col.button(f"🛠️ Prepare {kind.upper()} Report", key=f"prepare_{ready_key}"):
+                st.session_state[ready_key] = True
+                st.rerun()
+        else:
+            report = get_cached_report(run_id, kind, job['job_title'], ranked_candidates)
+            col.download_button(f"📄 Download {kind.upper()} Report", report, file_name=f"{report_name}_Ranking_Report.{kind}", mime=mime, key=f"download_{ready_key}")
+
+    # Typed columns of exactly this run (same candidates, filters and model version)
+    if pa is not None:
+        analytics_key = f"report_parquet_{run_id}"
+        if not st.session_state.get(analytics_key):
+            if col1.button("📊 Export Analytics (Parquet)", key=f"prepare_{analytics_key}"):
+                st.session_state[analytics_key] = True
+                st.rerun()
+        else:
+            report = get_cached_report(
+                run_id, "parquet", job['job_title'], ranked_candidates,
+                builder=lambda _title, _candidates: export_ranking_run_to_file(ranking_run, job['id'])
+            )
+            col1.download_button("📄 Download Analytics Parquet", report, file_name=f"{report_name}_Ranking_Run.parquet", mime="application/octet-stream", key=f"download_{analytics_key}")
+
+    if not allow_full_export:
+        return
+    full_key = f"report_full_{run_id}"
+    if not st.session_state.get(full_key):
+        if col3.button("🗂️ Export Full Applicant Pool (CSV)", key=f"prepare_{full_key}"):
+            st.session_state[full_key] = True
+            st.rerun()
+    else:
+        report = get_cached_report(
+            run_id, "csv_full", job['job_title'],
+            lambda: rank_resumes(job_id=job['id'], filters=ranking_run["filters"], full_pool=True)
+        )
+        col3.download_button("📄 Download Full Pool CSV", report, file_name=f"{report_name}_Applicant_Pool.csv", mime="text/csv", key=f"download_{full_key}")
+
+
 # ------------------- Recruiter Panel -------------------
 def recruiter_panel():
     user = get_logged_in_user()
@@ -171,6 +265,19 @@ def recruiter_panel():
         st.info(f"No {toggle.lower()} jobs found.")
         return
 
+    if toggle == "Active" and st.button("⚡ Rank All Active Jobs", key="rank_all_jobs"):
+        with st.spinner(f"Ranking applicants for {len(jobs_to_show)} jobs in one pass..."):
+            filters_by_job = {job['id']: build_filters_from_job(job) for job in jobs_to_show}
+            shortlists = rank_jobs_batch(jobs_to_show, filters_by_job=filters_by_job)
+            for job_id, ranked_candidates in shortlists.items():
+                st.session_state[f"ranking_{job_id}"] = {
+                    "run_id": uuid.uuid4().hex,
+                    "filters": filters_by_job[job_id],
+                    "candidates": ranked_candidates,
+                    "model_version": model_version()
+                }
+        st.success("✅ All active jobs ranked.")
+
     for job in jobs_to_show:
         with st.container(border=True):
             st.markdown(f"### 📄 {job['job_title']} at {job['company_name']}")
@@ -180,7 +287,7 @@ def recruiter_panel():
             st.markdown(f"🎯 <b>Skills:</b> {job['skills']} | 💰 <b>Salary:</b> {job['salary']} | 📅 Deadline: {job['deadline']}", unsafe_allow_html=True)
 
             with st.expander("🔍 Rank Candidates", expanded=True):
-                job_skills_list = job['skills'].split(", ") if isinstance(job['skills'], str) else job['skills']
+                job_skills_list = job_list(job, "skills")
                 dynamic_skills = sorted(list(set(ALL_SKILLS + job_skills_list)))
 
                 required_skills = st.multiselect("Required Skills", dynamic_skills, default=job_skills_list, key=f"skills_{job['id']}")
@@ -188,6 +295,7 @@ def recruiter_panel():
                 project_domains = st.multiselect("Relevant Project Domains", dynamic_skills, key=f"proj_{job['id']}")
                 min_experience = st.number_input("Minimum Experience (Years)", min_value=0, max_value=20, value=0, step=1, key=f"exp_{job['id']}")
                 num_shortlist = st.number_input("Number of Candidates to Shortlist", min_value=1, max_value=100, value=5, step=1, key=f"shortlist_{job['id']}")
+                collapse_duplicates = st.checkbox("Collapse near-duplicate resumes", value=True, key=f"dedupe_{job['id']}")
 
                 if st.button(f"⚙️ Rank Resumes - {job['job_title']}", key=f"rank_btn_{job['id']}"):
                     with st.spinner("Processing resumes using Hybrid Model..."):
@@ -198,6 +306,7 @@ def recruiter_panel():
     "education": "btech",
     "min_experience": 1,
     "job_description": job.get("description", ""),    "num_shortlist": num_shortlist,
+    "collapse_duplicates": collapse_duplicates,
     "weight_rule": 0.6,     # Optional
     "weight_bert": 0.4      # Optional
 }
@@ -205,37 +314,44 @@ def recruiter_panel():
 
 
                         ranked_candidates = rank_resumes(job_id=job['id'], filters=filters)
-
+                        previous_run = st.session_state.get(f"ranking_{job['id']}")
+                        if previous_run:
+                            invalidate_cached_reports(previous_run["run_id"])
+                        st.session_state[f"ranking_{job['id']}"] = {
+                            "run_id": uuid.uuid4().hex,
+                            "filters": filters,
+                            "candidates": ranked_candidates,
+                            "model_version": model_version()
+                        }
                         if ranked_candidates:
                             st.success("✅ Resumes ranked using Hybrid model successfully!")
-                            for idx, candidate in enumerate(ranked_candidates, 1):
-                                skills = ', '.join(candidate.get('parsed_data', {}).get('skills', []))
-                                file_name = candidate.get("file_name", f"resume_{candidate.get('id', idx)}.pdf")
-                                file_data = candidate.get("file_data")
-                                file_bytes = bytes(file_data)
-                                email = candidate.get('email', '')
-                                phone = candidate.get('phone', '')
-                                name = candidate.get('name', '')
-                                match_score = f"{candidate.get('match_score', 0)}%"
-                                explanation = candidate.get("explanation", "No explanation available.")
-
-                                st.markdown(f"**Rank {idx}: {name}**")
-                                col1, col2, col3, col4 = st.columns([3, 3, 2, 2])
-                                col1.markdown(f"**Email:** {email}")
-                                col2.markdown(f"**Phone:** {phone}")
-                                col3.markdown(f"**Score:** {match_score}")
-                                col4.download_button("📅 Download", data=file_bytes, file_name=file_name, mime="application/pdf", key=f"download_{candidate['id']}")
-                                st.markdown(f"**Skills:** {skills}")
-                                with st.expander(f"📓 Preview Resume - {name}"):
-                                    show_resume_preview(file_bytes, file_name)
-                                with st.expander(f"📒 Explanation - Why Ranked {idx}"):
-                                    st.markdown(explanation)
-
-                            col1, col2 = st.columns(2)
-                            col1.download_button("📄 Download PDF Report", generate_pdf_report_with_explanations(job['job_title'], ranked_candidates), file_name=f"{job['job_title'].replace(' ', '_')}_Ranking_Report.pdf", mime="application/pdf")
-                            col2.download_button("📄 Download CSV Report", generate_csv_report_with_explanations(job['job_title'], ranked_candidates), file_name=f"{job['job_title'].replace(' ', '_')}_Ranking_Report.csv", mime="text/csv")
-                        else:
-                            st.warning("❗ No applications or matching resumes found.")
+
+                if st.button("🌐 Discover Top Matches Across All Resumes", key=f"discover_btn_{job['id']}"):
+                    with st.spinner("Searching the full resume pool..."):
+                        discovery_filters = {
+                            "required_skills": required_skills,
+                            "certifications": required_certifications,
+                            "project_domains": project_domains,
+                            "min_experience": min_experience,
+                            "job_description": job.get("description", ""),
+                            "num_shortlist": num_shortlist
+                        }
+                        discovered = discover_candidates(filters=discovery_filters)
+                        st.session_state[f"discovery_{job['id']}"] = {
+                            "run_id": uuid.uuid4().hex,
+                            "filters": discovery_filters,
+                            "candidates": discovered,
+                            "model_version": model_version()
+                        }
+
+                ranking_run = st.session_state.get(f"ranking_{job['id']}")
+                if ranking_run:
+                    show_ranking_results(job, ranking_run)
+
+                discovery_run = st.session_state.get(f"discovery_{job['id']}")
+                if discovery_run:
+                    st.markdown("#### 🌐 Best Matches Across All Resumes")
+                    show_ranking_results(job, discovery_run, allow_full_export=False)
 
 
             with st.expander("✏️ Edit Job"):
@@ -248,9 +364,9 @@ def recruiter_panel():
                     experience = st.selectbox("Experience Required", ["Fresher", "0-1 Years", "1-3 Years", "3+ Years"], index=["Fresher", "0-1 Years", "1-3 Years", "3+ Years"].index(job['experience_required']), key=f"edit_exp_{job['id']}")
                     education = st.selectbox("Education", EDUCATION_LEVELS, index=EDUCATION_LEVELS.index(job['education']), key=f"edit_edu_{job['id']}")
                 with col2:
-                    skills = st.multiselect("Skills", ALL_SKILLS, default=job['skills'].split(', '), key=f"edit_skills_{job['id']}")
-                    certs = st.multiselect("Certifications", CERTIFICATE_SUGGESTIONS, default=job['certifications'].split(', ') if job['certifications'] else [], key=f"edit_certs_{job['id']}")
-                    perks = st.multiselect("Perks", PERKS_OPTIONS, default=job['perks'].split(', ') if job['perks'] else [], key=f"edit_perks_{job['id']}")
+                    skills = st.multiselect("Skills", ALL_SKILLS, default=job_list(job, "skills"), key=f"edit_skills_{job['id']}")
+                    certs = st.multiselect("Certifications", CERTIFICATE_SUGGESTIONS, default=job_list(job, "certifications"), key=f"edit_certs_{job['id']}")
+                    perks = st.multiselect("Perks", PERKS_OPTIONS, default=job_list(job, "perks"), key=f"edit_perks_{job['id']}")
                     desc = st.text_area("About Company", value=job['description'], key=f"edit_desc_{job['id']}")
                     num = st.number_input("Number of Positions", min_value=1, value=job['num_positions'], key=f"edit_num_{job['id']}")
                     deadline = st.date_input("Deadline", value=job['deadline'], key=f"edit_deadline_{job['id']}")
@@ -0,0 +1,129 @@
+"""
+Background re-parse of resumes whose parsed_data predates the current PARSER_VERSION.
+
+    python reparse_backfill.py --workers 2 --batch-size 50 --max-rate 20 --timeout 60
+
+Rows are visited in id order (keyset pagination), parsed from the stored PDF in
+the sandboxed parser pool (parse_workers.py: per-resume timeout and memory cap)
+and written back in one statement per batch. A row re-uploaded while its batch
+was parsing keeps the new upload, and re-parsed text is re-encoded into the
+discovery (ANN) index. The last finished id is saved to the state file, so a
+stopped run picks up where it left off. --max-rate caps resumes/sec and --pause
+adds idle time between batches so production queries keep priority.
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from database import fetch_outdated_resumes, count_outdated_resumes, update_parsed_data_batch, resume_file_data
+from parse_cache import PARSER_VERSION
+from parse_workers import SandboxedParserPool, PARSE_TIMEOUT
+from ml_ranking import reindex_candidates
+
+DEFAULT_STATE_FILE = "data/reparse_backfill.json"
+
+
+def load_state(path, parser_version):
+    # The saved position only applies to the parser version it was recorded for
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("parser_version") == parser_version:
+                return state
+        except ValueError:
+            pass
+    return {"parser_version": parser_version, "last_id": 0, "updated": 0, "failed": 0}
+
+def save_state(path, state):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def backfill(workers=2, batch_size=50, max_rate=20.0, pause=0.0, state_file=DEFAULT_STATE_FILE, limit=None,
+             timeout=PARSE_TIMEOUT):
+    state = load_state(state_file, PARSER_VERSION)
+    remaining = count_outdated_resumes(PARSER_VERSION)
+    logging.info("Re-parse backfill to v%s: %s outdated resumes, resuming after id %s",
+                 PARSER_VERSION, remaining, state["last_id"])
+    started = time.perf_counter()
+    processed = 0
+
+    # One thread per sandbox worker keeps every worker busy; parse() blocks on its worker
+    sandbox = SandboxedParserPool(size=workers, timeout=timeout)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while limit is None or processed < limit:
+                batch_started = time.perf_counter()
+                rows = fetch_outdated_resumes(PARSER_VERSION, state["last_id"], batch_size)
+                if not rows:
+                    break
+
+                # Blob-store files arrive memory-mapped; workers need picklable bytes
+                jobs = []
+                for row in rows:
+                    pdf_bytes = resume_file_data(row)
+                    if pdf_bytes is not None:
+                        jobs.append((row, bytes(pdf_bytes)))
+                results = pool.map(sandbox.parse, [pdf_bytes for _, pdf_bytes in jobs])
+                updates, candidate_ids = [], []
+                for (row, _), parsed in zip(jobs, results):
+                    # A failed re-parse keeps the data already stored
+                    if parsed.get("parse_status") == "failed":
+                        state["failed"] += 1
+                        logging.error("Re-parse failed for resume id=%s: %s", row["id"], parsed.get("parse_error"))
+                    else:
+                        updates.append((row["id"], row.get("file_sha256"), parsed))
+                        candidate_ids.append(row["candidate_id"])
+                updated = update_parsed_data_batch(updates)
+                state["updated"] += updated
+                if updated:
+                    # Re-encodes the stored text, so a row re-uploaded meanwhile keeps its upload's vector
+                    try:
+                        reindex_candidates(candidate_ids)
+                    except Exception as e:
+                        logging.error("Failed to index re-parsed resumes: %s", e)
+                state["last_id"] = rows[-1]["id"]
+                save_state(state_file, state)
+                processed += len(rows)
+
+                elapsed = time.perf_counter() - started
+                logging.info("Re-parsed %s/%s (last id %s, %.1f resumes/sec)",
+                             processed, remaining, state["last_id"], processed / elapsed if elapsed else 0.0)
+
+                # Throttle: never exceed max_rate on average, plus an optional fixed pause
+                if max_rate:
+                    min_duration = len(rows) / max_rate
+                    spent = time.perf_counter() - batch_started
+                    if spent < min_duration:
+                        time.sleep(min_duration - spent)
+                if pause:
+                    time.sleep(pause)
+    finally:
+        sandbox.close()
+
+    logging.info("Re-parse backfill finished: %s updated, %s failed", state["updated"], state["failed"])
+    return state
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse resumes stored with an older parser version")
+    parser.add_argument("--workers", type=int, default=2, help="Parser processes")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--max-rate", type=float, default=20.0, help="Max resumes/sec (0 = unlimited)")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to idle between batches")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many rows")
+    parser.add_argument("--timeout", type=float, default=PARSE_TIMEOUT, help="Seconds per resume before its worker is killed")
+    args = parser.parse_args()
+    state = backfill(args.workers, args.batch_size, args.max_rate, args.pause, args.state_file, args.limit, args.timeout)
+    print(json.dumps(state))
+
+if __name__ == "__main__":
+    main()
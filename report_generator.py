@@ -1,8 +1,18 @@
 from fpdf import FPDF
 import io
+import os
 import csv
 from io import BytesIO
 import textwrap
+import tempfile
+from collections import OrderedDict
+from tracing import span, count
+
+# Reports kept per ranking run, so Streamlit reruns don't rebuild them
+REPORT_CACHE_SIZE = 32
+_REPORT_CACHE = OrderedDict()
+
+CSV_HEADERS = ["Rank", "Name", "Email", "Phone", "Match Score", "Skills", "Resume File", "Explanation"]
 
 class PDF(FPDF):
     def header(self):
@@ -10,7 +20,7 @@ class PDF(FPDF):
         self.cell(0, 10, "Resume Ranking Report", ln=True, align="C")
         self.ln(5)
 
-def generate_pdf_report_with_explanations(job_title, candidates):
+def _build_pdf_report(job_title, candidates):
     pdf = PDF(orientation="L", unit="mm", format="A4")
     pdf.set_auto_page_break(auto=True, margin=10)
     pdf.set_title(f"Resume Ranking Report for {job_title}")  # 💡 Metadata
@@ -33,6 +43,7 @@ def generate_pdf_report_with_explanations(job_title, candidates):
     draw_table_header()
     pdf.set_font("Helvetica", "", 9)
 
+    # Rows are drawn as they are consumed, so candidates may be a generator
     for idx, candidate in enumerate(candidates, 1):
         if (idx - 1) % 10 == 0 and idx != 1:
             pdf.add_page()
@@ -73,32 +84,111 @@ def generate_pdf_report_with_explanations(job_title, candidates):
 
         pdf.ln()
 
+    return pdf
+
+def generate_pdf_report_with_explanations(job_title, candidates):
+    pdf = _build_pdf_report(job_title, candidates)
     # 💡 Return stream (for download button in Streamlit)
     return BytesIO(pdf.output(dest='S'))
 
-def generate_csv_report_with_explanations(job_title, candidates):
-    output = io.StringIO()
-    writer = csv.writer(output)
+def export_pdf_report_to_file(path, job_title, candidates):
+    # Writes straight to disk instead of holding a second copy of the document
+    _build_pdf_report(job_title, candidates).output(path)
+    return path
+
+class _RowBuffer:
+    # csv.writer writes one complete line per row; keep only the latest one
+    def write(self, line):
+        self.line = line
+
+def _csv_row(idx, candidate):
+    explanation = candidate.get('explanation', '').replace("\n", " | ").replace("\r", " ").strip()
+
+    # Truncate long explanations
+    max_len = 300
+    if len(explanation) > max_len:
+        explanation = explanation[:max_len] + "..."
+
+    return [
+        idx,
+        candidate.get('name', 'N/A'),
+        candidate.get('email', 'N/A'),
+        candidate.get('phone', 'N/A'),
+        f"{candidate.get('match_score', 0)}%",
+        ', '.join(candidate.get('parsed_data', {}).get('skills', [])),
+        candidate.get('file_name', 'N/A'),
+        explanation
+    ]
+
+def iter_csv_report_with_explanations(job_title, candidates):
+    # Yields the report one CSV line at a time; candidates may be any iterable
+    buffer = _RowBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADERS)
+    yield buffer.line
+    for idx, candidate in enumerate(candidates, 1):
+        writer.writerow(_csv_row(idx, candidate))
+        yield buffer.line
 
-    writer.writerow(["Rank", "Name", "Email", "Phone", "Match Score", "Skills", "Resume File", "Explanation"])
+def write_csv_report_with_explanations(fileobj, job_title, candidates):
+    for line in iter_csv_report_with_explanations(job_title, candidates):
+        fileobj.write(line)
 
-    for idx, candidate in enumerate(candidates, 1):
-        explanation = candidate.get('explanation', '').replace("\n", " | ").replace("\r", " ").strip()
-
-        # Truncate long explanations
-        max_len = 300
-        if len(explanation) > max_len:
-            explanation = explanation[:max_len] + "..."
-
-        writer.writerow([
-            idx,
-            candidate.get('name', 'N/A'),
-            candidate.get('email', 'N/A'),
-            candidate.get('phone', 'N/A'),
-            f"{candidate.get('match_score', 0)}%",
-            ', '.join(candidate.get('parsed_data', {}).get('skills', [])),
-            candidate.get('file_name', 'N/A'),
-            explanation
-        ])
-
-    return output.getvalue()
+def generate_csv_report_with_explanations(job_title, candidates):
+    return "".join(iter_csv_report_with_explanations(job_title, candidates))
+
+def export_csv_report_to_file(job_title, candidates):
+    # Streams the report into a temporary file and returns its path, so large pool
+    # exports don't sit in worker memory; the caller deletes the file
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", suffix=".csv", delete=False) as export:
+        try:
+            write_csv_report_with_explanations(export, job_title, candidates)
+        except Exception:
+            export.close()
+            os.remove(export.name)
+            raise
+    return export.name
+
+# ------------------- Cached Reports -------------------
+REPORT_BUILDERS = {
+    "pdf": lambda job_title, candidates: generate_pdf_report_with_explanations(job_title, candidates).getvalue(),
+    "csv": generate_csv_report_with_explanations,
+    "csv_full": export_csv_report_to_file,
+}
+# Kinds whose builder returns the path of a file on disk; only the path sits in the
+# cache and every lookup opens it again (a BufferedReader, which st.download_button accepts)
+FILE_REPORT_KINDS = {"csv_full", "parquet"}
+
+def _discard(key, report):
+    if key[1] in FILE_REPORT_KINDS:
+        try:
+            os.remove(report)
+        except OSError:
+            pass
+
+
+def get_cached_report(run_id, kind, job_title, candidates, builder=None):
+    # candidates may be a zero-argument callable so nothing is built on a cache hit;
+    # builder(job_title, candidates) overrides REPORT_BUILDERS[kind]
+    key = (run_id, kind)
+    if key in _REPORT_CACHE and (kind not in FILE_REPORT_KINDS or os.path.exists(_REPORT_CACHE[key])):
+        _REPORT_CACHE.move_to_end(key)
+        count("report_cache_total", kind=kind, result="hit")
+        return _open_report(kind, _REPORT_CACHE[key])
+    count("report_cache_total", kind=kind, result="miss")
+
+    if callable(candidates):
+        candidates = candidates()
+    with span(f"report.{kind}", candidates=len(candidates)):
+        report = (builder or REPORT_BUILDERS[kind])(job_title, candidates)
+    _REPORT_CACHE[key] = report
+    while len(_REPORT_CACHE) > REPORT_CACHE_SIZE:
+        _discard(*_REPORT_CACHE.popitem(last=False))
+    return _open_report(kind, report)
+
+def _open_report(kind, report):
+    return open(report, "rb") if kind in FILE_REPORT_KINDS else report
+
+def invalidate_cached_reports(run_id):
+    for key in [k for k in _REPORT_CACHE if k[0] == run_id]:
+        _discard(key, _REPORT_CACHE.pop(key))
@@ -0,0 +1,252 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from embedding_store import normalize_rows
+
+# all-mpnet-base-v2 stops reading at 384 word pieces (~250 words), so a long
+# resume is split into section-aligned chunks that are embedded separately and
+# pooled against the job vector. Chunk vectors are cached by content hash: an
+# edited resume only re-encodes the chunks that actually changed.
+RESUME_CHUNKING = os.getenv("RESUME_CHUNKING", "1") == "1"
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", "200"))
+MAX_CHUNKS_PER_RESUME = int(os.getenv("MAX_CHUNKS_PER_RESUME", "8"))
+# max | mean | topk (mean of the best CHUNK_TOP_K chunks)
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "max")
+CHUNK_TOP_K = int(os.getenv("CHUNK_TOP_K", "2"))
+CHUNK_CACHE_DIR = os.getenv("CHUNK_CACHE_DIR", "data/chunk_cache")
+CHUNK_CACHE_MEMORY_ENTRIES = int(os.getenv("CHUNK_CACHE_MEMORY_ENTRIES", "20000"))
+# Disk tier caps (~1.6KB per 768-d entry): least recently used entries go first,
+# and entries unused for CHUNK_CACHE_MAX_AGE_DAYS are dropped (0 = no age limit)
+CHUNK_CACHE_MAX_ENTRIES = int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "100000"))
+CHUNK_CACHE_MAX_AGE_DAYS = float(os.getenv("CHUNK_CACHE_MAX_AGE_DAYS", "30"))
+# Evict this fraction of entries at once when the disk cache overflows
+EVICT_FRACTION = 0.1
+
+SECTION_HEADINGS = [
+    "summary", "profile", "objective", "career objective", "about me",
+    "experience", "work experience", "professional experience", "employment history", "internships?",
+    "education", "academic details", "qualifications",
+    "projects", "academic projects", "personal projects",
+    "skills", "technical skills", "key skills", "core competencies",
+    "certifications?", "courses", "achievements", "awards", "publications",
+    "extra[- ]curricular activities", "activities", "interests", "hobbies", "languages", "references"
+]
+_SECTION_RE = re.compile(rf"^\s*(?:{'|'.join(SECTION_HEADINGS)})\s*:?\s*$", re.IGNORECASE)
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_disk_count = None
+
+
+# ===================== Chunking =====================
+def split_sections(text):
+    # Lists of non-empty lines, a new list at every recognised section heading
+    sections, current = [], []
+    for line in (text or "").splitlines():
+        if _SECTION_RE.match(line) and current:
+            sections.append(current)
+            current = []
+        if line.strip():
+            current.append(line.strip())
+    if current:
+        sections.append(current)
+    return sections
+
+def chunk_resume_text(text, max_words=CHUNK_WORDS, max_chunks=MAX_CHUNKS_PER_RESUME):
+    # Whole sections are packed together while they fit; longer sections break at
+    # line boundaries, and only a single over-long line is split mid-line
+    if not RESUME_CHUNKING:
+        return [text]
+    chunks, current, size = [], [], 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append("\n".join(current))
+        current, size = [], 0
+
+    for lines in split_sections(text):
+        section_words = sum(len(line.split()) for line in lines)
+        if size and size + section_words > max_words:
+            flush()
+        for line in lines:
+            words = line.split()
+            if size and size + len(words) > max_words:
+                flush()
+            while len(words) > max_words:
+                chunks.append(" ".join(words[:max_words]))
+                words = words[max_words:]
+            if words:
+                current.append(" ".join(words))
+                size += len(words)
+    flush()
+    return chunks[:max_chunks] or [text]
+
+
+# ===================== Chunk Vector Cache =====================
+def chunk_key(chunk, model_name):
+    return hashlib.sha256(f"{model_name}\0{chunk}".encode("utf-8")).hexdigest()
+
+def _path_for(key):
+    return os.path.join(CHUNK_CACHE_DIR, key[:2], key + ".npy")
+
+def _remember(key, vector):
+    with _lock:
+        _memory[key] = vector
+        _memory.move_to_end(key)
+        while len(_memory) > CHUNK_CACHE_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+def _expired(mtime, now):
+    return CHUNK_CACHE_MAX_AGE_DAYS > 0 and now - mtime > CHUNK_CACHE_MAX_AGE_DAYS * 86400
+
+def _disk_entries():
+    entries = []
+    for root, _, files in os.walk(CHUNK_CACHE_DIR):
+        for file_name in files:
+            if file_name.endswith(".npy"):
+                path = os.path.join(root, file_name)
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    continue
+    return entries
+
+def _evict_disk_entries():
+    # Drops expired entries, then the least recently used (hits bump the mtime)
+    # until the cache is EVICT_FRACTION below its cap
+    global _disk_count
+    now = time.time()
+    entries = sorted(_disk_entries())
+    keep_from = 0
+    while keep_from < len(entries) and _expired(entries[keep_from][0], now):
+        keep_from += 1
+    excess = len(entries) - keep_from - CHUNK_CACHE_MAX_ENTRIES
+    if excess > 0:
+        keep_from += max(excess, int(CHUNK_CACHE_MAX_ENTRIES * EVICT_FRACTION))
+    for _, path in entries[:keep_from]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    _disk_count = max(len(entries) - keep_from, 0)
+
+def _lookup(key):
+    with _lock:
+        vector = _memory.get(key)
+        if vector is not None:
+            _memory.move_to_end(key)
+            return vector
+    if not CHUNK_CACHE_DIR:
+        return None
+    path = _path_for(key)
+    try:
+        if _expired(os.stat(path).st_mtime, time.time()):
+            return None
+        vector = np.load(path)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    _remember(key, vector)
+    return vector
+
+def _store(key, vector):
+    # Kept as float16 on disk; vectors are normalised, so the loss is negligible
+    global _disk_count
+    vector = vector.astype(np.float16)
+    _remember(key, vector)
+    if not CHUNK_CACHE_DIR:
+        return
+    path = _path_for(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, vector)
+        existed = os.path.exists(path)
+        os.replace(tmp_path, path)
+        with _lock:
+            if _disk_count is None:
+                # First write in this process: sweep once, which also counts the entries
+                _evict_disk_entries()
+            elif not existed:
+                _disk_count += 1
+            if _disk_count > CHUNK_CACHE_MAX_ENTRIES:
+                _evict_disk_entries()
+    except OSError as e:
+        logging.warning("Could not write chunk cache entry %s: %s", key, e)
+
+def clear_chunk_cache():
+    global _disk_count
+    with _lock:
+        _memory.clear()
+    if CHUNK_CACHE_DIR and os.path.isdir(CHUNK_CACHE_DIR):
+        for root, _, files in os.walk(CHUNK_CACHE_DIR):
+            for file_name in files:
+                if file_name.endswith(".npy"):
+                    os.remove(os.path.join(root, file_name))
+    _disk_count = 0
+
+
+# ===================== Embedding & Pooling =====================
+def embed_resume_chunks(texts, encode, model_name, batch_size=256):
+    # Returns (chunk_vectors, offsets): resume i owns rows offsets[i]:offsets[i + 1].
+    # Only chunks missing from the cache are sent to encode(), each distinct one once.
+    keys, offsets = [], [0]
+    found, missing = {}, {}
+    for text in texts:
+        for chunk in chunk_resume_text(text):
+            key = chunk_key(chunk, model_name)
+            keys.append(key)
+            if key not in found and key not in missing:
+                vector = _lookup(key)
+                if vector is None:
+                    missing[key] = chunk
+                else:
+                    found[key] = vector
+        offsets.append(len(keys))
+
+    pending = list(missing.items())
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        vectors = normalize_rows(encode([chunk for _, chunk in batch]))
+        for (key, _), vector in zip(batch, vectors):
+            _store(key, vector)
+            found[key] = vector
+
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32), offsets
+    return np.vstack([found[key] for key in keys]).astype(np.float32), offsets
+
+def extend_offsets(offsets, group_offsets):
+    # Appends the offsets of one embed_resume_chunks() call (which start at 0) after
+    # the rows already covered by offsets; returns the group's first row
+    base = offsets[-1]
+    offsets.extend(base + o for o in group_offsets[1:])
+    return base
+
+def pool_chunk_scores(scores, offsets, strategy=CHUNK_POOLING, top_k=CHUNK_TOP_K):
+    # scores: one row per chunk (1-D, or chunks x jobs); returns one row per resume
+    scores = np.asarray(scores, dtype=np.float32)
+    starts = np.asarray(offsets[:-1])
+    if not len(starts):
+        return scores[:0]
+    if strategy == "max":
+        return np.maximum.reduceat(scores, starts, axis=0)
+    if strategy == "mean":
+        counts = np.diff(offsets).reshape((-1,) + (1,) * (scores.ndim - 1))
+        return (np.add.reduceat(scores, starts, axis=0) / counts).astype(np.float32)
+    if strategy == "topk":
+        pooled = np.empty((len(starts),) + scores.shape[1:], dtype=np.float32)
+        for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+            block = np.sort(scores[start:end], axis=0)
+            pooled[i] = block[-min(top_k, end - start):].mean(axis=0)
+        return pooled
+    raise ValueError(f"Unknown chunk pooling strategy: {strategy}")
@@ -4,17 +4,30 @@ import fitz  # PyMuPDF
 import logging
 import os
 import json
-import psycopg2
-from psycopg2.extras import RealDictCursor
+try:
+    import psycopg2
+except ImportError:  # SQLite-only deployments (DB_BACKEND=sqlite)
+    psycopg2 = None
 from textblob import TextBlob
 from difflib import get_close_matches
 from dotenv import load_dotenv
 import datetime as dt
+import time
+import queue
+import threading
+from parse_cache import pdf_sha256, get_cached_parse, store_cached_parse, PARSER_VERSION
+from near_duplicates import minhash_signature
+from tracing import span, count
+from db_instrumentation import cursor_factory, record_connect, DB_INSTRUMENTATION
+from db_backends import using_sqlite, sqlite_connection
 
 # Load spaCy model and environment variables
 nlp = spacy.load("en_core_web_sm")
 load_dotenv()
 
+# Run parsing in isolated worker processes (see parse_workers.py)
+PARSE_SANDBOX = os.getenv("PARSE_SANDBOX", "0") == "1"
+
 # Constants
 TECH_DOMAINS = [
     "machine learning", "artificial intelligence", "ai", "ml", "deep learning",
@@ -49,12 +62,19 @@ SOFT_SKILLS = [
 # ===================== DB Save Function =====================
 def update_parsed_resume_data(candidate_id, parsed_json):
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST"),
-            database=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD")
-        )
+        if using_sqlite():
+            conn = sqlite_connection()
+        else:
+            started = time.perf_counter()
+            conn = psycopg2.connect(
+                host=os.getenv("DB_HOST"),
+                database=os.getenv("DB_NAME"),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+                cursor_factory=cursor_factory()
+            )
+            if DB_INSTRUMENTATION:
+                record_connect(time.perf_counter() - started)
         cur = conn.cursor()
         cur.execute("""
             UPDATE resumes
@@ -68,25 +88,222 @@ def update_parsed_resume_data(candidate_id, parsed_json):
         logging.error(f"[❌ update_parsed_resume_data] DB error for candidate_id={candidate_id}: {e}")
 
 # ===================== PDF Text Extraction =====================
-def extract_text_from_pdf_bytes(pdf_bytes):
-    text = ""
+# Limits protect workers from huge or pathological uploads; truncation is recorded
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+PDF_TIME_LIMIT = float(os.getenv("PDF_TIME_LIMIT", "20"))
+# Documents with at least this many pages are split across PDF_PARALLEL_WORKERS processes (0 = off)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "20"))
+PDF_PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", "0"))
+
+_page_pool = None
+
+def iter_pdf_pages(pdf_bytes, start=0, stop=None):
+    # Yields page text one page at a time so callers can stop early
+    with fitz.open("pdf", pdf_bytes) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for page_no in range(start, stop):
+            yield doc.load_page(page_no).get_text()
+
+def _iter_pages_until(pdf_bytes, page_limit, deadline, info):
+    # Pages are read on a helper thread so one slow page can't hold the caller past
+    # the deadline. PyMuPDF can't be interrupted mid-page: the helper finishes that
+    # page and then stops (in the sandbox the whole worker is killed at PARSE_TIMEOUT).
+    pages = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def read():
+        try:
+            for page_text in iter_pdf_pages(pdf_bytes, 0, page_limit):
+                if stop.is_set():
+                    return
+                pages.put(page_text)
+        except Exception as e:
+            pages.put(e)
+        finally:
+            pages.put(done)
+
+    threading.Thread(target=read, name="pdf-pages", daemon=True).start()
+    try:
+        while True:
+            try:
+                item = pages.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                info["truncated"].append("time")
+                return
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+def _extract_page_range(pdf_bytes, start, stop):
+    return list(iter_pdf_pages(pdf_bytes, start, stop))
+
+def _get_page_pool():
+    global _page_pool
+    if _page_pool is None:
+        import atexit
+        from concurrent.futures import ProcessPoolExecutor
+        _page_pool = ProcessPoolExecutor(max_workers=PDF_PARALLEL_WORKERS)
+        atexit.register(_page_pool.shutdown, wait=False, cancel_futures=True)
+    return _page_pool
+
+def _extract_pages_parallel(pdf_bytes, page_count, deadline):
+    from concurrent.futures import TimeoutError as FutureTimeout
+    chunk = -(-page_count // PDF_PARALLEL_WORKERS)
+    futures = [
+        _get_page_pool().submit(_extract_page_range, pdf_bytes, start, min(start + chunk, page_count))
+        for start in range(0, page_count, chunk)
+    ]
+    pages = []
+    for future in futures:
+        try:
+            pages.extend(future.result(timeout=max(deadline - time.monotonic(), 0)))
+        except FutureTimeout:
+            for pending in futures:
+                pending.cancel()
+            return pages, True
+    return pages, False
+
+def extract_pdf_text(pdf_bytes, max_pages=None, max_chars=None, time_limit=None):
+    max_pages = max_pages or PDF_MAX_PAGES
+    max_chars = max_chars or PDF_MAX_CHARS
+    time_limit = time_limit or PDF_TIME_LIMIT
+    started = time.monotonic()
+    deadline = started + time_limit
+    # truncated lists every limit that cut the text short: pages, chars and/or time
+    info = {"pages_total": 0, "pages_read": 0, "chars": 0, "truncated": []}
+    parts = []
+    chars = 0
     try:
         with fitz.open("pdf", pdf_bytes) as doc:
-            for page in doc:
-                text += page.get_text()
+            info["pages_total"] = doc.page_count
+        page_limit = min(info["pages_total"], max_pages)
+        if page_limit < info["pages_total"]:
+            info["truncated"].append("pages")
+
+        pages = None
+        if PDF_PARALLEL_WORKERS > 1 and page_limit >= PDF_PARALLEL_MIN_PAGES:
+            try:
+                pages, timed_out = _extract_pages_parallel(pdf_bytes, page_limit, deadline)
+                if timed_out:
+                    info["truncated"].append("time")
+            except Exception as e:
+                logging.warning("Parallel PDF extraction unavailable (%s); reading pages sequentially", e)
+        if pages is None:
+            pages = _iter_pages_until(pdf_bytes, page_limit, deadline, info)
+
+        for page_text in pages:
+            if chars + len(page_text) > max_chars:
+                parts.append(page_text[:max_chars - chars])
+                chars = max_chars
+                info["pages_read"] += 1
+                info["truncated"].append("chars")
+                break
+            parts.append(page_text)
+            chars += len(page_text)
+            info["pages_read"] += 1
+            if time.monotonic() > deadline:
+                if "time" not in info["truncated"]:
+                    info["truncated"].append("time")
+                break
     except Exception as e:
         logging.error(f"Error reading PDF: {e}")
-    return text
+    info["chars"] = chars
+    info["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    if info["truncated"]:
+        logging.warning("PDF text truncated (%s) after %s/%s pages", ", ".join(info["truncated"]), info["pages_read"], info["pages_total"])
+    return "".join(parts), info
+
+def extract_text_from_pdf_bytes(pdf_bytes):
+    return extract_pdf_text(pdf_bytes)[0]
+
+# ===================== Keyword Scanner =====================
+# Every keyword list is compiled once into an index keyed by the keyword's first
+# word; scan_keywords() lowercases the text once and tags all categories in a
+# single pass over its words.
+KEYWORD_CATEGORIES = {
+    "skills": SKILL_SET,
+    "education": EDUCATION_KEYWORDS,
+    "project_domains": TECH_DOMAINS,
+    "soft_skills": SOFT_SKILLS,
+}
+_WORD_RE = re.compile(r"\w+")
+
+def _build_keyword_index():
+    index = {}
+    for category, keywords in KEYWORD_CATEGORIES.items():
+        for keyword in keywords:
+            keyword = keyword.lower()
+            first = _WORD_RE.match(keyword)
+            if not first:
+                continue
+            entries = index.setdefault(first.group(), {})
+            entries.setdefault(keyword, set()).add(category)
+    # Longest keywords first at each start word
+    return {
+        word: sorted(((kw, frozenset(cats)) for kw, cats in entries.items()), key=lambda e: -len(e[0]))
+        for word, entries in index.items()
+    }
+
+_KEYWORD_INDEX = _build_keyword_index()
+
+def scan_keywords(text):
+    # Returns ({category: set(keywords)}, set(words)) for the whole text
+    lowered = text.lower()
+    hits = {category: set() for category in KEYWORD_CATEGORIES}
+    words = set()
+    length = len(lowered)
+    for match in _WORD_RE.finditer(lowered):
+        word = match.group()
+        words.add(word)
+        candidates = _KEYWORD_INDEX.get(word)
+        if not candidates:
+            continue
+        start = match.start()
+        for keyword, categories in candidates:
+            if not lowered.startswith(keyword, start):
+                continue
+            end = start + len(keyword)
+            # Whole-word match unless the keyword itself ends in punctuation (c++, c#)
+            if keyword[-1].isalnum() or keyword[-1] == "_":
+                if end < length and (lowered[end].isalnum() or lowered[end] == "_"):
+                    continue
+            for category in categories:
+                hits[category].add(keyword)
+    return hits, words
+
+# Fuzzy skill matching only needs words whose length can reach the 0.8 cutoff
+def _fuzzy_skill_matches(skills, words):
+    by_length = {}
+    for word in words:
+        by_length.setdefault(len(word), []).append(word)
+    found = set()
+    for skill in skills:
+        size = len(skill)
+        pool = [w for n in range(-(-2 * size // 3), (3 * size) // 2 + 1) for w in by_length.get(n, ())]
+        if pool and get_close_matches(skill, pool, n=1, cutoff=0.8):
+            found.add(skill)
+    return found
+
+def keyword_fields(text, scan=None):
+    hits, words = scan or scan_keywords(text)
+    exact_skills = hits["skills"]
+    fuzzy_skills = _fuzzy_skill_matches([s for s in SKILL_SET if s not in exact_skills], words)
+    return {
+        "skills": list({s.title() for s in exact_skills | fuzzy_skills}),
+        "education": list({k.title() for k in hits["education"]}),
+        "project_domains": list({d.title() for d in hits["project_domains"]}),
+        "soft_skills": list({s.title() for s in hits["soft_skills"]}),
+    }
 
 # ===================== Resume Field Extractors =====================
 def extract_skills(text):
-    found_skills = set()
-    words = re.findall(r'\w+', text.lower())
-    for skill in SKILL_SET:
-        matches = get_close_matches(skill, words, n=1, cutoff=0.8)
-        if matches:
-            found_skills.add(skill.title())
-    return list(found_skills)
+    return keyword_fields(text)["skills"]
 
 def extract_experience(text):
     matches = re.findall(r"(\d+)\s*(\+)?\s*(years|yrs)[\s\w]*experience", text, re.IGNORECASE)
@@ -94,14 +311,14 @@ def extract_experience(text):
     return max(years) if years else 0
 
 def extract_education(text):
-    return list({k.title() for k in EDUCATION_KEYWORDS if re.search(rf"\b{k}\b", text, re.IGNORECASE)})
+    return list({k.title() for k in scan_keywords(text)[0]["education"]})
 
 def extract_certifications(text):
     certs = re.findall(r"(Certified in [A-Za-z0-9\s&]+|[A-Za-z0-9\s]+(?:Certification|Certified))", text, re.IGNORECASE)
     return list({c.strip() for c in certs})
 
 def extract_project_domains(text):
-    return list({d.title() for d in TECH_DOMAINS if re.search(rf"\b{re.escape(d)}\b", text, re.IGNORECASE)})
+    return list({d.title() for d in scan_keywords(text)[0]["project_domains"]})
 
 def extract_email(text):
     match = re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", text)
@@ -115,7 +332,7 @@ def extract_name(text):
     return ""
 
 def extract_soft_skills(text):
-    return list({s.title() for s in SOFT_SKILLS if s in text.lower()})
+    return list({s.title() for s in scan_keywords(text)[0]["soft_skills"]})
 
 def estimate_grammar_score(text):
     blob = TextBlob(text)
@@ -125,21 +342,64 @@ def estimate_grammar_score(text):
 
 # ===================== Main Parse Function =====================
 def parse_resume(uploaded_file):
-    text = extract_text_from_pdf_bytes(uploaded_file.read())
+    pdf_bytes = uploaded_file.read()
+    if PARSE_SANDBOX:
+        cached = get_cached_parse(pdf_sha256(pdf_bytes), PARSER_VERSION)
+        if cached is not None:
+            count("parse_cache_total", result="hit")
+            return cached
+        from parse_workers import parse_in_sandbox
+        with span("parse.sandbox", bytes=len(pdf_bytes)):
+            return parse_in_sandbox(pdf_bytes)
+    return parse_resume_bytes(pdf_bytes)
+
+def parse_resume_bytes(pdf_bytes, use_cache=True):
+    with span("parse", bytes=len(pdf_bytes)):
+        return _parse_resume_bytes(pdf_bytes, use_cache)
+
+def _parse_resume_bytes(pdf_bytes, use_cache=True):
+    file_sha256 = pdf_sha256(pdf_bytes)
+    if use_cache:
+        cached = get_cached_parse(file_sha256, PARSER_VERSION)
+        count("parse_cache_total", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
+    with span("parse.extract_pdf") as s:
+        text, extraction = extract_pdf_text(pdf_bytes)
+        s.set(pages=extraction.get("pages_read"), chars=len(text))
+    with span("parse.keywords"):
+        keywords = keyword_fields(text)
+    with span("parse.extract_name"):
+        name = extract_name(text)
+    with span("parse.fields"):
+        email = extract_email(text)
+        experience = extract_experience(text)
+        certifications = extract_certifications(text)
+    with span("parse.grammar"):
+        grammar_score = estimate_grammar_score(text)
+    with span("parse.minhash"):
+        minhash = minhash_signature(text)
 
     parsed = {
-        "name": extract_name(text),
-        "email": extract_email(text),
-        "skills": extract_skills(text),
-        "experience": extract_experience(text),
-        "education": extract_education(text),
-        "certifications": extract_certifications(text),
-        "project_domains": extract_project_domains(text),
-        "soft_skills": extract_soft_skills(text),
-        "grammar_score": estimate_grammar_score(text),
-        "text": text.lower()
+        "name": name,
+        "email": email,
+        "skills": keywords["skills"],
+        "experience": experience,
+        "education": keywords["education"],
+        "certifications": certifications,
+        "project_domains": keywords["project_domains"],
+        "soft_skills": keywords["soft_skills"],
+        "grammar_score": grammar_score,
+        "text": text.lower(),
+        "minhash": minhash,
+        "file_sha256": file_sha256,
+        "parser_version": PARSER_VERSION,
+        "extraction": extraction
     }
 
+    if use_cache and text:
+        store_cached_parse(file_sha256, PARSER_VERSION, parsed)
     return parsed
 
 # ===================== Save & Store Resume =====================
@@ -147,6 +407,10 @@ def save_resume(candidate_id, uploaded_file):
     try:
         uploaded_file.seek(0)  # rewind before reading
         parsed = parse_resume(uploaded_file)
+        # A failed parse keeps the previously stored data instead of overwriting it
+        if parsed.get("parse_status") == "failed":
+            logging.error(f"[❌ save_resume] Parse failed for candidate_id={candidate_id}: {parsed.get('parse_error')}")
+            return False
         update_parsed_resume_data(candidate_id, parsed)
         logging.info(f"✅ Resume parsed and stored for candidate_id={candidate_id}")
         return True
@@ -0,0 +1,198 @@
+"""
+Deterministic synthetic resumes and job postings for benchmarks and load tests.
+
+    python synthetic_corpus.py data/synthetic --count 1000 --seed 7
+
+Every record is derived from (seed, index) alone, so resume #i is identical on
+every run and any slice of a 100k corpus can be generated without the rest.
+Vocabulary comes from the parser's and ranker's own keyword lists.
+"""
+import os
+import random
+import argparse
+
+from fpdf import FPDF
+
+from resume_parser import SKILL_SET, TECH_DOMAINS, SOFT_SKILLS
+from ml_ranking import SKILL_ALIASES, EDUCATION_LEVELS
+
+try:
+    from recruiter_dashboard import CERTIFICATE_SUGGESTIONS
+except ImportError:  # dashboard dependencies (streamlit) not installed
+    CERTIFICATE_SUGGESTIONS = [
+        "AWS Certified Cloud Practitioner", "Google Data Analytics", "NPTEL Python",
+        "Coursera Machine Learning", "CompTIA Security+", "Microsoft Azure Fundamentals"
+    ]
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Arjun", "Diya", "Ishaan", "Kavya", "Meera", "Nikhil", "Priya", "Rahul",
+    "Rohan", "Sanya", "Tanvi", "Varun", "Zara", "Alex", "Maria", "Chen", "Fatima", "Lucas"
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Singh", "Das", "Kumar", "Mehta",
+    "Garcia", "Wang", "Khan", "Silva", "Mueller", "Okafor", "Rossi", "Tanaka", "Haddad", "Novak"
+]
+EDUCATION_PHRASES = {
+    "phd": "PhD in Computer Science", "mtech": "MTech in Data Science", "msc": "MSc in Statistics",
+    "ma": "MA in Economics", "mca": "MCA", "btech": "BTech in Computer Science and Engineering",
+    "be": "BE in Information Technology", "bsc": "BSc in Mathematics", "ba": "BA in English",
+    "bca": "BCA", "bachelor of technology": "Bachelor of Technology in Electronics",
+    "bachelor": "Bachelor of Engineering", "diploma": "Diploma in Computer Engineering",
+    "high school": "High School, Science Stream"
+}
+JOB_TITLES = [
+    "Data Analyst", "Backend Developer", "Machine Learning Engineer", "Frontend Developer",
+    "DevOps Engineer", "Full Stack Developer", "Data Scientist", "QA Automation Engineer"
+]
+COMPANIES = ["Acme Analytics", "Nimbus Labs", "Orbit Systems", "Quill Software", "Vertex AI"]
+ACTIONS = [
+    "Built", "Designed", "Maintained", "Optimised", "Migrated", "Automated", "Led", "Tested"
+]
+OBJECTS = [
+    "a reporting pipeline", "REST APIs", "a recommendation service", "internal dashboards",
+    "ETL jobs", "a customer churn model", "CI/CD workflows", "a mobile checkout flow"
+]
+
+
+def _rng(seed, index, salt=0):
+    return random.Random(seed * 1_000_003 + index * 7 + salt)
+
+def _latin1(text):
+    # FPDF core fonts only cover latin-1
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+# ===================== Resumes =====================
+def resume_fields(index, seed=0, filler_sentences=(4, 30)):
+    rng = _rng(seed, index)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILL_SET, rng.randint(4, min(12, len(SKILL_SET))))
+    # Some skills are written the way candidates actually write them
+    written_skills = [
+        rng.choice(SKILL_ALIASES[s]) if s in SKILL_ALIASES and rng.random() < 0.3 else s
+        for s in skills
+    ]
+    education = rng.choice(list(EDUCATION_LEVELS))
+    return {
+        "index": index,
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{index}@example.com",
+        "phone": f"+91 9{rng.randint(100000000, 999999999)}",
+        "skills": skills,
+        "written_skills": written_skills,
+        "education": education,
+        "experience": rng.choice([0, 0, 1, 1, 2, 3, 4, 5, 6, 8, 10, 12]),
+        "certifications": rng.sample(CERTIFICATE_SUGGESTIONS, rng.randint(0, 3)),
+        "project_domains": rng.sample(TECH_DOMAINS, rng.randint(1, 3)),
+        "soft_skills": rng.sample(SOFT_SKILLS, rng.randint(2, 5)),
+        "filler": [
+            f"{rng.choice(ACTIONS)} {rng.choice(OBJECTS)} using {rng.choice(written_skills)} at {rng.choice(COMPANIES)}."
+            for _ in range(rng.randint(*filler_sentences))
+        ]
+    }
+
+def resume_text(fields):
+    lines = [
+        fields["name"],
+        f"Email: {fields['email']} | Phone: {fields['phone']}",
+        "Summary",
+        f"{fields['experience']} years of experience. Strengths: {', '.join(fields['soft_skills'])}.",
+        "Skills",
+        ", ".join(fields["written_skills"]),
+        "Experience",
+        *fields["filler"],
+        "Projects",
+        *[f"{domain.title()} project delivered end to end." for domain in fields["project_domains"]],
+        "Education",
+        EDUCATION_PHRASES.get(fields["education"], fields["education"].title()),
+    ]
+    if fields["certifications"]:
+        lines += ["Certifications", *fields["certifications"]]
+    return "\n".join(lines)
+
+def resume_pdf(fields):
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=11)
+    for line in resume_text(fields).splitlines():
+        pdf.multi_cell(0, 6, _latin1(line))
+        pdf.ln(1)
+    output = pdf.output(dest="S")  # str on fpdf 1.x, bytearray on fpdf2
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+def parsed_resume(fields):
+    # parsed_data as the parser would store it, without paying for a real parse
+    return {
+        "name": fields["name"],
+        "email": fields["email"],
+        "skills": [s.title() for s in fields["skills"]],
+        "experience": fields["experience"],
+        "education": [fields["education"].title()],
+        "certifications": fields["certifications"],
+        "project_domains": [d.title() for d in fields["project_domains"]],
+        "soft_skills": [s.title() for s in fields["soft_skills"]],
+        "grammar_score": 80,
+        "text": resume_text(fields).lower()
+    }
+
+
+# ===================== Jobs & Applications =====================
+def job_posting(index, seed=0, shortlist=10):
+    rng = _rng(seed, index, salt=1)
+    skills = rng.sample(SKILL_SET, rng.randint(3, 6))
+    title = rng.choice(JOB_TITLES)
+    return {
+        "id": index + 1,
+        "recruiter_id": 1,
+        "job_title": title,
+        "company_name": rng.choice(COMPANIES),
+        "skills": ", ".join(skills),
+        "education": rng.choice(["btech", "bachelor", "mtech", "bsc"]),
+        "certifications": ", ".join(rng.sample(CERTIFICATE_SUGGESTIONS, rng.randint(0, 2))),
+        "experience_required": f"{rng.randint(0, 5)} years",
+        "description": f"We are hiring a {title} to work on {', '.join(rng.sample(TECH_DOMAINS, 2))} "
+                       f"with {', '.join(skills)}.",
+        "num_resumes_to_shortlist": shortlist,
+        "status": "active"
+    }
+
+def applications_for_job(job, count, seed=0, start=0):
+    # Rows shaped like fetch_applications_by_job(), minus the PDF blob
+    rows = []
+    for i in range(start, start + count):
+        fields = resume_fields(i, seed)
+        rows.append({
+            "id": i + 1,
+            "job_id": job["id"],
+            "candidate_id": i + 1,
+            "resume_id": i + 1,
+            "applied_at": None,
+            "name": fields["name"],
+            "email": fields["email"],
+            "phone": fields["phone"],
+            "file_name": f"resume_{i + 1}.pdf",
+            "file_data": None,
+            "parsed_data": parsed_resume(fields)
+        })
+    return rows
+
+
+# ===================== CLI =====================
+def write_pdf_corpus(directory, count, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(directory, f"resume_{i:06d}.pdf"), "wb") as f:
+            f.write(resume_pdf(resume_fields(i, seed)))
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic resume PDF corpus")
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(write_pdf_corpus(args.directory, args.count, args.seed))
+
+if __name__ == "__main__":
+    main()
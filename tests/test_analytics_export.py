@@ -0,0 +1,77 @@
+import datetime as dt
+import io
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("sentence_transformers")
+
+import db_backends
+import report_generator
+import resume_chunks
+import synthetic_corpus as corpus
+
+try:
+    import analytics_export
+    import database
+    import ml_ranking
+except OSError as e:  # spaCy model not downloaded
+    pytest.skip(f"parser model unavailable: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def ranking_run(tmp_path, monkeypatch):
+    db_backends.set_backend("sqlite", str(tmp_path / "export.db"))
+    monkeypatch.setattr(resume_chunks, "CHUNK_CACHE_DIR", str(tmp_path / "chunks"))
+    monkeypatch.setattr(ml_ranking, "encode_texts",
+                        lambda texts: np.random.default_rng(len(texts)).normal(size=(len(texts), 16)).astype(np.float32))
+    resume_chunks.clear_chunk_cache()
+
+    database.execute_query("INSERT INTO users (username, email) VALUES ('rec', 'rec@example.com')")
+    for i in range(12):
+        database.execute_query("INSERT INTO users (username, email) VALUES (%s, %s)", (f"c{i}", f"c{i}@example.com"))
+    database.upsert_resumes_batch([
+        (i + 2, b"%d" % i, f"r{i}.pdf", 1, corpus.parsed_resume(corpus.resume_fields(i))) for i in range(12)
+    ])
+    job_id = database.insert_job(1, "Data Engineer", "", "python developer with sql", "Acme", "", "", "Python, SQL",
+                                 "1-3 Years", "BTech", "", "", 1, None, "", 3, dt.datetime.now())
+    for candidate_id in range(2, 14):
+        database.apply_to_job(candidate_id, job_id)
+    filters = ml_ranking.build_filters_from_job(database.fetch_job_by_id(job_id))
+    run = {
+        "run_id": "run-export", "filters": filters, "model_version": "model-at-rank-time",
+        "candidates": ml_ranking.rank_resumes(job_id, filters, full_pool=True),
+    }
+    yield job_id, run
+    db_backends.close_sqlite_connections()
+    resume_chunks.clear_chunk_cache()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_round_trip(ranking_run, tmp_path, fmt):
+    job_id, run = ranking_run
+    path = str(tmp_path / f"run.{fmt}")
+    assert analytics_export.export_ranking_run(path, run, job_id, fmt) == len(run["candidates"])
+
+    frame = analytics_export.load_ranking_export(path)
+    assert list(frame["application_id"]) == [c["id"] for c in run["candidates"]]
+    assert list(frame["rank"]) == list(range(1, len(run["candidates"]) + 1))
+    assert list(frame["match_score"]) == [c["match_score"] for c in run["candidates"]]
+    assert set(frame["model_version"]) == {"model-at-rank-time"}
+    assert set(frame["filter_fingerprint"]) == {ml_ranking.filters_fingerprint(run["filters"])}
+
+
+def test_cached_parquet_download_is_a_file(ranking_run):
+    job_id, run = ranking_run
+    report = report_generator.get_cached_report(
+        run["run_id"], "parquet", "Data Engineer", run["candidates"],
+        builder=lambda _title, _candidates: analytics_export.export_ranking_run_to_file(run, job_id)
+    )
+    assert isinstance(report, io.BufferedReader)
+    with report:
+        assert report.read(4) == b"PAR1"
+    path = report_generator._REPORT_CACHE[(run["run_id"], "parquet")]
+    report_generator.invalidate_cached_reports(run["run_id"])
+    assert not os.path.exists(path)
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+import ann_index
+from ann_index import IVFIndex
+
+
+def vector(seed, dim=8):
+    return np.random.default_rng(seed).normal(size=dim).astype(np.float32)
+
+
+def test_compaction_keeps_updates_from_other_processes(tmp_path, monkeypatch):
+    path = str(tmp_path / "index")
+    monkeypatch.setattr(ann_index, "COMPACT_AFTER_OPS", 3)
+    # Two processes following the same index directory
+    app, server = IVFIndex(8), IVFIndex(8)
+    app.log_add(1, vector(1), path)
+    server.log_add(2, vector(2), path)
+    app.log_add(3, vector(3), path)  # third op: app compacts and removes the log
+    assert not os.path.exists(os.path.join(path, ann_index.LOG_FILE))
+    assert set(IVFIndex.load(path).assignment) == {1, 2, 3}
+
+    # server's log offset belongs to the removed log; it reloads before writing
+    server.log_add(4, vector(4), path)
+    server.log_remove(1, path)
+    assert set(server.assignment) == {2, 3, 4}
+    assert set(IVFIndex.load(path).assignment) == {2, 3, 4}
+    app.sync(path)
+    assert set(app.assignment) == {2, 3, 4}
+
+
+def replayed(path):
+    # A process starting before the first compaction: no saved index yet, only the log
+    index = IVFIndex(8)
+    index.sync(path)
+    return index
+
+
+def test_torn_log_line_is_replaced(tmp_path):
+    path = str(tmp_path / "index")
+    index = IVFIndex(8)
+    index.log_add(1, vector(1), path)
+    with open(os.path.join(path, ann_index.LOG_FILE), "a") as f:
+        f.write('{"op": "add", "id": 9, "vec')  # writer killed mid-line
+    assert set(replayed(path).assignment) == {1}
+
+    index.log_add(2, vector(2), path)
+    loaded = replayed(path)
+    assert set(loaded.assignment) == {1, 2}
+    assert loaded.search(vector(2), k=1)[0][0] == 2
+
+
+def test_remove_of_unknown_id_is_not_logged(tmp_path):
+    path = str(tmp_path / "index")
+    index = IVFIndex(8)
+    index.log_remove(5, path)
+    assert not os.path.exists(os.path.join(path, ann_index.LOG_FILE))
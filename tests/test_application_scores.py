@@ -0,0 +1,102 @@
+import datetime as dt
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+import db_backends
+import resume_chunks
+import synthetic_corpus as corpus
+
+try:
+    import database
+    import ml_ranking
+except OSError as e:  # spaCy model not downloaded
+    pytest.skip(f"parser model unavailable: {e}", allow_module_level=True)
+
+
+def fake_encode(texts):
+    rng = np.random.default_rng(len(texts))
+    return rng.normal(size=(len(texts), 16)).astype(np.float32)
+
+
+@pytest.fixture
+def job_applications(tmp_path, monkeypatch):
+    db_backends.set_backend("sqlite", str(tmp_path / "scores.db"))
+    monkeypatch.setattr(resume_chunks, "CHUNK_CACHE_DIR", str(tmp_path / "chunks"))
+    monkeypatch.setattr(ml_ranking, "PRECOMPUTED_SCORES", True)
+    calls = []
+    monkeypatch.setattr(ml_ranking, "encode_texts", lambda texts: calls.append(len(texts)) or fake_encode(texts))
+    resume_chunks.clear_chunk_cache()
+
+    database.execute_query("INSERT INTO users (username, email) VALUES ('rec', 'rec@example.com')")
+    for i in range(3):
+        database.execute_query("INSERT INTO users (username, email) VALUES (%s, %s)", (f"c{i}", f"c{i}@example.com"))
+    database.upsert_resumes_batch([
+        (i + 2, b"%d" % i, f"r{i}.pdf", 1, corpus.parsed_resume(corpus.resume_fields(i))) for i in range(3)
+    ])
+    database.insert_job(1, "Data Engineer", "", "python developer with sql", "Acme", "", "", "Python, SQL",
+                        "1-3 Years", "BTech", "", "", 1, None, "", 3, dt.datetime.now())
+    for candidate_id in range(2, 5):
+        database.apply_to_job(candidate_id, 1)
+    filters = ml_ranking.build_filters_from_job(database.fetch_job_by_id(1))
+
+    def fetch():
+        return database.fetch_applications_by_job(1)
+
+    yield fetch, filters, calls
+    db_backends.close_sqlite_connections()
+    resume_chunks.clear_chunk_cache()
+
+
+def test_scores_are_reused_until_an_input_changes(job_applications):
+    fetch, filters, calls = job_applications
+    ml_ranking.complete_application_scores(fetch(), filters)
+    similarities, rules = ml_ranking.lookup_application_scores(fetch(), filters)
+    assert None not in similarities and None not in rules
+
+    # Same text, different certifications: the rule score is stale
+    resume = database.fetch_one("SELECT parsed_data FROM resumes WHERE candidate_id = 2")["parsed_data"]
+    resume["certifications"] = resume.get("certifications", []) + ["aws certified solutions architect"]
+    database.execute_query("UPDATE resumes SET parsed_data = %s WHERE candidate_id = 2", (json.dumps(resume),))
+    applications = fetch()
+    similarities, rules = ml_ranking.lookup_application_scores(applications, filters)
+    changed = [i for i, app in enumerate(applications) if app["candidate_id"] == 2]
+    assert [rules[i] for i in changed] == [None] and [similarities[i] for i in changed] == [None]
+    assert sum(rule is not None for rule in rules) == len(applications) - 1
+
+    # Recomputing only touches that application; its chunks come from the cache
+    calls.clear()
+    ml_ranking.complete_application_scores(applications, filters)
+    assert calls == []
+    assert None not in ml_ranking.lookup_application_scores(fetch(), filters)[1]
+
+
+@pytest.mark.parametrize("field, value", [
+    ("education", ["phd"]), ("experience", "12"), ("project_domains", ["robotics"]), ("parser_version", 99)
+])
+def test_resume_key_covers_scorer_inputs(field, value):
+    parsed = corpus.parsed_resume(corpus.resume_fields(0))
+    assert ml_ranking.resume_key(dict(parsed, **{field: value})) != ml_ranking.resume_key(parsed)
+    assert ml_ranking.resume_key(dict(parsed, grammar_score=1)) == ml_ranking.resume_key(parsed)
+
+
+def test_changed_filters_keep_the_similarity(job_applications):
+    fetch, filters, _ = job_applications
+    ml_ranking.complete_application_scores(fetch(), filters)
+    similarities, rules = ml_ranking.lookup_application_scores(fetch(), dict(filters, required_skills=["java"]))
+    assert None not in similarities and rules == [None] * len(rules)
+
+
+def test_toggling_chunking_drops_stored_similarities(job_applications, monkeypatch):
+    fetch, filters, _ = job_applications
+    ml_ranking.complete_application_scores(fetch(), filters)
+    assert None not in ml_ranking.lookup_application_scores(fetch(), filters)[0]
+
+    # Unchunked similarity encodes the whole text once instead of pooling chunks
+    monkeypatch.setattr(resume_chunks, "RESUME_CHUNKING", False)
+    monkeypatch.setattr(ml_ranking, "RESUME_CHUNKING", False)
+    similarities, rules = ml_ranking.lookup_application_scores(fetch(), filters)
+    assert similarities == [None] * len(similarities) and None not in rules
@@ -0,0 +1,65 @@
+import os
+import time
+
+import pytest
+
+import cold_storage
+import blob_store
+from blob_store import FilesystemBlobStore, blob_sha256
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(cold_storage, "COLD_STORAGE_DIR", str(tmp_path / "cold"))
+    store = FilesystemBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "_store", store)
+    return store
+
+
+def age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_frozen_blob_round_trip(store):
+    sha = store.put(b"%PDF frozen resume")
+    assert store.freeze(sha)[0] == len(b"%PDF frozen resume")
+    assert not os.path.exists(store.path_for(sha))
+    assert store.exists(sha)
+    assert bytes(store.open(sha)) == b"%PDF frozen resume"
+
+
+def test_hashes_lists_both_tiers_once(store):
+    hot = store.put(b"hot")
+    frozen = store.put(b"frozen")
+    store.freeze(frozen)
+    both = store.put(b"both")
+    store.freeze(both)
+    store.put(b"both")
+    assert sorted(store.hashes()) == sorted([hot, frozen, both])
+
+
+def test_garbage_collection_covers_cold_blobs(store):
+    kept_hot, kept_cold = store.put(b"kept hot"), store.put(b"kept cold")
+    gone_hot, gone_cold = store.put(b"gone hot"), store.put(b"gone cold")
+    store.freeze(kept_cold)
+    store.freeze(gone_cold)
+    for sha in (kept_hot, gone_hot):
+        age(store.path_for(sha), 7200)
+    for sha in (kept_cold, gone_cold):
+        age(cold_storage.cold_path("blobs", sha), 7200)
+
+    assert blob_store.collect_garbage({kept_hot, kept_cold}, dry_run=True) == 2
+    assert blob_store.collect_garbage({kept_hot, kept_cold}) == 2
+    assert sorted(store.hashes()) == sorted([kept_hot, kept_cold])
+    assert not store.exists(gone_cold)
+
+
+def test_recent_hot_copy_protects_old_frozen_copy(store):
+    sha = store.put(b"re-uploaded")
+    store.freeze(sha)
+    age(cold_storage.cold_path("blobs", sha), 7200)
+    store.put(b"re-uploaded")
+
+    assert blob_store.collect_garbage(set()) == 0
+    assert store.exists(sha) and blob_sha256(b"re-uploaded") == sha
@@ -0,0 +1,36 @@
+import gc
+import threading
+
+import db_backends
+
+
+def test_thread_connections_close_when_their_thread_exits(tmp_path):
+    db_backends.set_backend("sqlite", str(tmp_path / "threads.db"))
+    raws = []
+
+    def rerun():
+        conn = db_backends.sqlite_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM users")
+        raws.append(conn.raw)
+
+    try:
+        for _ in range(20):
+            thread = threading.Thread(target=rerun)
+            thread.start()
+            thread.join()
+        gc.collect()
+        assert db_backends.open_sqlite_connections() == 0
+        for raw in raws:
+            try:
+                raw.execute("SELECT 1")
+            except db_backends.sqlite3.ProgrammingError:
+                continue
+            raise AssertionError("connection of a finished thread is still open")
+
+        # The calling thread keeps its connection until close_sqlite_connections()
+        db_backends.sqlite_connection()
+        assert db_backends.open_sqlite_connections() == 1
+    finally:
+        db_backends.close_sqlite_connections()
+    assert db_backends.open_sqlite_connections() == 0
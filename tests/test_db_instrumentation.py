@@ -0,0 +1,44 @@
+import pytest
+
+import db_backends
+from db_instrumentation import _rows_bytes, _value_bytes, fingerprint, query_stats, reset_query_stats
+
+
+def test_value_bytes():
+    assert _value_bytes(None) == 0
+    assert _value_bytes("abcd") == 4
+    assert _value_bytes(b"\x00" * 10) == 10
+    assert _value_bytes(42) == 8
+    assert _value_bytes({"ab": "xyz", "c": [1, "de"]}) == 2 + 3 + 1 + 8 + 2
+
+
+def test_rows_bytes_counts_dict_values():
+    tuple_rows = [(1, "alice", b"\x00" * 100), (2, "bob", None)]
+    dict_rows = [{"id": 1, "name": "alice", "file_data": b"\x00" * 100}, {"id": 2, "name": "bob", "file_data": None}]
+    assert _rows_bytes(tuple_rows) == 8 + 5 + 100 + 8 + 3
+    # Same payload whether the cursor returns tuples or dicts; column names aren't counted
+    assert _rows_bytes(dict_rows) == _rows_bytes(tuple_rows)
+    assert _rows_bytes([{"parsed_data": {"text": "x" * 1000}}]) == 4 + 1000
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_backends, "DB_INSTRUMENTATION", True)
+    db_backends.set_backend("sqlite", str(tmp_path / "test.db"))
+    reset_query_stats()
+    yield db_backends.sqlite_connection()
+    db_backends.close_sqlite_connections()
+    reset_query_stats()
+
+
+def test_fetch_bytes_recorded_for_dict_rows(sqlite_db):
+    cur = sqlite_db.cursor(dict_rows=True)
+    cur.execute("CREATE TABLE blobs (id INTEGER, body TEXT)")
+    cur.execute("INSERT INTO blobs VALUES (1, ?)", ("x" * 5000,))
+    cur.execute("SELECT id, body FROM blobs")
+    assert cur.fetchall() == [{"id": 1, "body": "x" * 5000}]
+
+    statement = fingerprint("SELECT id, body FROM blobs")
+    entry = next(e for e in query_stats() if e["statement"] == statement)
+    assert entry["calls"] == 1 and entry["rows"] >= 0
+    assert entry["bytes"] == 8 + 5000
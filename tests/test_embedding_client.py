@@ -0,0 +1,90 @@
+import asyncio
+import socket
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+import embedding_client
+import embedding_server
+
+
+class StubModel:
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        if "boom" in texts:
+            raise RuntimeError("model failed")
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def server_address():
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    holder = {}
+
+    async def start():
+        batcher = embedding_server.MicroBatcher(StubModel(), wait_ms=1)
+        holder["batcher"] = asyncio.ensure_future(batcher.run())
+        server = await asyncio.start_server(lambda r, w: embedding_server.handle_client(batcher, r, w), "127.0.0.1", 0)
+        holder["server"] = server
+        holder["address"] = "127.0.0.1:%s" % server.sockets[0].getsockname()[1]
+        ready.set()
+
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(start()), loop.run_forever()), daemon=True)
+    thread.start()
+    ready.wait(5)
+    yield holder["address"]
+
+    async def stop():
+        holder["server"].close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        loop.stop()
+
+    asyncio.run_coroutine_threadsafe(stop(), loop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture
+def client(server_address, monkeypatch):
+    monkeypatch.setattr(embedding_client, "EMBEDDING_SERVER", server_address)
+    monkeypatch.setattr(embedding_client, "_down_until", 0.0)
+    embedding_client._drop_socket()
+    yield
+    embedding_client._drop_socket()
+
+
+def test_encode_round_trip(client):
+    vectors = embedding_client.try_encode_remote(["ab", "abcd"])
+    assert vectors.tolist() == [[2.0, 1.0], [4.0, 1.0]]
+
+
+def test_request_error_does_not_mark_server_down(client):
+    assert embedding_client.try_encode_remote(["boom"]) is None
+    assert embedding_client.server_available()
+    # Same connection keeps working
+    assert embedding_client.try_encode_remote(["abc"]).tolist() == [[3.0, 1.0]]
+
+
+def test_connection_failure_marks_server_down(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    monkeypatch.setattr(embedding_client, "EMBEDDING_SERVER", f"127.0.0.1:{port}")
+    monkeypatch.setattr(embedding_client, "_down_until", 0.0)
+    embedding_client._drop_socket()
+    assert embedding_client.try_encode_remote(["abc"]) is None
+    assert not embedding_client.server_available()
+
+
+def test_client_import_has_no_side_effects():
+    code = ("import logging, sys, embedding_client; "
+            "print('embedding_server' in sys.modules, len(logging.getLogger().handlers))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=embedding_client.__file__.rsplit("/", 1)[0] or ".")
+    assert out.stdout.split() == ["False", "0"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from embedding_store import EmbeddingStore, STORE_MODES, quantization_report
+
+
+def make_store(mode, n=50, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    store = EmbeddingStore(dim, mode)
+    store.add(list(range(n)), vectors)
+    return store, vectors
+
+
+@pytest.mark.parametrize("mode", STORE_MODES)
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, mode, mmap):
+    store, vectors = make_store(mode)
+    store.save(tmp_path / "store")
+    loaded = EmbeddingStore.load(tmp_path / "store", mmap=mmap)
+
+    assert (loaded.dim, loaded.mode, loaded.ids) == (store.dim, store.mode, store.ids)
+    queries = vectors[:3]
+    np.testing.assert_array_equal(loaded.score_matrix(queries), store.score_matrix(queries))
+    assert loaded.top_k(vectors[7], k=3) == store.top_k(vectors[7], k=3)
+
+
+def test_arrays_round_trip_shares_memory():
+    store, _ = make_store("int8")
+    vectors, scales, ids = store.arrays()
+    clone = EmbeddingStore.from_arrays(store.dim, store.mode, vectors, scales, ids)
+
+    assert np.shares_memory(clone.arrays()[0], vectors)
+    assert clone.ids == store.ids
+    np.testing.assert_array_equal(clone.get(5), store.get(5))
+
+
+def test_loaded_store_accepts_writes(tmp_path):
+    # A read-only memory map is copied on the first write
+    store, vectors = make_store("float16")
+    store.save(tmp_path / "store")
+    loaded = EmbeddingStore.load(tmp_path / "store", mmap=True)
+
+    loaded.add([100], vectors[:1])
+    assert loaded.remove(3)
+    assert len(loaded) == len(store)
+    assert 100 in loaded and 3 not in loaded
+    np.testing.assert_allclose(loaded.get(100), store.get(0), rtol=1e-3)
+
+
+@pytest.mark.parametrize("mode, min_recall, max_drift", [("float16", 0.99, 1e-3), ("int8", 0.95, 1e-2)])
+def test_quantization_report_bounds(mode, min_recall, max_drift):
+    # Clustered vectors, so the top 10 has close calls that quantization could reorder
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 128))
+    vectors = (centers[rng.integers(0, 20, 4000)] + 0.6 * rng.normal(size=(4000, 128))).astype(np.float32)
+    queries = (centers[rng.integers(0, 20, 50)] + 0.6 * rng.normal(size=(50, 128))).astype(np.float32)
+    report = quantization_report(vectors, queries, k=10, modes=(mode,))[mode]
+    assert report["recall_at_10"] >= min_recall
+    assert report["max_abs_score_drift"] <= max_drift
+    assert report["mean_abs_score_drift"] <= max_drift / 5
+    assert report["bytes_per_vector"] < 128 * 4
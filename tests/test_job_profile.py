@@ -0,0 +1,61 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+import db_backends
+
+try:
+    import database
+    import ml_ranking
+except OSError as e:  # spaCy model not downloaded
+    pytest.skip(f"parser model unavailable: {e}", allow_module_level=True)
+
+
+JOB_EDIT = dict(job_title="Backend Engineer", company_name="Acme", salary="", job_type="", skills="Java",
+                experience_required="3+ Years", education="MTech", certifications="", perks="",
+                description="java backend", num_positions=1, deadline=None)
+
+
+@pytest.fixture
+def job_id(tmp_path, monkeypatch):
+    db_backends.set_backend("sqlite", str(tmp_path / "profiles.db"))
+    monkeypatch.setattr(ml_ranking, "encode_texts",
+                        lambda texts: np.ones((len(texts), 16), dtype=np.float32))
+    for cache in (ml_ranking._job_profiles, ml_ranking._job_vectors, ml_ranking._compiled_rules):
+        cache.clear()
+    database.execute_query("INSERT INTO users (username, email) VALUES ('rec', 'rec@example.com')")
+    return database.insert_job(1, "Data Engineer", "", "python developer with sql", "Acme", "", "", "Python, SQL",
+                               "1-3 Years", "BTech", "", "", 1, None, "", 3, dt.datetime.now())
+
+
+def test_update_recompiles_profile(job_id):
+    assert database.update_job(job_id, JOB_EDIT)
+    job = database.fetch_job_by_id(job_id)
+    profile = ml_ranking.current_job_profile(job)
+    assert profile["skills"] == ["Java"]
+    assert ml_ranking.build_filters_from_job(job)["required_skills"] == ["java"]
+
+
+def test_failed_recompile_leaves_no_stale_profile(job_id, monkeypatch):
+    def fail(_job_id):
+        raise RuntimeError("encoder unavailable")
+    monkeypatch.setattr(ml_ranking, "refresh_job_profile", fail)
+    assert database.update_job(job_id, JOB_EDIT)
+    job = database.fetch_job_by_id(job_id)
+    assert job["profile"] is None and job["profile_embedding"] is None
+    assert ml_ranking.load_job_profile(job) is None
+    filters = ml_ranking.build_filters_from_job(job)
+    assert filters["required_skills"] == ["java"]
+    assert filters["min_experience"] == 3
+
+
+def test_profile_ignored_when_columns_change_underneath(job_id):
+    database.execute_query("UPDATE jobs SET skills = %s WHERE id = %s", ("Haskell", job_id))
+    job = database.fetch_job_by_id(job_id)
+    assert job["profile"] is not None
+    assert ml_ranking.current_job_profile(job) is None
+    assert ml_ranking.load_job_profile(job) is None
+    assert ml_ranking.build_filters_from_job(job)["required_skills"] == ["haskell"]
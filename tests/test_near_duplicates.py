@@ -0,0 +1,79 @@
+import datetime as dt
+import random
+
+from near_duplicates import (
+    LSHIndex, minhash_signature, estimated_similarity, signature_for,
+    duplicate_clusters, collapse_duplicate_applications
+)
+
+VOCABULARY = [f"word{i}" for i in range(400)]
+
+
+def resume_text(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def edited(text, every=60):
+    # The same resume with a handful of words changed
+    words = text.split()
+    for i in range(0, len(words), every):
+        words[i] = "edited"
+    return " ".join(words)
+
+
+def test_signature_similarity_tracks_overlap():
+    original = resume_text(1)
+    assert estimated_similarity(minhash_signature(original), minhash_signature(original)) == 1.0
+    assert estimated_similarity(minhash_signature(original), minhash_signature(edited(original))) >= 0.8
+    assert estimated_similarity(minhash_signature(original), minhash_signature(resume_text(2))) < 0.2
+    assert minhash_signature("") is None
+
+
+def test_lsh_query_finds_near_copies_only():
+    index = LSHIndex()
+    for seed in range(20):
+        index.add(seed, minhash_signature(resume_text(seed)))
+
+    matches = index.query(minhash_signature(edited(resume_text(7))))
+    assert [key for key, _ in matches] == [7]
+    assert index.query(minhash_signature(resume_text(99))) == []
+    assert index.query(minhash_signature(resume_text(7)), exclude=7) == []
+
+
+def test_lsh_remove_and_replace():
+    index = LSHIndex()
+    index.add("a", minhash_signature(resume_text(1)))
+    index.add("a", minhash_signature(resume_text(2)))
+    assert len(index) == 1
+    assert index.query(minhash_signature(resume_text(1))) == []
+
+    index.remove("a")
+    assert len(index) == 0 and not index.buckets
+
+
+def test_duplicate_clusters_are_transitive():
+    base = resume_text(3)
+    signatures = [
+        minhash_signature(base), minhash_signature(resume_text(4)),
+        minhash_signature(edited(base)), None, minhash_signature(edited(base, every=70))
+    ]
+    clusters = sorted(sorted(cluster) for cluster in duplicate_clusters(signatures))
+    assert clusters == [[0, 2, 4], [1], [3]]
+
+
+def test_collapse_keeps_earliest_application():
+    base = resume_text(5)
+    day = dt.datetime(2024, 1, 1)
+    applications = [
+        {"id": 1, "candidate_id": 10, "applied_at": day + dt.timedelta(days=2), "parsed_data": {"text": base}},
+        {"id": 2, "candidate_id": 11, "applied_at": day, "parsed_data": {"minhash": minhash_signature(edited(base))}},
+        {"id": 3, "candidate_id": 12, "applied_at": day, "parsed_data": {"text": resume_text(6)}},
+    ]
+    kept = collapse_duplicate_applications(applications)
+
+    assert sorted(app["id"] for app in kept) == [2, 3]
+    survivor = next(app for app in kept if app["id"] == 2)
+    assert survivor["duplicate_count"] == 1
+    assert survivor["duplicates"][0]["candidate_id"] == 10
+    assert signature_for(applications[1]["parsed_data"]) == applications[1]["parsed_data"]["minhash"]
@@ -0,0 +1,37 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+try:
+    import ranker_cli
+except OSError as e:  # spaCy model not downloaded
+    pytest.skip(f"parser model unavailable: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def api_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ranker_cli.make_handler(ranker_cli.RankingService(1, 5)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("body, message", [
+    (b"[]", "Request body must be a JSON object"),
+    (b'"rank"', "Request body must be a JSON object"),
+    (b"null", "Request body must be a JSON object"),
+    (b"not json", "Request body must be JSON"),
+    (b"{}", "job_id is required"),
+])
+def test_bad_bodies_get_400(api_url, body, message):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(urllib.request.Request(f"{api_url}/rank", data=body, method="POST"), timeout=5)
+    assert error.value.code == 400
+    assert json.loads(error.value.read())["error"] == message
@@ -0,0 +1,62 @@
+import csv
+import io
+import os
+
+import pytest
+
+import report_generator
+
+
+def candidate_pool(size):
+    return [
+        {
+            "name": f"Candidate {i}", "email": f"c{i}@example.com", "phone": "555-0100",
+            "match_score": 100 - i % 100, "parsed_data": {"skills": ["python", "sql"]},
+            "file_name": f"c{i}.pdf", "explanation": "Skills: python, sql\nExperience: 3 years",
+        }
+        for i in range(size)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    yield
+    for run_id in {key[0] for key in report_generator._REPORT_CACHE}:
+        report_generator.invalidate_cached_reports(run_id)
+
+
+def test_full_pool_report_is_served_from_a_file():
+    pool = candidate_pool(5000)
+    report = report_generator.get_cached_report("run-1", "csv_full", "Data Engineer", lambda: pool)
+    assert isinstance(report, io.BufferedReader)
+    with report:
+        rows = list(csv.reader(io.TextIOWrapper(report, encoding="utf-8", newline="")))
+    assert rows[0] == report_generator.CSV_HEADERS
+    assert len(rows) == len(pool) + 1
+    assert rows[-1][1] == "Candidate 4999"
+
+    # A hit reopens the cached file instead of rebuilding the report
+    again = report_generator.get_cached_report("run-1", "csv_full", "Data Engineer", lambda: pytest.fail("rebuilt"))
+    with again:
+        assert again.read().count(b"\n") == len(pool) + 1
+
+    path = report_generator._REPORT_CACHE[("run-1", "csv_full")]
+    report_generator.invalidate_cached_reports("run-1")
+    assert not os.path.exists(path)
+
+
+def test_missing_report_file_is_rebuilt():
+    report_generator.get_cached_report("run-2", "csv_full", "Data Engineer", candidate_pool(3)).close()
+    os.remove(report_generator._REPORT_CACHE[("run-2", "csv_full")])
+    with report_generator.get_cached_report("run-2", "csv_full", "Data Engineer", candidate_pool(3)) as report:
+        assert report.read().count(b"\n") == 4
+
+
+def test_cached_reports_are_accepted_by_download_button():
+    button = pytest.importorskip("streamlit.elements.widgets.button")
+    from streamlit.proto.DownloadButton_pb2 import DownloadButton
+
+    pool = candidate_pool(2000)
+    for kind in ("csv", "csv_full"):
+        report = report_generator.get_cached_report("run-3", kind, "Data Engineer", pool)
+        button.marshall_file("coordinates", report, DownloadButton(), "text/csv", f"pool.{kind}")
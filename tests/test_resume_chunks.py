@@ -0,0 +1,97 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import resume_chunks
+from resume_chunks import embed_resume_chunks, extend_offsets, pool_chunk_scores
+
+DIM = 8
+
+
+def fake_encode(chunks):
+    # Deterministic vector per chunk text
+    return np.stack([np.random.default_rng(abs(hash(chunk)) % (1 << 32)).normal(size=DIM) for chunk in chunks])
+
+
+def long_resume(i):
+    sections = ["Experience", "Projects", "Skills", "Education"]
+    return "\n".join(f"{heading}\n" + " ".join(f"r{i}s{j}w{k}" for k in range(150)) for j, heading in enumerate(sections))
+
+
+@pytest.fixture(autouse=True)
+def chunk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(resume_chunks, "CHUNK_CACHE_DIR", str(tmp_path / "chunks"))
+    monkeypatch.setattr(resume_chunks, "_disk_count", None)
+    resume_chunks.clear_chunk_cache()
+    yield
+    resume_chunks.clear_chunk_cache()
+
+
+def test_pool_chunk_scores_per_resume():
+    scores = np.array([0.1, 0.9, 0.5, 0.3, 0.2, 0.4], dtype=np.float32)
+    offsets = [0, 2, 3, 6]
+    np.testing.assert_allclose(pool_chunk_scores(scores, offsets, "max"), [0.9, 0.5, 0.4])
+    np.testing.assert_allclose(pool_chunk_scores(scores, offsets, "mean"), [0.5, 0.5, 0.3], rtol=1e-6)
+    np.testing.assert_allclose(pool_chunk_scores(scores, offsets, "topk", top_k=2), [0.5, 0.5, 0.35], rtol=1e-6)
+    matrix = np.stack([scores, -scores], axis=1)
+    np.testing.assert_allclose(pool_chunk_scores(matrix, offsets, "max"), [[0.9, -0.1], [0.5, -0.5], [0.4, -0.2]])
+    with pytest.raises(ValueError):
+        pool_chunk_scores(scores, offsets, "median")
+
+
+def test_grouped_offsets_match_single_pass():
+    texts = [long_resume(i) for i in range(7)]
+    vectors, offsets = embed_resume_chunks(texts, fake_encode, "test-model")
+    assert offsets[0] == 0 and offsets[-1] == len(vectors)
+    assert all(b > a for a, b in zip(offsets, offsets[1:]))
+
+    grouped_vectors, grouped_offsets = [], [0]
+    for start in range(0, len(texts), 3):
+        group_vectors, group_offsets = embed_resume_chunks(texts[start:start + 3], fake_encode, "test-model")
+        assert extend_offsets(grouped_offsets, group_offsets) == sum(len(v) for v in grouped_vectors)
+        grouped_vectors.append(group_vectors)
+
+    assert grouped_offsets == offsets
+    # The second pass reads the float16 disk/memory cache, hence the tolerance
+    query = fake_encode(["job"])[0]
+    query /= np.linalg.norm(query)
+    np.testing.assert_allclose(
+        pool_chunk_scores(np.vstack(grouped_vectors) @ query, grouped_offsets),
+        pool_chunk_scores(vectors @ query, offsets), atol=2e-3
+    )
+
+
+def test_only_new_chunks_are_encoded():
+    calls = []
+
+    def counting_encode(chunks):
+        calls.append(len(chunks))
+        return fake_encode(chunks)
+
+    embed_resume_chunks([long_resume(1)], counting_encode, "test-model")
+    resume_chunks._memory.clear()
+    embed_resume_chunks([long_resume(1), long_resume(2)], counting_encode, "test-model")
+    assert calls[1] == calls[0]
+
+
+def test_disk_cache_is_capped(monkeypatch):
+    monkeypatch.setattr(resume_chunks, "CHUNK_CACHE_MAX_ENTRIES", 10)
+    embed_resume_chunks([long_resume(i) for i in range(10)], fake_encode, "test-model")
+    files = [f for _, _, names in os.walk(resume_chunks.CHUNK_CACHE_DIR) for f in names if f.endswith(".npy")]
+    assert 0 < len(files) <= 10
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    vectors, _ = embed_resume_chunks([long_resume(3)], fake_encode, "test-model")
+    resume_chunks._memory.clear()
+    old = time.time() - 40 * 86400
+    for root, _, names in os.walk(resume_chunks.CHUNK_CACHE_DIR):
+        for name in names:
+            os.utime(os.path.join(root, name), (old, old))
+
+    calls = []
+    monkeypatch.setattr(resume_chunks, "CHUNK_CACHE_MAX_AGE_DAYS", 30)
+    embed_resume_chunks([long_resume(3)], lambda chunks: calls.append(len(chunks)) or fake_encode(chunks), "test-model")
+    assert calls == [len(vectors)]
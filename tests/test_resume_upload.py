@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+import blob_store
+import db_backends
+
+try:
+    import database
+    import synthetic_corpus as corpus
+except OSError as e:  # spaCy model not downloaded
+    pytest.skip(f"parser model unavailable: {e}", allow_module_level=True)
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+@pytest.fixture
+def parses(tmp_path, monkeypatch):
+    db_backends.set_backend("sqlite", str(tmp_path / "upload.db"))
+    monkeypatch.setattr(blob_store, "_store", blob_store.FilesystemBlobStore(str(tmp_path / "blobs")))
+    database.execute_query("INSERT INTO users (username, email) VALUES ('c0', 'c0@example.com')")
+    results = []
+    monkeypatch.setattr(database, "parse_resume", lambda uploaded_file: results.append(uploaded_file.name) or next(outcomes))
+    outcomes = iter([
+        corpus.parsed_resume(corpus.resume_fields(0)),
+        {"parse_status": "failed", "parse_error": "timed out", "text": ""},
+    ])
+    yield results
+    db_backends.close_sqlite_connections()
+
+
+def test_failed_parse_keeps_stored_resume(parses):
+    assert database.store_uploaded_resume(1, Upload(b"%PDF good", "good.pdf"))
+    stored = database.fetch_one("SELECT file_name, file_sha256, parsed_data FROM resumes WHERE candidate_id = 1")
+
+    assert database.store_uploaded_resume(1, Upload(b"%PDF hostile", "hostile.pdf")) is False
+    assert database.fetch_one("SELECT file_name, file_sha256, parsed_data FROM resumes WHERE candidate_id = 1") == stored
+    # Each upload is parsed exactly once
+    assert parses == ["good.pdf", "hostile.pdf"]
@@ -0,0 +1,79 @@
+"""
+Move resumes that only belong to archived or expired jobs into compressed cold storage.
+
+    python tier_resumes.py --batch-size 200 --max-rate 500
+    python tier_resumes.py --as-of 2025-01-01 --limit 1000
+
+A resume qualifies once every job it was submitted to is archived
+(soft_delete_job) or past its deadline. Its raw parsed_data text moves to
+cold_storage.py and parsed_data keeps the compact features ranking reads
+(skills, education, experience, minhash, ...) plus "text_tier": "cold". The
+PDF is compressed into the cold tier once no hot resume shares the same file.
+Reads rehydrate transparently, and applying to an open job restores the text
+to the hot row. Safe to run repeatedly, e.g. nightly from cron.
+"""
+import json
+import time
+import logging
+import argparse
+import datetime as dt
+
+from database import move_resumes_to_cold, fetch_hot_blob_hashes
+from blob_store import freeze_blob
+from cold_storage import COLD_CODEC
+
+
+def tier(as_of=None, batch_size=200, max_rate=500.0, pause=0.0, limit=None):
+    as_of = as_of or dt.date.today()
+    stats = {"resumes": 0, "text_bytes": 0, "blobs": 0, "blob_bytes": 0, "blob_cold_bytes": 0, "codec": COLD_CODEC}
+    logging.info("Tiering resumes whose jobs are all archived or expired before %s", as_of)
+    started = time.perf_counter()
+    last_id = 0
+
+    while limit is None or stats["resumes"] < limit:
+        batch_started = time.perf_counter()
+        moved = move_resumes_to_cold(as_of, last_id, batch_size)
+        if not moved:
+            break
+        last_id = moved[-1][0]
+        stats["resumes"] += len(moved)
+        stats["text_bytes"] += sum(text_bytes for _, _, text_bytes in moved)
+
+        # Identical PDFs are shared; only freeze files no hot resume points at
+        candidates = {file_sha256 for _, file_sha256, _ in moved if file_sha256}
+        for file_sha256 in candidates - fetch_hot_blob_hashes(candidates):
+            hot_bytes, cold_bytes = freeze_blob(file_sha256)
+            if hot_bytes:
+                stats["blobs"] += 1
+                stats["blob_bytes"] += hot_bytes
+                stats["blob_cold_bytes"] += cold_bytes
+
+        elapsed = time.perf_counter() - started
+        logging.info("Tiered %s resumes (%.1f MB text, %s blobs %.1f MB -> %.1f MB, %.1f/sec)",
+                     stats["resumes"], stats["text_bytes"] / 1e6, stats["blobs"], stats["blob_bytes"] / 1e6,
+                     stats["blob_cold_bytes"] / 1e6, stats["resumes"] / elapsed if elapsed else 0.0)
+
+        if max_rate:
+            min_duration = len(moved) / max_rate
+            spent = time.perf_counter() - batch_started
+            if spent < min_duration:
+                time.sleep(min_duration - spent)
+        if pause:
+            time.sleep(pause)
+
+    logging.info("Tiering finished: %s resumes moved to cold storage", stats["resumes"])
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Move resumes tied only to archived/expired jobs to cold storage")
+    parser.add_argument("--as-of", type=dt.date.fromisoformat, default=None,
+                        help="Treat jobs with a deadline before this date as expired (default: today)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--max-rate", type=float, default=500.0, help="Max resumes/sec (0 = unlimited)")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to idle between batches")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many resumes")
+    args = parser.parse_args()
+    print(json.dumps(tier(args.as_of, args.batch_size, args.max_rate, args.pause, args.limit)))
+
+if __name__ == "__main__":
+    main()
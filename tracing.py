@@ -0,0 +1,236 @@
+import os
+import io
+import json
+import time
+import uuid
+import pstats
+import logging
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+
+# Stage timing for ranking and parsing. Disabled by default: span() then hands
+# back one shared no-op object and count()/observe() return immediately.
+#   TRACING=1        record spans, counters and histograms
+#   TRACE_LOG=1      also log every finished span as one JSON line
+#   METRICS_FILE     Prometheus text file rewritten every METRICS_INTERVAL seconds
+TRACING_ENABLED = os.getenv("TRACING", "0") == "1"
+TRACE_LOG = os.getenv("TRACE_LOG", "0") == "1"
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "15"))
+METRICS_PREFIX = "resume_ranker_"
+# Seconds; spans range from sub-millisecond rule scoring to multi-second encodes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_local = threading.local()
+trace_logger = logging.getLogger("trace")
+
+
+def set_tracing(enabled, log_spans=None):
+    global TRACING_ENABLED, TRACE_LOG
+    TRACING_ENABLED = enabled
+    if log_spans is not None:
+        TRACE_LOG = log_spans
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# ===================== Counters & Histograms =====================
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+def count(name, value=1, **labels):
+    if not TRACING_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels):
+    if not TRACING_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram(buckets)
+        histogram.observe(value)
+
+def reset_metrics():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# ===================== Spans =====================
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("name", "fields", "trace_id", "parent", "started", "duration")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.duration = None
+
+    def set(self, **fields):
+        # Extra attributes (row counts, cache hits) for the structured log line
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        self.trace_id = stack[0].trace_id if stack else uuid.uuid4().hex[:16]
+        stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        _local.stack.pop()
+        status = "error" if exc_type else "ok"
+        observe("stage_seconds", self.duration, stage=self.name)
+        if exc_type:
+            count("stage_errors_total", stage=self.name)
+        if TRACE_LOG:
+            trace_logger.info(json.dumps({
+                "span": self.name, "trace_id": self.trace_id, "parent": self.parent,
+                "ms": round(self.duration * 1000, 3), "status": status, **self.fields
+            }, default=str))
+        return False
+
+def span(name, **fields):
+    if not TRACING_ENABLED:
+        return _NULL_SPAN
+    return Span(name, fields)
+
+def traced(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return fn(*args, **kwargs)
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ===================== Prometheus Export =====================
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+def render_prometheus():
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, (h.buckets, list(h.counts), h.total, h.count)) for key, h in _histograms.items())
+    lines, typed = [], set()
+    for (name, labels), value in counters:
+        metric = METRICS_PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    for (name, labels), (buckets, counts, total, n) in histograms:
+        metric = METRICS_PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} histogram")
+            typed.add(metric)
+        cumulative = 0
+        for bound, bucket_count in zip(buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {n}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {n}")
+    return "\n".join(lines) + "\n"
+
+def write_metrics_file(path=None):
+    path = path or METRICS_FILE
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)  # node_exporter's textfile collector never sees a partial file
+
+_writer = None
+
+def start_metrics_writer(path=None, interval=METRICS_INTERVAL):
+    # Background thread rewriting the metrics file; a no-op when no file is configured
+    global _writer
+    path = path or METRICS_FILE
+    if not path or _writer is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_metrics_file(path)
+            except OSError as e:
+                logging.warning("Could not write metrics file %s: %s", path, e)
+
+    _writer = threading.Thread(target=run, name="metrics-writer", daemon=True)
+    _writer.start()
+
+
+# ===================== Profiling =====================
+@contextmanager
+def profiled(output=None, limit=30):
+    # Opt-in cProfile capture around one request. Writes a .prof file when output is
+    # a path, otherwise the report (top functions by cumulative time) lands in result["report"].
+    result = {"report": ""}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        if output:
+            profiler.dump_stats(output)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        result["report"] = stream.getvalue()